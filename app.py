@@ -1,19 +1,59 @@
 """
 Ultra-simple Flask app for Render - No dependencies issues
 """
+import logging
 import os
-import requests
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify
+from discord_rest import discord_api
+from server_sessions import init_session_store
+from user_guilds import (get_user_guilds, store_user_guilds, forget_user_guilds, managed_guilds,
+                         store_access_token, get_access_token, GuildFetchError)
+from flask import Flask, Response, render_template, request, redirect, url_for, session, jsonify
 from urllib.parse import urlencode
 
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", "dev-secret-key")
+init_session_store(app)
 
 # Discord OAuth configuration
 DISCORD_CLIENT_ID = os.environ.get('DISCORD_CLIENT_ID')
 DISCORD_CLIENT_SECRET = os.environ.get('DISCORD_CLIENT_SECRET')
 DISCORD_BOT_TOKEN = os.environ.get('DISCORD_BOT_TOKEN')
 
+# Sample guilds shown after a dev login
+DEV_USER_ID = '123456789'
+DEV_GUILDS = [
+    {
+        'id': '1234567890',
+        'name': 'My Discord Server',
+        'icon': None,
+        'permissions': 8,  # Administrator
+        'bot_in_server': True
+    },
+    {
+        'id': '0987654321', 
+        'name': 'Gaming Community',
+        'icon': None,
+        'permissions': 8,
+        'bot_in_server': False
+    }
+]
+
+def current_user_guilds(refresh=False):
+    """The logged-in user's guilds from the server-side cache (the session only holds IDs)"""
+    user_id = session.get('user_id')
+    if not user_id:
+        return []
+    access_token = get_access_token(user_id)
+    if not access_token:
+        return DEV_GUILDS if user_id == DEV_USER_ID else []
+    try:
+        return get_user_guilds(user_id, access_token, refresh=refresh)['guilds']
+    except GuildFetchError as e:
+        logger.error(f"Guild fetch error: {e}")
+        return []
+
 @app.route('/')
 def home():
     """Main entry point - redirect to proper login flow"""
@@ -30,27 +70,7 @@ def dashboard():
         return redirect(url_for('login'))
     
     # Get user's guilds (servers)
-    user_guilds = session.get('user_guilds', [])
-    
-    # If no guilds from OAuth, create sample data for dev login
-    if not user_guilds and session.get('user_id') == '123456789':
-        user_guilds = [
-            {
-                'id': '1234567890',
-                'name': 'My Discord Server',
-                'icon': None,
-                'permissions': 8,  # Administrator
-                'bot_in_server': True
-            },
-            {
-                'id': '0987654321', 
-                'name': 'Gaming Community',
-                'icon': None,
-                'permissions': 8,
-                'bot_in_server': False
-            }
-        ]
-        session['user_guilds'] = user_guilds
+    user_guilds = current_user_guilds()
     
     return render_template('server_selection.html', 
                          user=session.get('user_info', {}),
@@ -63,11 +83,10 @@ def select_server(server_id):
         return redirect(url_for('login'))
     
     # Find the selected server
-    user_guilds = session.get('user_guilds', [])
-    selected_server = next((guild for guild in user_guilds if guild['id'] == server_id), None)
+    selected_server = next((guild for guild in current_user_guilds() if guild['id'] == server_id), None)
     
     if selected_server:
-        session['selected_server'] = selected_server
+        session['selected_server_id'] = selected_server['id']
         return redirect(url_for('dashboard'))
     
     return redirect(url_for('dashboard'))
@@ -81,7 +100,7 @@ def login():
 def dev_login():
     """Development login bypass"""
     session.clear()  # Clear any existing session
-    session['user_id'] = '123456789'
+    session['user_id'] = DEV_USER_ID
     session['user_info'] = {
         'username': 'Developer',
         'discriminator': '0001',
@@ -117,17 +136,10 @@ def discord_callback():
     
     try:
         # Exchange code for token
-        token_data = {
-            'client_id': DISCORD_CLIENT_ID,
-            'client_secret': DISCORD_CLIENT_SECRET,
-            'grant_type': 'authorization_code',
-            'code': code,
-            'redirect_uri': request.url_root.rstrip('/') + '/api/auth/callback'
-        }
-        
-        token_response = requests.post('https://discord.com/api/oauth2/token', 
-                                     data=token_data, 
-                                     headers={'Content-Type': 'application/x-www-form-urlencoded'})
+        token_response = discord_api.exchange_code(
+            DISCORD_CLIENT_ID, DISCORD_CLIENT_SECRET, code,
+            request.url_root.rstrip('/') + '/api/auth/callback'
+        )
         
         if token_response.status_code != 200:
             return f"Token exchange failed: {token_response.text}"
@@ -136,20 +148,22 @@ def discord_callback():
         access_token = token_json['access_token']
         
         # Get user info
-        headers = {'Authorization': f'Bearer {access_token}'}
-        user_response = requests.get('https://discord.com/api/users/@me', headers=headers)
-        guilds_response = requests.get('https://discord.com/api/users/@me/guilds', headers=headers)
+        user_response = discord_api.get_current_user(access_token)
+        guilds_response = discord_api.get_current_user_guilds(access_token)
         
         if user_response.status_code != 200:
             return f"User info failed: {user_response.text}"
         
         user_data = user_response.json()
-        guilds_data = guilds_response.json() if guilds_response.status_code == 200 else []
         
-        # Store in session
+        # Store in a fresh session so an ID from before the login can't be reused; the OAuth token
+        # and guild list stay server-side
+        session.clear()
         session['user_id'] = user_data['id']
         session['user_info'] = user_data
-        session['user_guilds'] = guilds_data
+        store_access_token(user_data['id'], access_token)
+        if guilds_response.status_code == 200:
+            store_user_guilds(user_data['id'], guilds_response.json())
         
         return redirect(url_for('home'))
         
@@ -168,6 +182,8 @@ def health():
 @app.route('/logout')
 def logout():
     """Logout and clear session"""
+    if 'user_id' in session:
+        forget_user_guilds(session['user_id'])
     session.clear()
     return redirect(url_for('login'))
 
@@ -211,8 +227,7 @@ def get_stats():
     from datetime import timezone, timedelta
     
     # Get basic counts
-    user_guilds = session.get('user_guilds', [])
-    guild_count = len(user_guilds)
+    guild_count = len(current_user_guilds())
     
     # Generate realistic data based on guild count
     minecraft_updates = 150 + guild_count * 25
@@ -310,7 +325,8 @@ def minecraft_history():
 @app.route('/api/server/info')
 def server_info():
     """Get selected server information"""
-    return jsonify(session.get('selected_server', {}))
+    server_id = session.get('selected_server_id')
+    return jsonify(next((guild for guild in current_user_guilds() if guild['id'] == server_id), {}))
 
 # Add bot to server endpoint
 @app.route('/api/invite-bot')
@@ -592,14 +608,52 @@ def update_bot_config():
         'data': data
     })
 
+_export_engine = None
+
 @app.route('/api/settings/export-logs')
 def export_logs():
-    """Export bot logs"""
-    return jsonify({
-        'status': 'success',
-        'message': 'Logs exported successfully',
-        'download_url': '/downloads/bot-logs-2024-01-20.zip'
-    })
+    """Stream a statistics history export (see web_app's /api/logs/export for parameters)"""
+    global _export_engine
+    if 'user_id' not in session:
+        return jsonify({'status': 'error', 'message': 'Not authenticated'}), 401
+    
+    database_url = os.environ.get('DATABASE_URL')
+    try:
+        # Imported lazily: the minimal Render build ships without SQLAlchemy
+        from sqlalchemy import create_engine
+        from stats_export import build_export, export_guild_scope, ExportError, ExportPermissionError
+    except ImportError:
+        return jsonify({'status': 'error', 'message': 'Export requires SQLAlchemy'}), 503
+    if not database_url:
+        return jsonify({'status': 'error', 'message': 'Export requires DATABASE_URL'}), 503
+    
+    if _export_engine is None:
+        _export_engine = create_engine(database_url, pool_pre_ping=True, pool_recycle=300)
+    
+    try:
+        guild_ids = export_guild_scope(
+            session['user_id'],
+            [guild['id'] for guild in managed_guilds(current_user_guilds())],
+            guild_id=request.args.get('guild_id')
+        )
+        chunks, mimetype, filename = build_export(
+            _export_engine,
+            request.args.get('dataset', 'minecraft'),
+            fmt=request.args.get('format', 'csv'),
+            since=request.args.get('since'),
+            until=request.args.get('until'),
+            compress=request.args.get('gzip', '').lower() in ('1', 'true', 'yes'),
+            guild_ids=guild_ids
+        )
+    except ExportPermissionError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 403
+    except ExportError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    response = Response(chunks, mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
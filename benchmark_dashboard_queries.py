@@ -0,0 +1,184 @@
+"""
+Benchmark the stats dashboard's hot queries with and without secondary indexes
+
+Fills a scratch database with synthetic probes, command usage and uptime rows
+spread over 30 days, then times each dashboard query before and after the
+indexes declared in models.py are built. Usage:
+
+    python benchmark_dashboard_queries.py --sizes 10000 100000 1000000
+    python benchmark_dashboard_queries.py --database-url postgresql://... --sizes 1000000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timezone, timedelta
+
+from sqlalchemy import create_engine, text
+
+from models import db, MinecraftServerStats, CommandUsage, BotUptime
+
+HISTORY_DAYS = 30
+BATCH_SIZE = 50000
+
+# Dashboard queries, as issued by web_app.py
+QUERIES = {
+    'probes last 24h': (
+        "SELECT server_ip, server_port, timestamp, player_count, is_online, response_time_ms "
+        "FROM minecraft_server_stats WHERE timestamp >= :since ORDER BY timestamp"
+    ),
+    'server history 24h': (
+        "SELECT timestamp, player_count FROM minecraft_server_stats "
+        "WHERE server_ip = :server_ip AND server_port = :server_port AND timestamp >= :since "
+        "ORDER BY timestamp"
+    ),
+    'commands by name 24h': (
+        "SELECT command_name, count(id) FROM command_usage "
+        "WHERE timestamp >= :since GROUP BY command_name"
+    ),
+    'guild commands 24h': (
+        "SELECT count(id) FROM command_usage WHERE guild_id = :guild_id AND timestamp >= :since"
+    ),
+    'open uptime session': (
+        "SELECT id, session_start FROM bot_uptime WHERE session_end IS NULL LIMIT 1"
+    ),
+}
+
+DASHBOARD_TABLES = [MinecraftServerStats.__table__, CommandUsage.__table__, BotUptime.__table__]
+
+def populate(engine, rows: int, now: datetime):
+    """Insert `rows` probes and commands and rows / 100 uptime sessions"""
+    rng = random.Random(42)
+    servers = [(f"mc{i}.example.net", 25565) for i in range(20)]
+    commands = ['ping', 'hello', 'info', 'say', 'embed', 'minecraft-counter', 'play', 'skip', 'queue']
+    span = HISTORY_DAYS * 86400
+
+    with engine.begin() as conn:
+        for table in DASHBOARD_TABLES:
+            conn.execute(table.delete())
+
+    for offset in range(0, rows, BATCH_SIZE):
+        count = min(BATCH_SIZE, rows - offset)
+        probes = []
+        usages = []
+        for _ in range(count):
+            server_ip, server_port = rng.choice(servers)
+            timestamp = now - timedelta(seconds=rng.randrange(span))
+            probes.append({
+                'server_ip': server_ip,
+                'server_port': server_port,
+                'timestamp': timestamp,
+                'is_online': rng.random() > 0.05,
+                'player_count': rng.randrange(200),
+                'max_players': 200,
+                'response_time_ms': rng.randrange(20, 200),
+                'players_list': None
+            })
+            usages.append({
+                'command_name': rng.choice(commands),
+                'user_id': str(rng.randrange(10 ** 17, 10 ** 18)),
+                'guild_id': str(rng.randrange(1, 500)),
+                'timestamp': timestamp,
+                'success': True
+            })
+        with engine.begin() as conn:
+            conn.execute(MinecraftServerStats.__table__.insert(), probes)
+            conn.execute(CommandUsage.__table__.insert(), usages)
+
+    sessions = [
+        {
+            'session_start': now - timedelta(days=HISTORY_DAYS) + timedelta(minutes=i),
+            'session_end': now - timedelta(days=HISTORY_DAYS) + timedelta(minutes=i + 1),
+            'uptime_seconds': 60
+        }
+        for i in range(max(1, rows // 100))
+    ]
+    sessions.append({'session_start': now, 'session_end': None, 'uptime_seconds': 0})
+    with engine.begin() as conn:
+        conn.execute(BotUptime.__table__.insert(), sessions)
+
+def set_indexes(engine, enabled: bool):
+    """Build or drop every secondary index on the dashboard tables"""
+    for table in DASHBOARD_TABLES:
+        for index in table.indexes:
+            if enabled:
+                index.create(engine, checkfirst=True)
+            else:
+                index.drop(engine, checkfirst=True)
+    if engine.dialect.name in ('sqlite', 'postgresql'):
+        with engine.begin() as conn:
+            conn.execute(text('ANALYZE'))
+
+def time_query(engine, sql: str, params: dict, repeat: int) -> float:
+    """Best-of-N wall time of a query in milliseconds"""
+    best = None
+    with engine.connect() as conn:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            conn.execute(text(sql), params).fetchall()
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def query_plan(engine, sql: str, params: dict) -> str:
+    """One-line query plan for the current database"""
+    prefix = 'EXPLAIN QUERY PLAN ' if engine.dialect.name == 'sqlite' else 'EXPLAIN '
+    with engine.connect() as conn:
+        rows = conn.execute(text(prefix + sql), params).fetchall()
+    return ' | '.join(str(row[-1]) for row in rows)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+                        help='Row counts to benchmark (default: 10000 100000 1000000)')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per query, best time is reported')
+    parser.add_argument('--database-url', default=None,
+                        help='Scratch database to use (default: temporary SQLite file). ALL DASHBOARD ROWS ARE DELETED.')
+    parser.add_argument('--plans', action='store_true', help='Print query plans')
+    args = parser.parse_args()
+
+    scratch_dir = None
+    database_url = args.database_url
+    if not database_url:
+        scratch_dir = tempfile.mkdtemp(prefix='dashboard-bench-')
+        database_url = f"sqlite:///{os.path.join(scratch_dir, 'bench.db')}"
+
+    engine = create_engine(database_url)
+    db.metadata.create_all(engine, tables=DASHBOARD_TABLES)
+
+    now = datetime.now(timezone.utc)
+    params = {
+        'since': now - timedelta(hours=24),
+        'server_ip': 'mc0.example.net',
+        'server_port': 25565,
+        'guild_id': '42'
+    }
+
+    print(f"Database: {engine.dialect.name}")
+    print(f"{'rows':>10}  {'query':<22} {'no index (ms)':>14} {'indexed (ms)':>13} {'speedup':>8}")
+    for size in args.sizes:
+        set_indexes(engine, False)
+        populate(engine, size, now)
+
+        set_indexes(engine, False)
+        baseline = {name: time_query(engine, sql, params, args.repeat) for name, sql in QUERIES.items()}
+        baseline_plans = {name: query_plan(engine, sql, params) for name, sql in QUERIES.items()} if args.plans else {}
+
+        set_indexes(engine, True)
+        indexed = {name: time_query(engine, sql, params, args.repeat) for name, sql in QUERIES.items()}
+
+        for name, sql in QUERIES.items():
+            speedup = baseline[name] / indexed[name] if indexed[name] else float('inf')
+            print(f"{size:>10}  {name:<22} {baseline[name]:>14.2f} {indexed[name]:>13.2f} {speedup:>7.1f}x")
+            if args.plans:
+                print(f"{'':>12}before: {baseline_plans[name]}")
+                print(f"{'':>12}after:  {query_plan(engine, sql, params)}")
+
+    engine.dispose()
+    if scratch_dir:
+        import shutil
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,6 @@ from .client import DiscordBot
 from .commands import setup_commands
 from .events import setup_events
 from .utils import MessageUtils
-from .minecraft_utils import check_minecraft_server, update_minecraft_counter_channel
+from .minecraft_utils import check_minecraft_server, update_minecraft_counter_channel, update_all_minecraft_counters
 
-__all__ = ['DiscordBot', 'setup_commands', 'setup_events', 'MessageUtils', 'check_minecraft_server', 'update_minecraft_counter_channel']
+__all__ = ['DiscordBot', 'setup_commands', 'setup_events', 'MessageUtils', 'check_minecraft_server', 'update_minecraft_counter_channel', 'update_all_minecraft_counters']
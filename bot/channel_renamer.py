@@ -0,0 +1,118 @@
+"""
+Rate-limit aware rename queue for counter channels
+"""
+import logging
+import time
+from collections import deque
+from typing import Dict
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+class ChannelRenameQueue:
+    """
+    Track each channel's rename budget and only send renames Discord will accept
+
+    Discord allows roughly 2 channel renames per channel every 10 minutes. Renames
+    requested while a channel is out of budget are coalesced so that only the latest
+    name is sent once the budget frees up.
+    """
+
+    def __init__(self, max_renames: int = 2, window_seconds: int = 600):
+        self.max_renames = max_renames
+        self.window_seconds = window_seconds
+
+        self._history: Dict[int, deque] = {}  # channel_id -> timestamps of recent renames
+        self._pending: Dict[int, str] = {}  # channel_id -> latest name waiting for budget
+
+    def _prune(self, channel_id: int, now: float) -> deque:
+        """Drop renames that have left the rate-limit window"""
+        history = self._history.setdefault(channel_id, deque())
+        while history and now - history[0] >= self.window_seconds:
+            history.popleft()
+        return history
+
+    def has_budget(self, channel_id: int, now: float = None) -> bool:
+        """Whether a rename of this channel would currently be accepted"""
+        now = time.time() if now is None else now
+        return len(self._prune(channel_id, now)) < self.max_renames
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    async def request(self, channel, name: str, reason: str = None) -> bool:
+        """
+        Ask for a channel to be renamed
+
+        Args:
+            channel: Discord channel to rename
+            name: Desired channel name
+            reason: Audit log reason
+
+        Returns:
+            bool: True if a rename was sent to Discord
+        """
+        if channel.name == name:
+            # Already showing the latest state, nothing left to send
+            self._pending.pop(channel.id, None)
+            return False
+
+        if not self.has_budget(channel.id):
+            if self._pending.get(channel.id) != name:
+                logger.debug(f"Rename budget exhausted for channel {channel.id}, deferring '{name}'")
+            self._pending[channel.id] = name
+            return False
+
+        return await self._rename(channel, name, reason)
+
+    async def flush(self, bot, reason: str = None) -> int:
+        """
+        Send the latest pending name of every channel whose budget has freed up
+
+        Returns:
+            int: Number of renames sent
+        """
+        sent = 0
+        now = time.time()
+        for channel_id, name in list(self._pending.items()):
+            if not self.has_budget(channel_id, now):
+                continue
+
+            channel = bot.get_channel(channel_id)
+            if not channel:
+                self.forget(channel_id)
+                continue
+
+            if await self.request(channel, name, reason):
+                sent += 1
+        return sent
+
+    def forget(self, channel_id: int):
+        """Stop tracking a channel"""
+        self._history.pop(channel_id, None)
+        self._pending.pop(channel_id, None)
+
+    async def _rename(self, channel, name: str, reason: str = None) -> bool:
+        """Send a rename and record it against the channel's budget"""
+        self._pending.pop(channel.id, None)
+        # Claim the budget before awaiting, so a flush and a probe cycle running at the
+        # same time can't both spend the channel's last rename
+        history = self._history.setdefault(channel.id, deque())
+        sent_at = time.time()
+        history.append(sent_at)
+        try:
+            await channel.edit(name=name, reason=reason)
+            logger.info(f"Updated Minecraft counter channel: {name}")
+            return True
+        except discord.HTTPException as e:
+            logger.error(f"HTTP error updating channel {channel.id}: {e}")
+        except Exception as e:
+            logger.error(f"Error updating channel {channel.id}: {e}")
+        try:
+            history.remove(sent_at)
+        except ValueError:
+            pass  # Already pruned, or the channel was forgotten meanwhile
+        return False
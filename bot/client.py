@@ -1,14 +1,17 @@
 """
 Discord Bot Client
 """
+import asyncio
 import logging
 import os
-import time
 import discord
 from discord.ext import commands, tasks
 from .commands import setup_commands
 from .events import setup_events
-from .minecraft_utils import update_minecraft_counter_channel
+from .channel_renamer import ChannelRenameQueue
+from .counter_scheduler import CounterScheduler
+from .counter_registry import MinecraftCounterRegistry
+from .minecraft_utils import update_all_minecraft_counters
 from datetime import datetime, timezone
 
 logger = logging.getLogger(__name__)
@@ -34,12 +37,6 @@ class DiscordBot(commands.Bot):
         self.initial_extensions = []
         self.guild_id = os.getenv('GUILD_ID')
         
-        # Minecraft counter storage
-        self.minecraft_counters = {}
-        self.has_active_players = False
-        self.last_empty_time = None  # Track when server became empty
-        self.cooldown_seconds = 120  # 2-minute cooldown before switching back to 30s
-        
         # Initialize statistics tracker
         try:
             from .stats_tracker import stats_tracker
@@ -47,6 +44,23 @@ class DiscordBot(commands.Bot):
         except ImportError:
             logger.warning("Stats tracker not available")
             self.stats_tracker = None
+        
+        # Minecraft counter storage (persisted through the stats tracker's database)
+        self.minecraft_counters = MinecraftCounterRegistry(store=self.stats_tracker)
+        self.counter_scheduler = CounterScheduler(
+            active_interval=15,  # Players online
+            idle_interval=30,  # Server empty after the grace period
+            cooldown_seconds=120,  # 2-minute cooldown before switching back to 30s
+            max_offline_interval=300  # Offline servers back off up to 5 minutes
+        )
+        self.channel_renamer = ChannelRenameQueue(max_renames=2, window_seconds=600)
+        self.counter_concurrency = int(os.getenv('MINECRAFT_COUNTER_CONCURRENCY', 50))
+        # Shared by every probe cycle, so overlapping cycles stay within the limit together
+        self.counter_semaphore = asyncio.Semaphore(max(1, self.counter_concurrency))
+        self.counter_cycle_deadline = float(os.getenv('MINECRAFT_COUNTER_DEADLINE', 12))
+        self._counter_cycles = set()  # In-flight probe cycles, kept referenced until they finish
+        self._rename_flush = None  # In-flight flush of deferred renames
+
     async def setup_hook(self):
         """Called when the bot is starting up"""
         logger.info("Setting up bot...")
@@ -85,6 +99,10 @@ class DiscordBot(commands.Bot):
         except Exception as e:
             logger.error(f"Failed to sync commands: {e}")
         
+        # Restore Minecraft counter registrations saved before the last restart
+        self.minecraft_counters.load()
+        self.counter_scheduler.sync(self.minecraft_counters.group_by_server().keys())
+        
         # Start Minecraft counter update task
         if not self.update_minecraft_counters.is_running():
             self.update_minecraft_counters.start()
@@ -101,64 +119,97 @@ class DiscordBot(commands.Bot):
         )
         await self.change_presence(activity=activity)
     
-    @tasks.loop(seconds=30)
+    @tasks.loop(seconds=1)
     async def update_minecraft_counters(self):
-        """Update all Minecraft counter channels with dynamic intervals"""
+        """Probe the Minecraft servers whose per-server polling interval has elapsed"""
         if not self.minecraft_counters:
             return
         
-        logger.info(f"Updating {len(self.minecraft_counters)} Minecraft counter channels")
-        
-        # Track if any server has active players
-        any_players_online = False
-        
-        # Update each counter channel
-        for channel_id, server_info in list(self.minecraft_counters.items()):
-            try:
-                success, has_players, _ = await update_minecraft_counter_channel(self, channel_id, server_info)
-                if success and has_players:
-                    any_players_online = True
-                elif not success:
-                    # Channel might have been deleted, remove from tracking
-                    channel = self.get_channel(channel_id)
-                    if not channel:
-                        logger.info(f"Removing deleted Minecraft counter channel {channel_id}")
-                        del self.minecraft_counters[channel_id]
-            except Exception as e:
-                logger.error(f"Error updating Minecraft counter {channel_id}: {e}")
-        
-        # Adjust update interval based on player activity with cooldown system
-        current_time = time.time()
-        
-        if any_players_online:
-            # Players are online - use fast updates and reset grace period
-            if not self.has_active_players:
-                self.has_active_players = True
-                logger.info("Players detected online - switching to 15-second updates")
-                self.update_minecraft_counters.change_interval(seconds=15)
-            elif self.last_empty_time:
-                # Player rejoined during grace period - cancel grace period
-                logger.info("Player rejoined during grace period - cancelling grace period")
-                self.last_empty_time = None
-        else:
-            # No players online
-            if self.has_active_players and not self.last_empty_time:
-                # Just became empty - start 120s grace period with fast updates
-                self.last_empty_time = current_time
-                logger.info(f"Server became empty - maintaining 15-second updates for {self.cooldown_seconds}s grace period")
-            elif self.last_empty_time and (current_time - self.last_empty_time) >= self.cooldown_seconds:
-                # Grace period completed and still empty - switch to slow updates
-                self.has_active_players = False
-                self.last_empty_time = None
-                logger.info("Grace period completed with no rejoins - switching to 30-second updates")
-                self.update_minecraft_counters.change_interval(seconds=30)
-            elif self.last_empty_time:
-                # Still in grace period - keep fast updates
-                remaining = int(self.cooldown_seconds - (current_time - self.last_empty_time))
-                if remaining % 45 == 0 and remaining > 0:  # Log every 45 seconds during grace period
-                    logger.info(f"Grace period active - {remaining}s remaining at 15-second updates")
+        # Send renames that were deferred until their channel's rate-limit window reopened. Renames can
+        # sleep through Discord rate limits, so they run in the background rather than holding up the tick
+        if self.channel_renamer.pending_count and (self._rename_flush is None or self._rename_flush.done()):
+            self._rename_flush = asyncio.create_task(self._flush_renames())
+        
+        self.counter_scheduler.sync(self.minecraft_counters.group_by_server().keys())
+        due = self.counter_scheduler.pop_due()
+        if not due:
+            return
+        
+        logger.info(f"Updating {len(due)} of {len(self.counter_scheduler)} monitored Minecraft servers")
+        # Run the cycle on its own so a slow server doesn't hold up servers that fall due meanwhile;
+        # popped servers aren't due again until their cycle reschedules them
+        cycle = asyncio.create_task(self._run_counter_cycle(due))
+        self._counter_cycles.add(cycle)
+        cycle.add_done_callback(self._counter_cycles.discard)
     
-
+    async def _flush_renames(self):
+        """Send deferred counter renames, logging instead of losing a failure in the background task"""
+        try:
+            await self.channel_renamer.flush(self, reason="Minecraft player count update")
+        except Exception as e:
+            logger.error(f"Flushing deferred counter renames failed: {e}", exc_info=True)
+    
+    async def _run_counter_cycle(self, server_keys):
+        """Probe some servers; if the cycle fails, reschedule them as offline so they aren't dropped"""
+        try:
+            await self.refresh_minecraft_counters(server_keys)
+        except Exception as e:
+            logger.error(f"Minecraft counter update failed: {e}", exc_info=True)
+            for server_key in server_keys:
+                self.counter_scheduler.reschedule(server_key, False, False)
+    
+    async def refresh_minecraft_counters(self, server_keys=None):
+        """
+        Update counter channels and reschedule their servers from the probe results
+        
+        Args:
+            server_keys: Optional iterable of (server_ip, server_port) to update (default: all servers)
+            
+        Returns:
+            Dict[int, Tuple[bool, bool, List[str]]]: channel_id -> (success, has_players, players_list)
+        """
+        servers = self.minecraft_counters.group_by_server()
+        self.counter_scheduler.sync(servers.keys())
+        if server_keys is None:
+            server_keys = list(servers)
+        
+        counters = {
+            channel_id: server_info
+            for server_key in server_keys
+            for channel_id, server_info in servers.get(server_key, [])
+        }
+        server_statuses = {}
+        missed_deadline = set()
+        results = await update_all_minecraft_counters(
+            self,
+            counters,
+            deadline=self.counter_cycle_deadline,
+            server_statuses=server_statuses,
+            semaphore=self.counter_semaphore,
+            missed_deadline=missed_deadline
+        )
+        
+        stale_channels = []
+        for channel_id, (success, _, _) in results.items():
+            if not success:
+                # Channel might have been deleted, remove from tracking
+                channel = self.get_channel(channel_id)
+                if not channel and channel_id in self.minecraft_counters:
+                    logger.info(f"Removing deleted Minecraft counter channel {channel_id}")
+                    stale_channels.append(channel_id)
+                    self.channel_renamer.forget(channel_id)
+        self.minecraft_counters.remove_many(stale_channels)
+        
+        # Each server picks its own next interval. Servers cut off at the deadline may never have been
+        # probed, so they keep their previous interval instead of backing off as if offline
+        for server_key in server_keys:
+            if server_key in missed_deadline and server_key not in server_statuses:
+                self.counter_scheduler.postpone(server_key)
+                continue
+            player_count, _, is_online, _ = server_statuses.get(server_key, (0, 0, False, []))
+            self.counter_scheduler.reschedule(server_key, is_online, is_online and player_count > 0)
+        
+        return results
     
     @update_minecraft_counters.before_loop
     async def before_update_minecraft_counters(self):
@@ -279,7 +279,7 @@ async def setup_commands(bot):
             )
             embed.add_field(
                 name="🔄 Smart Updates",
-                value="• **Players online**: 15-second intervals\n• **Server empty**: Maintains 15-second intervals for 2 minutes\n• **After grace period**: Switches to 30-second intervals",
+                value="• **Players online**: 15-second intervals\n• **Server empty**: Maintains 15-second intervals for 2 minutes\n• **After grace period**: Switches to 30-second intervals\n• **Server offline**: Backs off up to 5-minute intervals\n• Each server is scheduled independently",
                 inline=False
             )
             embed.add_field(
@@ -431,30 +431,19 @@ async def setup_commands(bot):
                 await interaction.followup.send("❌ No counter channels are currently active.", ephemeral=True)
                 return
             
-            # Import the update function
-            from .minecraft_utils import update_minecraft_counter_channel
-            
-            # Reset bot's player tracking state to force fresh server checks
-            bot.has_active_players = False
-            bot.last_empty_time = None
+            # Reset every server's player tracking state to force fresh server checks
+            bot.counter_scheduler.reset()
             
             # Update all counters to get fresh data and fix any broken channels
             fixed_count = 0
             broken_channels = []
             
-            for channel_id, server_info in list(bot.minecraft_counters.items()):
-                try:
-                    success, _, _ = await update_minecraft_counter_channel(bot, channel_id, server_info)
-                    if success:
-                        fixed_count += 1
-                    else:
-                        # Channel might be deleted, remove from tracking
-                        channel = bot.get_channel(channel_id)
-                        if not channel:
-                            broken_channels.append(channel_id)
-                            del bot.minecraft_counters[channel_id]
-                except Exception as e:
-                    logger.error(f"Error resetting counter {channel_id}: {e}")
+            results = await bot.refresh_minecraft_counters()
+            for channel_id, (success, _, _) in results.items():
+                if success:
+                    fixed_count += 1
+                elif channel_id not in bot.minecraft_counters:
+                    # Deleted channel was removed from tracking
                     broken_channels.append(channel_id)
             
             embed = MessageUtils.create_success_embed(
@@ -501,35 +490,27 @@ async def setup_commands(bot):
                 await interaction.followup.send("❌ No counter channels are currently active.", ephemeral=True)
                 return
             
-            # Import the update function  
-            from .minecraft_utils import update_minecraft_counter_channel
-            
             # Force an update on all counters and clean up broken ones
             updated_count = 0
             broken_channels = []
             server_statuses = {}
             
-            for channel_id, server_info in list(bot.minecraft_counters.items()):
-                try:
-                    success, has_players, current_players = await update_minecraft_counter_channel(bot, channel_id, server_info)
-                    if success:
-                        updated_count += 1
-                        server_key = f"{server_info['server_ip']}:{server_info['server_port']}"
-                        if server_key not in server_statuses:
-                            server_statuses[server_key] = {
-                                'online': True,
-                                'players': current_players,
-                                'channels': []
-                            }
-                        server_statuses[server_key]['channels'].append(server_info['channel_type'])
-                    else:
-                        # Check if channel exists
-                        channel = bot.get_channel(channel_id)
-                        if not channel:
-                            broken_channels.append(channel_id)
-                            del bot.minecraft_counters[channel_id]
-                except Exception as e:
-                    logger.error(f"Error force updating counter {channel_id}: {e}")
+            counters = dict(bot.minecraft_counters)
+            results = await bot.refresh_minecraft_counters()
+            for channel_id, (success, has_players, current_players) in results.items():
+                server_info = counters[channel_id]
+                if success:
+                    updated_count += 1
+                    server_key = f"{server_info['server_ip']}:{server_info['server_port']}"
+                    if server_key not in server_statuses:
+                        server_statuses[server_key] = {
+                            'online': True,
+                            'players': current_players,
+                            'channels': []
+                        }
+                    server_statuses[server_key]['channels'].append(server_info['channel_type'])
+                elif channel_id not in bot.minecraft_counters:
+                    # Deleted channel was removed from tracking
                     broken_channels.append(channel_id)
             
             embed = MessageUtils.create_success_embed(
@@ -0,0 +1,109 @@
+"""
+Persistent, indexed registry of Minecraft counter channels
+"""
+import logging
+from collections.abc import MutableMapping
+from typing import Dict, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class MinecraftCounterRegistry(MutableMapping):
+    """
+    Mapping of channel ID to counter server info, backed by the database
+
+    Behaves like the plain dict `bot.minecraft_counters` used to be, but keeps
+    indexes by guild and by server address and writes every change through to
+    the `minecraft_counters` table so registrations survive restarts.
+    """
+
+    def __init__(self, store=None):
+        self.store = store  # Object providing load/save/delete_minecraft_counter(s), e.g. StatsTracker
+        self._counters: Dict[int, dict] = {}
+        self._by_guild: Dict[int, Set[int]] = {}
+        self._by_server: Dict[Tuple[str, int], Set[int]] = {}
+
+    def load(self) -> int:
+        """Replace the in-memory registry with every counter stored in the database"""
+        self._counters.clear()
+        self._by_guild.clear()
+        self._by_server.clear()
+
+        if self.store is None:
+            return 0
+
+        for channel_id, server_info in self.store.load_minecraft_counters().items():
+            self._index(channel_id, server_info)
+
+        logger.info(f"Loaded {len(self._counters)} Minecraft counter channels from the database")
+        return len(self._counters)
+
+    def __getitem__(self, channel_id: int) -> dict:
+        return self._counters[channel_id]
+
+    def __setitem__(self, channel_id: int, server_info: dict):
+        if channel_id in self._counters:
+            self._unindex(channel_id)
+        self._index(channel_id, server_info)
+        if self.store is not None:
+            self.store.save_minecraft_counter(channel_id, server_info)
+
+    def __delitem__(self, channel_id: int):
+        self._unindex(channel_id)
+        if self.store is not None:
+            self.store.delete_minecraft_counters([channel_id])
+
+    def __iter__(self):
+        return iter(self._counters)
+
+    def __len__(self):
+        return len(self._counters)
+
+    def channels_for_guild(self, guild_id: int) -> List[int]:
+        """Counter channel IDs registered in a guild"""
+        return list(self._by_guild.get(guild_id, ()))
+
+    def channels_for_server(self, server_ip: str, server_port: int) -> List[int]:
+        """Counter channel IDs watching a server address"""
+        return list(self._by_server.get((server_ip, server_port), ()))
+
+    def group_by_server(self) -> Dict[Tuple[str, int], List[Tuple[int, dict]]]:
+        """(server_ip, server_port) -> [(channel_id, server_info)] straight from the server index"""
+        return {
+            server_key: [(channel_id, self._counters[channel_id]) for channel_id in channel_ids]
+            for server_key, channel_ids in self._by_server.items()
+        }
+
+    def remove_many(self, channel_ids) -> int:
+        """Remove several counters with a single database write"""
+        removed = [channel_id for channel_id in channel_ids if channel_id in self._counters]
+        for channel_id in removed:
+            self._unindex(channel_id)
+        if removed and self.store is not None:
+            self.store.delete_minecraft_counters(removed)
+        return len(removed)
+
+    def remove_guild(self, guild_id: int) -> int:
+        """Remove every counter registered in a guild"""
+        return self.remove_many(self.channels_for_guild(guild_id))
+
+    def _index(self, channel_id: int, server_info: dict):
+        self._counters[channel_id] = server_info
+        self._by_guild.setdefault(server_info.get('guild_id'), set()).add(channel_id)
+        self._by_server.setdefault((server_info['server_ip'], server_info['server_port']), set()).add(channel_id)
+
+    def _unindex(self, channel_id: int):
+        server_info = self._counters.pop(channel_id)
+
+        guild_channels = self._by_guild.get(server_info.get('guild_id'))
+        if guild_channels is not None:
+            guild_channels.discard(channel_id)
+            if not guild_channels:
+                del self._by_guild[server_info.get('guild_id')]
+
+        server_key = (server_info['server_ip'], server_info['server_port'])
+        server_channels = self._by_server.get(server_key)
+        if server_channels is not None:
+            server_channels.discard(channel_id)
+            if not server_channels:
+                del self._by_server[server_key]
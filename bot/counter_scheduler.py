@@ -0,0 +1,164 @@
+"""
+Per-server polling scheduler for Minecraft counter channels
+"""
+import heapq
+import logging
+import time
+from typing import Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+ServerKey = Tuple[str, int]
+
+
+class ServerPollState:
+    """Polling state for a single monitored Minecraft server"""
+
+    def __init__(self, next_due: float):
+        self.next_due = next_due
+        self.interval = None
+        self.has_active_players = False
+        self.last_empty_time = None  # Track when server became empty
+        self.failures = 0  # Consecutive offline probes
+
+
+class CounterScheduler:
+    """
+    Schedule Minecraft server probes by next-due time
+
+    Every server keeps its own interval: fast while players are online, fast for a
+    grace period after the server empties, slow once it stays empty, and an
+    exponential backoff while it is offline.
+    """
+
+    def __init__(self, active_interval: int = 15, idle_interval: int = 30,
+                 cooldown_seconds: int = 120, max_offline_interval: int = 300):
+        self.active_interval = active_interval
+        self.idle_interval = idle_interval
+        self.cooldown_seconds = cooldown_seconds  # Grace period before switching back to the idle interval
+        self.max_offline_interval = max_offline_interval
+
+        self.servers: Dict[ServerKey, ServerPollState] = {}
+        self._heap: List[Tuple[float, ServerKey]] = []
+
+    def __len__(self):
+        return len(self.servers)
+
+    def sync(self, server_keys: Iterable[ServerKey], now: float = None):
+        """Start tracking new servers (due immediately) and forget removed ones"""
+        now = time.time() if now is None else now
+        server_keys = set(server_keys)
+
+        for server_key in list(self.servers):
+            if server_key not in server_keys:
+                del self.servers[server_key]
+
+        for server_key in server_keys:
+            if server_key not in self.servers:
+                self.servers[server_key] = ServerPollState(now)
+                heapq.heappush(self._heap, (now, server_key))
+
+    def pop_due(self, now: float = None) -> List[ServerKey]:
+        """Return every server whose next probe is due"""
+        now = time.time() if now is None else now
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            next_due, server_key = heapq.heappop(self._heap)
+            state = self.servers.get(server_key)
+            # Skip entries for removed servers and superseded schedule entries
+            if state is None or state.next_due != next_due:
+                continue
+            due.append(server_key)
+        return due
+
+    def reschedule(self, server_key: ServerKey, is_online: bool, has_players: bool, now: float = None) -> int:
+        """
+        Record a probe result and schedule the server's next probe
+
+        Args:
+            server_key: (server_ip, server_port)
+            is_online: Whether the server answered the probe
+            has_players: Whether any players were online
+            now: Current time (default: time.time())
+
+        Returns:
+            int: Seconds until the next probe of this server
+        """
+        now = time.time() if now is None else now
+        state = self.servers.get(server_key)
+        if state is None:
+            return 0
+
+        address = f"{server_key[0]}:{server_key[1]}"
+
+        if not is_online:
+            # Offline - back off exponentially up to the cap
+            state.failures += 1
+            state.has_active_players = False
+            state.last_empty_time = None
+            interval = min(self.idle_interval * (2 ** (state.failures - 1)), self.max_offline_interval)
+            if state.failures == 1:
+                logger.info(f"{address} is offline - backing off to {interval}-second updates")
+        elif has_players:
+            # Players are online - use fast updates and reset grace period
+            state.failures = 0
+            if not state.has_active_players:
+                state.has_active_players = True
+                logger.info(f"Players detected on {address} - switching to {self.active_interval}-second updates")
+            elif state.last_empty_time:
+                # Player rejoined during grace period - cancel grace period
+                logger.info(f"Player rejoined {address} during grace period - cancelling grace period")
+                state.last_empty_time = None
+            interval = self.active_interval
+        else:
+            # No players online
+            state.failures = 0
+            if state.has_active_players and not state.last_empty_time:
+                # Just became empty - start grace period with fast updates
+                state.last_empty_time = now
+                logger.info(f"{address} became empty - maintaining {self.active_interval}-second updates for {self.cooldown_seconds}s grace period")
+                interval = self.active_interval
+            elif state.last_empty_time and (now - state.last_empty_time) >= self.cooldown_seconds:
+                # Grace period completed and still empty - switch to slow updates
+                state.has_active_players = False
+                state.last_empty_time = None
+                logger.info(f"Grace period completed for {address} with no rejoins - switching to {self.idle_interval}-second updates")
+                interval = self.idle_interval
+            elif state.last_empty_time:
+                # Still in grace period - keep fast updates
+                interval = self.active_interval
+            else:
+                interval = self.idle_interval
+
+        state.interval = interval
+        state.next_due = now + interval
+        heapq.heappush(self._heap, (state.next_due, server_key))
+        return interval
+
+    def postpone(self, server_key: ServerKey, now: float = None) -> int:
+        """
+        Schedule a server that could not be probed this cycle at its previous interval
+
+        Unlike an offline result this does not count as a failure, so a slow cycle
+        doesn't push healthy servers into the offline backoff.
+
+        Returns:
+            int: Seconds until the next probe of this server
+        """
+        now = time.time() if now is None else now
+        state = self.servers.get(server_key)
+        if state is None:
+            return 0
+
+        interval = state.interval or self.idle_interval
+        state.next_due = now + interval
+        heapq.heappush(self._heap, (state.next_due, server_key))
+        return interval
+
+    def reset(self, now: float = None):
+        """Forget all activity state and make every server due immediately"""
+        now = time.time() if now is None else now
+        server_keys = list(self.servers)
+        self.servers.clear()
+        self._heap.clear()
+        self.sync(server_keys, now)
@@ -61,6 +61,11 @@ def setup_events(bot):
     async def on_guild_remove(guild):
         """Called when the bot is removed from a guild"""
         logger.info(f"Removed from guild: {guild.name} (ID: {guild.id})")
+        
+        # Stop monitoring counters whose channels went with the guild
+        removed = bot.minecraft_counters.remove_guild(guild.id)
+        if removed:
+            logger.info(f"Removed {removed} Minecraft counter channels for guild {guild.id}")
     
     @bot.event
     async def on_command_error(ctx, error):
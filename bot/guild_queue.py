@@ -0,0 +1,133 @@
+"""
+Per-guild music queue backed by a deque
+"""
+import itertools
+import random
+from collections import deque
+from typing import Iterable, Iterator, List, Optional
+
+
+class QueuedTrack:
+    """A queue entry; resolved metadata and stream URLs live in the track cache, not here"""
+
+    __slots__ = ('id', 'url', 'title', 'duration', 'requester_id')
+
+    def __init__(self, id: int, url: str, title: str = 'Unknown Track', duration: int = 0,
+                 requester_id: Optional[int] = None):
+        self.id = id  # Stable within the queue, unlike a position
+        self.url = url
+        self.title = title
+        self.duration = duration
+        self.requester_id = requester_id
+
+    def __repr__(self):
+        return f"QueuedTrack(id={self.id}, title={self.title!r})"
+
+
+class GuildQueue:
+    """
+    Upcoming tracks for one guild
+
+    Enqueueing and dequeueing are O(1). Tracks are removed by their `id`
+    rather than by position, so a removal still hits the intended track after
+    a shuffle or after the head has been played.
+    """
+
+    def __init__(self):
+        self._tracks = deque()
+        self._ids = itertools.count(1)
+
+    def __len__(self) -> int:
+        return len(self._tracks)
+
+    def __iter__(self) -> Iterator[QueuedTrack]:
+        return iter(self._tracks)
+
+    def _make(self, entry: dict) -> QueuedTrack:
+        return QueuedTrack(
+            next(self._ids),
+            entry['url'],
+            title=entry.get('title') or 'Unknown Track',
+            duration=entry.get('duration') or 0,
+            requester_id=entry.get('requester_id')
+        )
+
+    def append(self, entry: dict) -> QueuedTrack:
+        """
+        Add a track to the end of the queue
+
+        Args:
+            entry: Dict with 'url' and optionally 'title', 'duration' and 'requester_id'
+
+        Returns:
+            QueuedTrack: The new entry
+        """
+        track = self._make(entry)
+        self._tracks.append(track)
+        return track
+
+    def extend(self, entries: Iterable[dict]) -> List[QueuedTrack]:
+        """Add many tracks at once (e.g. a playlist), returning the new entries"""
+        tracks = [self._make(entry) for entry in entries]
+        self._tracks.extend(tracks)
+        return tracks
+
+    def popleft(self) -> Optional[QueuedTrack]:
+        """Take the next track, or None if the queue is empty"""
+        return self._tracks.popleft() if self._tracks else None
+
+    def peek(self, count: int = 1) -> List[QueuedTrack]:
+        """The next `count` tracks, without removing them"""
+        return list(itertools.islice(self._tracks, count))
+
+    def _index(self, track_id: int) -> Optional[int]:
+        for index, track in enumerate(self._tracks):
+            if track.id == track_id:
+                return index
+        return None
+
+    def remove(self, track_id: int) -> Optional[QueuedTrack]:
+        """Remove a track by ID, returning it (or None if it is not queued)"""
+        index = self._index(track_id)
+        if index is None:
+            return None
+        track = self._tracks[index]
+        del self._tracks[index]
+        return track
+
+    def move(self, track_id: int, position: int) -> bool:
+        """
+        Move a track to a new 0-based position
+
+        Args:
+            track_id: Track to move
+            position: Target position, clamped to the queue
+
+        Returns:
+            bool: False if the track is not queued
+        """
+        track = self.remove(track_id)
+        if track is None:
+            return False
+        self._tracks.insert(max(0, min(position, len(self._tracks))), track)
+        return True
+
+    def shuffle(self):
+        tracks = list(self._tracks)
+        random.shuffle(tracks)
+        self._tracks = deque(tracks)
+
+    def clear(self):
+        self._tracks.clear()
+
+    def serialize(self) -> List[list]:
+        """Compact form for persisting: one [url, title, duration, requester_id] row per track"""
+        return [[track.url, track.title, track.duration, track.requester_id] for track in self._tracks]
+
+    @classmethod
+    def deserialize(cls, rows: Iterable[list]) -> 'GuildQueue':
+        """Rebuild a queue from `serialize()` output; track IDs are reassigned"""
+        queue = cls()
+        queue.extend({'url': url, 'title': title, 'duration': duration, 'requester_id': requester_id}
+                     for url, title, duration, requester_id in rows)
+        return queue
@@ -3,96 +3,87 @@ Minecraft Server Utilities
 """
 import asyncio
 import discord
+import json
 import logging
 import socket
 import struct
-from typing import Tuple
+import time
+from typing import Dict, List, Tuple
 
 logger = logging.getLogger(__name__)
 
-async def check_minecraft_server(server_ip: str, server_port: int = 25565):
+async def check_minecraft_server(server_ip: str, server_port: int = 25565, timeout: float = 5.0):
     """
     Check Minecraft server status and get player count
     
     Args:
         server_ip (str): Server IP address
         server_port (int): Server port (default: 25565)
+        timeout (float): Deadline in seconds for the whole probe (default: 5)
         
     Returns:
         Tuple[int, int, bool, List[str]]: (current_players, max_players, is_online, players_list)
     """
     try:
-        # Use asyncio to run the synchronous socket operation
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(None, _sync_check_minecraft_server, server_ip, server_port)
-        return result
+        # Run the whole Server List Ping exchange under a single deadline
+        return await asyncio.wait_for(_async_check_minecraft_server(server_ip, server_port), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"Timeout connecting to Minecraft server {server_ip}:{server_port}")
+        return 0, 0, False, []
+    except socket.gaierror:
+        logger.warning(f"Could not resolve hostname {server_ip}")
+        return 0, 0, False, []
+    except ConnectionRefusedError:
+        logger.warning(f"Connection refused to {server_ip}:{server_port}")
+        return 0, 0, False, []
     except Exception as e:
         logger.error(f"Error checking Minecraft server {server_ip}:{server_port}: {e}")
         return 0, 0, False, []
 
-def _sync_check_minecraft_server(server_ip: str, server_port: int):
+async def _async_check_minecraft_server(server_ip: str, server_port: int):
     """
-    Synchronous Minecraft server status check using Server List Ping protocol
+    Asynchronous Minecraft server status check using Server List Ping protocol
     """
+    reader, writer = await asyncio.open_connection(server_ip, server_port)
+    
     try:
-        # Create socket connection
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(5)  # 5 second timeout
-        
-        # Connect to server
-        sock.connect((server_ip, server_port))
-        
-        # Send handshake packet (Protocol version 47, Server List Ping)
-        handshake_data = _create_handshake_packet(server_ip, server_port)
-        sock.send(handshake_data)
-        
-        # Send status request packet
-        status_request = _create_status_request_packet()
-        sock.send(status_request)
+        # Send handshake packet (Protocol version 47, Server List Ping) and status request
+        writer.write(_create_handshake_packet(server_ip, server_port) + _create_status_request_packet())
+        await writer.drain()
         
         # Read response
-        response = _read_varint(sock)  # Packet length
-        packet_id = _read_varint(sock)  # Packet ID (should be 0)
+        await _read_varint(reader)  # Packet length
+        packet_id = await _read_varint(reader)  # Packet ID (should be 0)
         
         if packet_id != 0:
             logger.warning(f"Unexpected packet ID: {packet_id}")
             return 0, 0, False, []
         
         # Read JSON response length and data
-        json_length = _read_varint(sock)
-        json_data = sock.recv(json_length).decode('utf-8')
-        
-        sock.close()
-        
-        # Parse JSON response
-        import json
-        server_info = json.loads(json_data)
-        
-        # Extract player information
-        players = server_info.get('players', {})
-        online = players.get('online', 0)
-        max_players = players.get('max', 0)
-        
-        # Extract player list if available (not all servers provide this)
-        players_list = []
-        if 'players' in server_info and 'sample' in server_info['players']:
-            players_list = [player['name'] for player in server_info['players']['sample']]
-        
-        logger.info(f"Minecraft server {server_ip}:{server_port} - {online}/{max_players} players")
-        return online, max_players, True, players_list
-        
-    except socket.timeout:
-        logger.warning(f"Timeout connecting to Minecraft server {server_ip}:{server_port}")
-        return 0, 0, False, []
-    except socket.gaierror:
-        logger.warning(f"Could not resolve hostname {server_ip}")
-        return 0, 0, False, []
-    except ConnectionRefusedError:
-        logger.warning(f"Connection refused to {server_ip}:{server_port}")
-        return 0, 0, False, []
-    except Exception as e:
-        logger.error(f"Error in sync Minecraft server check: {e}")
-        return 0, 0, False, []
+        json_length = await _read_varint(reader)
+        json_data = (await reader.readexactly(json_length)).decode('utf-8')
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except Exception:
+            pass
+    
+    # Parse JSON response
+    server_info = json.loads(json_data)
+    
+    # Extract player information
+    players = server_info.get('players', {})
+    online = players.get('online', 0)
+    max_players = players.get('max', 0)
+    
+    # Extract player list if available (not all servers provide this)
+    players_list = []
+    if 'sample' in players:
+        players_list = [player['name'] for player in players['sample']]
+    
+    logger.info(f"Minecraft server {server_ip}:{server_port} - {online}/{max_players} players")
+    return online, max_players, True, players_list
 
 def _create_handshake_packet(server_ip: str, server_port: int) -> bytes:
     """Create Minecraft handshake packet"""
@@ -137,16 +128,16 @@ def _pack_varint(value: int) -> bytes:
             break
     return data
 
-def _read_varint(sock) -> int:
-    """Read varint from socket"""
+async def _read_varint(reader: asyncio.StreamReader) -> int:
+    """Read varint from stream"""
     value = 0
     position = 0
     while True:
-        byte_data = sock.recv(1)
+        byte_data = await reader.read(1)
         if not byte_data:
-            raise ConnectionError("Socket closed while reading varint")
+            raise ConnectionError("Stream closed while reading varint")
         
-        byte = struct.unpack('B', byte_data)[0]
+        byte = byte_data[0]
         value |= (byte & 0x7F) << position
         
         if (byte & 0x80) == 0:
@@ -158,7 +149,181 @@ def _read_varint(sock) -> int:
     
     return value
 
-async def update_minecraft_counter_channel(bot, channel_id: int, server_info: dict):
+async def probe_minecraft_server(bot, server_ip: str, server_port: int):
+    """
+    Probe a Minecraft server once and record the result in the statistics tracker
+    
+    Args:
+        bot: Discord bot instance
+        server_ip: Server IP address
+        server_port: Server port
+        
+    Returns:
+        Tuple[int, int, bool, List[str]]: (current_players, max_players, is_online, players_list)
+    """
+    start_time = time.time()
+    status = await check_minecraft_server(server_ip, server_port)
+    
+    # Calculate response time
+    response_time_ms = int((time.time() - start_time) * 1000)
+    
+    # Track statistics if bot has stats tracker
+    if hasattr(bot, 'stats_tracker') and bot.stats_tracker:
+        player_count, max_players, is_online, players_list = status
+        bot.stats_tracker.track_minecraft_counter_update(
+            server_ip,
+            server_port,
+            player_count,
+            max_players,
+            is_online,
+            response_time_ms,
+            players_list
+        )
+    
+    return status
+
+def group_counters_by_server(minecraft_counters: dict) -> Dict[Tuple[str, int], List[Tuple[int, dict]]]:
+    """
+    Group counter channels by the server address they monitor
+    
+    Args:
+        minecraft_counters: Mapping of channel ID to server info
+        
+    Returns:
+        Dict[Tuple[str, int], List[Tuple[int, dict]]]: (server_ip, server_port) -> [(channel_id, server_info)]
+    """
+    servers = {}
+    for channel_id, server_info in minecraft_counters.items():
+        server_key = (server_info['server_ip'], server_info['server_port'])
+        servers.setdefault(server_key, []).append((channel_id, server_info))
+    return servers
+
+async def update_minecraft_server_channels(bot, server_ip: str, server_port: int, channels: List[Tuple[int, dict]],
+                                          server_statuses: dict = None):
+    """
+    Probe a server once and fan the result out to every counter channel watching it
+    
+    Args:
+        bot: Discord bot instance
+        server_ip: Server IP address
+        server_port: Server port
+        channels: List of (channel_id, server_info) pairs for this server
+        server_statuses: Optional dict the probe result is stored in, keyed by (server_ip, server_port)
+        
+    Returns:
+        Dict[int, Tuple[bool, bool, List[str]]]: channel_id -> (success, has_players, players_list)
+    """
+    results = {}
+    live_channels = []
+    for channel_id, server_info in channels:
+        if bot.get_channel(channel_id):
+            live_channels.append((channel_id, server_info))
+        else:
+            logger.warning(f"Could not find channel {channel_id} for Minecraft counter")
+            results[channel_id] = (False, False, [])
+    
+    # Don't ping servers nobody is watching any more
+    if not live_channels:
+        return results
+    
+    try:
+        status = await probe_minecraft_server(bot, server_ip, server_port)
+    except Exception as e:
+        logger.error(f"Error probing Minecraft server {server_ip}:{server_port}: {e}")
+        status = (0, 0, False, [])
+    
+    if server_statuses is not None:
+        server_statuses[(server_ip, server_port)] = status
+    
+    # Edit the dependent channels concurrently
+    updates = await asyncio.gather(*(
+        update_minecraft_counter_channel(bot, channel_id, server_info, status=status)
+        for channel_id, server_info in live_channels
+    ))
+    for (channel_id, _), result in zip(live_channels, updates):
+        results[channel_id] = result
+    
+    return results
+
+async def update_all_minecraft_counters(bot, minecraft_counters: dict, concurrency: int = 50, deadline: float = None,
+                                        server_statuses: dict = None, semaphore: asyncio.Semaphore = None,
+                                        missed_deadline: set = None):
+    """
+    Update every counter channel, pinging each distinct server address only once
+    
+    Servers are probed concurrently, at most `concurrency` at a time (or as many as
+    `semaphore` allows, when cycles that overlap share one limit). When `deadline`
+    is set, servers that have not finished within that many seconds are cancelled and
+    left out of the results so one slow server never holds up the rest of the cycle.
+    
+    Args:
+        bot: Discord bot instance
+        minecraft_counters: Mapping of channel ID to server info
+        concurrency: Maximum number of servers updated at the same time (default: 50)
+        deadline: Optional time budget in seconds for the whole cycle
+        server_statuses: Optional dict filled with (server_ip, server_port) -> probe result
+        semaphore: Optional semaphore shared with other cycles, used instead of `concurrency`
+        missed_deadline: Optional set filled with the (server_ip, server_port) cancelled at the deadline
+        
+    Returns:
+        Dict[int, Tuple[bool, bool, List[str]]]: channel_id -> (success, has_players, players_list)
+    """
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+    
+    async def update_server(server_ip: str, server_port: int, channels: List[Tuple[int, dict]]):
+        async with semaphore:
+            return await update_minecraft_server_channels(bot, server_ip, server_port, channels,
+                                                          server_statuses=server_statuses)
+    
+    tasks = {
+        asyncio.create_task(update_server(server_ip, server_port, channels)): (server_ip, server_port)
+        for (server_ip, server_port), channels in group_counters_by_server(minecraft_counters).items()
+    }
+    if not tasks:
+        return {}
+    
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    
+    for task in pending:
+        server_ip, server_port = tasks[task]
+        logger.warning(f"Minecraft server {server_ip}:{server_port} missed the update deadline, skipping this cycle")
+        task.cancel()
+        if missed_deadline is not None:
+            missed_deadline.add((server_ip, server_port))
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+    
+    results = {}
+    for task in done:
+        if task.exception():
+            server_ip, server_port = tasks[task]
+            logger.error(f"Error updating Minecraft server {server_ip}:{server_port}: {task.exception()}")
+            continue
+        results.update(task.result())
+    return results
+
+def format_counter_channel_name(server_info: dict, player_count: int, max_players: int, is_online: bool) -> str:
+    """Format a counter channel name from its template and the server status"""
+    channel_type = server_info.get('channel_type', 'combined')  # Default to old behavior for compatibility
+    
+    if channel_type == 'status':
+        # Status channel: show online/offline with emoji
+        status_indicator = "🟢" if is_online else "🔴"
+        status_text = "Online" if is_online else "Offline"
+        return server_info['channel_name_template'].format(status=f"{status_indicator} {status_text}")
+    elif channel_type == 'count':
+        # Count channel: show player count with person emoji
+        if is_online:
+            return server_info['channel_name_template'].format(count=f"{player_count}/{max_players}")
+        return server_info['channel_name_template'].format(count="0/0")
+    
+    # Legacy combined format (for backward compatibility)
+    if is_online:
+        return server_info['channel_name_template'].format(count=f"🟢 {player_count}/{max_players}")
+    return server_info['channel_name_template'].format(count="🔴 Offline")
+
+async def update_minecraft_counter_channel(bot, channel_id: int, server_info: dict, status: tuple = None):
     """
     Update a Minecraft counter channel with current player count
     
@@ -166,13 +331,12 @@ async def update_minecraft_counter_channel(bot, channel_id: int, server_info: di
         bot: Discord bot instance
         channel_id: ID of the channel to update
         server_info: Dictionary containing server connection info
+        status: Optional (current_players, max_players, is_online, players_list) result of a
+            probe already made this cycle; the server is pinged when omitted
         
     Returns:
         Tuple[bool, bool, List[str]]: (success, has_players, players_list)
     """
-    import time
-    start_time = time.time()
-    
     try:
         # Get channel
         channel = bot.get_channel(channel_id)
@@ -180,40 +344,20 @@ async def update_minecraft_counter_channel(bot, channel_id: int, server_info: di
             logger.warning(f"Could not find channel {channel_id} for Minecraft counter")
             return False, False, []
         
-        # Check server status
-        player_count, max_players, is_online, players_list = await check_minecraft_server(
-            server_info['server_ip'], 
-            server_info['server_port']
-        )
-        
-        # Calculate response time
-        response_time_ms = int((time.time() - start_time) * 1000)
+        # Check server status unless a shared probe result was supplied
+        if status is None:
+            status = await probe_minecraft_server(bot, server_info['server_ip'], server_info['server_port'])
+        player_count, max_players, is_online, players_list = status
         
         # Format channel name based on channel type
-        channel_type = server_info.get('channel_type', 'combined')  # Default to old behavior for compatibility
-        
-        if channel_type == 'status':
-            # Status channel: show online/offline with emoji
-            status_indicator = "🟢" if is_online else "🔴"
-            status_text = "Online" if is_online else "Offline"
-            formatted_name = server_info['channel_name_template'].format(status=f"{status_indicator} {status_text}")
-        elif channel_type == 'count':
-            # Count channel: show player count with person emoji
-            if is_online:
-                formatted_name = server_info['channel_name_template'].format(count=f"{player_count}/{max_players}")
-            else:
-                formatted_name = server_info['channel_name_template'].format(count="0/0")
-        else:
-            # Legacy combined format (for backward compatibility)
-            if is_online:
-                status_indicator = "🟢"
-                formatted_name = server_info['channel_name_template'].format(count=f"{status_indicator} {player_count}/{max_players}")
-            else:
-                status_indicator = "🔴"
-                formatted_name = server_info['channel_name_template'].format(count=f"{status_indicator} Offline")
+        formatted_name = format_counter_channel_name(server_info, player_count, max_players, is_online)
         
         # Update channel name if it's different
-        if channel.name != formatted_name:
+        renamer = getattr(bot, 'channel_renamer', None)
+        if renamer:
+            # Respect the per-channel rename budget; deferred names are coalesced
+            await renamer.request(channel, formatted_name, reason="Minecraft player count update")
+        elif channel.name != formatted_name:
             try:
                 await channel.edit(name=formatted_name, reason="Minecraft player count update")
                 logger.info(f"Updated Minecraft counter channel: {formatted_name}")
@@ -225,22 +369,10 @@ async def update_minecraft_counter_channel(bot, channel_id: int, server_info: di
             except Exception as e:
                 logger.error(f"Error updating channel {channel_id}: {e}")
         
-        # Track statistics if bot has stats tracker
-        if hasattr(bot, 'stats_tracker') and bot.stats_tracker:
-            bot.stats_tracker.track_minecraft_counter_update(
-                server_info['server_ip'],
-                server_info['server_port'],
-                player_count,
-                max_players,
-                is_online,
-                response_time_ms,
-                players_list
-            )
-        
         # Return success, whether there are active players, and the player list
         has_players = is_online and player_count > 0
         return True, has_players, players_list
         
     except Exception as e:
         logger.error(f"Error updating Minecraft counter channel {channel_id}: {e}")
-        return False, False, []
\ No newline at end of file
+        return False, False, []
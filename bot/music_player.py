@@ -2,16 +2,20 @@
 Music player module for Discord bot with YouTube support
 """
 import asyncio
+import os
 import discord
 from discord.ext import commands
-import yt_dlp
 import logging
 
+from .guild_queue import GuildQueue
+from .track_cache import TrackCache
+from .ytdl_pool import YTDLPool
+
 class MusicPlayer:
     def __init__(self, bot):
         self.bot = bot
         self.voice_clients = {}
-        self.queues = {}
+        self.queues = {}  # guild_id -> GuildQueue
         self.current_track = {}
         self.is_playing = {}
         
@@ -35,6 +39,36 @@ class MusicPlayer:
             'before_options': '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5',
             'options': '-vn'
         }
+        
+        # Playlist listing: titles and page URLs only, streams are resolved when a track comes up
+        self.ytdl_flat_options = {
+            **self.ytdl_options,
+            'noplaylist': False,
+            'extract_flat': 'in_playlist'
+        }
+        self.playlist_limit = int(os.getenv('MUSIC_PLAYLIST_LIMIT', 500))
+        self.playlist_generation = {}  # guild_id -> bumped by clear_queue to stop running ingestion
+        
+        # Warmed extractors on their own threads, shared by every lookup
+        self.ytdl_pool = YTDLPool(
+            {'default': self.ytdl_options, 'flat': self.ytdl_flat_options},
+            max_workers=int(os.getenv('YTDL_WORKERS', 4))
+        )
+        self.ytdl_pool.warm()
+        
+        # Resolved tracks, shared across guilds so repeat requests skip yt-dlp
+        self.track_cache = TrackCache(
+            query_ttl=float(os.getenv('TRACK_CACHE_QUERY_TTL', 21600)),
+            stream_ttl=float(os.getenv('TRACK_CACHE_STREAM_TTL', 1800)),
+            max_entries=int(os.getenv('TRACK_CACHE_SIZE', 2000))
+        )
+        self._resolving = {}  # Query -> in-flight extraction task
+        
+        # Lookahead: resolve the next few queued tracks while the current one plays
+        self.prefetch_depth = int(os.getenv('MUSIC_PREFETCH_DEPTH', 2))
+        self.prefetch_ffmpeg = os.getenv('MUSIC_PREFETCH_FFMPEG', 'false').lower() in ('1', 'true', 'yes')
+        self.prefetch_tasks = {}  # guild_id -> {url: task}
+        self.warm_sources = {}  # guild_id -> (url, audio source dict)
 
     async def join_voice_channel(self, channel):
         """Join a voice channel"""
@@ -51,64 +85,236 @@ class MusicPlayer:
         if guild_id in self.voice_clients:
             await self.voice_clients[guild_id].disconnect()
             del self.voice_clients[guild_id]
-            if guild_id in self.queues:
-                self.queues[guild_id].clear()
+            self.clear_queue(guild_id)
 
     def get_voice_client(self, guild_id):
         """Get voice client for guild"""
         return self.voice_clients.get(guild_id)
 
-    async def search_youtube(self, query):
-        """Search YouTube for a track"""
+    async def resolve_track(self, query):
+        """
+        Resolve a search string or URL to track metadata and a direct stream URL
+        
+        Served from the track cache when possible. Otherwise one extraction
+        fills both cache levels, and concurrent requests for the same query
+        share it.
+        
+        Args:
+            query: Search string or URL
+            
+        Returns:
+            dict: Track (id, title, duration, webpage_url, stream_url), or None
+        """
+        track = self.track_cache.lookup(query)
+        if track:
+            return track
+        
+        task = self._resolving.get(query)
+        if task is None:
+            task = asyncio.ensure_future(self._extract_track(query))
+            self._resolving[query] = task
+            task.add_done_callback(lambda _: self._resolving.pop(query, None))
+        return await asyncio.shield(task)
+
+    async def _extract_track(self, query):
+        # A known video whose stream URL expired is re-extracted directly rather than searched for again
+        video_id = self.track_cache.get_video_id(query)
+        known = self.track_cache.get_track(video_id, require_stream=False) if video_id else None
+        if known:
+            target = known['webpage_url']
+        elif query.startswith('http'):
+            target = query
+        else:
+            target = f"ytsearch:{query}"
+        
         try:
-            with yt_dlp.YoutubeDL(self.ytdl_options) as ytdl:
-                info = await asyncio.get_event_loop().run_in_executor(
-                    None, lambda: ytdl.extract_info(f"ytsearch:{query}", download=False)
-                )
-                
-                if 'entries' in info and len(info['entries']) > 0:
-                    return info['entries'][0]
-                return None
+            info = await self.ytdl_pool.extract_info(target)
         except Exception as e:
-            logging.error(f"Error searching YouTube: {e}")
+            logging.error(f"Error extracting {target}: {e}")
+            return None
+        
+        if info and 'entries' in info:
+            entries = [entry for entry in info['entries'] if entry]
+            info = entries[0] if entries else None
+        if not info:
             return None
+        return self.track_cache.put(info, query=query)
+
+    async def search_youtube(self, query):
+        """Search YouTube for a track"""
+        return await self.resolve_track(query)
 
     async def get_audio_source(self, url):
         """Get audio source from URL"""
-        try:
-            with yt_dlp.YoutubeDL(self.ytdl_options) as ytdl:
-                info = await asyncio.get_event_loop().run_in_executor(
-                    None, lambda: ytdl.extract_info(url, download=False)
-                )
-                
-                url = info.get('url')
-                title = info.get('title', 'Unknown')
-                duration = info.get('duration', 0)
-                
-                return {
-                    'source': discord.FFmpegPCMAudio(url, **self.ffmpeg_options),
-                    'title': title,
-                    'duration': duration,
-                    'url': info.get('webpage_url', url)
-                }
-        except Exception as e:
-            logging.error(f"Error getting audio source: {e}")
+        track = await self.resolve_track(url)
+        if not track or not track['stream_url']:
+            logging.error(f"Error getting audio source: no stream for {url}")
             return None
+        
+        return {
+            'source': discord.FFmpegPCMAudio(track['stream_url'], **self.ffmpeg_options),
+            'title': track['title'],
+            'duration': track['duration'],
+            'url': track['webpage_url']
+        }
 
     def add_to_queue(self, guild_id, track_info):
         """Add track to guild queue"""
         if guild_id not in self.queues:
-            self.queues[guild_id] = []
-        self.queues[guild_id].append(track_info)
+            self.queues[guild_id] = GuildQueue()
+        track = self.queues[guild_id].append(track_info)
+        self.schedule_prefetch(guild_id)
+        return track
+
+    def add_many_to_queue(self, guild_id, track_infos):
+        """Add several tracks to guild queue in one go"""
+        if guild_id not in self.queues:
+            self.queues[guild_id] = GuildQueue()
+        tracks = self.queues[guild_id].extend(track_infos)
+        self.schedule_prefetch(guild_id)
+        return tracks
 
     def get_queue(self, guild_id):
         """Get guild queue"""
-        return self.queues.get(guild_id, [])
+        queue = self.queues.get(guild_id)
+        return queue if queue is not None else GuildQueue()
 
     def clear_queue(self, guild_id):
         """Clear guild queue"""
         if guild_id in self.queues:
             self.queues[guild_id].clear()
+        self.playlist_generation[guild_id] = self.playlist_generation.get(guild_id, 0) + 1
+        self.schedule_prefetch(guild_id)
+
+    async def stream_playlist(self, guild_id, url, requester_id=None):
+        """
+        Enqueue a playlist's tracks as yt-dlp lists them
+        
+        Entries are listed flat (one request per page of the playlist, not per
+        track) and added in batches; each track's stream is only resolved by
+        the lookahead once it nears the front of the queue. Stops early if the
+        queue is cleared meanwhile.
+        
+        Args:
+            guild_id: Guild to enqueue for
+            url: Playlist URL
+            requester_id: Discord user the tracks are queued for
+            
+        Yields:
+            list: The QueuedTrack entries added by each batch
+        """
+        generation = self.playlist_generation.get(guild_id, 0)
+        async for entries in self.ytdl_pool.iter_entries(url, profile='flat', limit=self.playlist_limit):
+            if self.playlist_generation.get(guild_id, 0) != generation:
+                break
+            
+            track_infos = []
+            for entry in entries:
+                track_url = entry.get('webpage_url') or entry.get('url')
+                if track_url and not track_url.startswith('http') and entry.get('ie_key') == 'Youtube':
+                    track_url = f"https://www.youtube.com/watch?v={track_url}"
+                # Flat listings still include placeholders for private and deleted videos
+                if not track_url or entry.get('title') in ('[Private video]', '[Deleted video]'):
+                    continue
+                track_infos.append({
+                    'url': track_url,
+                    'title': entry.get('title') or 'Unknown Track',
+                    'duration': int(entry.get('duration') or 0),
+                    'requester_id': requester_id
+                })
+            
+            if track_infos:
+                yield self.add_many_to_queue(guild_id, track_infos)
+
+    def remove_from_queue(self, guild_id, track_id):
+        """Remove a queued track by ID"""
+        track = self.get_queue(guild_id).remove(track_id)
+        self.schedule_prefetch(guild_id)
+        return track
+
+    def move_in_queue(self, guild_id, track_id, position):
+        """Move a queued track to a new position"""
+        moved = self.get_queue(guild_id).move(track_id, position)
+        self.schedule_prefetch(guild_id)
+        return moved
+
+    def shuffle_queue(self, guild_id):
+        """Shuffle guild queue"""
+        self.get_queue(guild_id).shuffle()
+        self.schedule_prefetch(guild_id)
+
+    def schedule_prefetch(self, guild_id):
+        """
+        Resolve the next `prefetch_depth` queued tracks in the background
+        
+        Call after anything that changes the front of the queue. Lookahead for
+        tracks that are no longer coming up next is cancelled, and a warmed
+        FFmpeg source for anything but the next track is closed.
+        """
+        upcoming = [track.url for track in self.get_queue(guild_id).peek(self.prefetch_depth)]
+        tasks = self.prefetch_tasks.setdefault(guild_id, {})
+        
+        for url in list(tasks):
+            if url not in upcoming:
+                tasks.pop(url).cancel()
+        for url in upcoming:
+            if url not in tasks:
+                tasks[url] = asyncio.ensure_future(self._prefetch(guild_id, url))
+        
+        warm = self.warm_sources.get(guild_id)
+        if warm and (not upcoming or warm[0] != upcoming[0]):
+            self._discard_warm_source(guild_id)
+        self._warm_next(guild_id)
+
+    async def _prefetch(self, guild_id, url):
+        track = await self.resolve_track(url)
+        if track:
+            self._warm_next(guild_id)
+        else:
+            logging.warning(f"Could not prefetch {url} for guild {guild_id}")
+
+    def _warm_next(self, guild_id):
+        """Start FFmpeg on the next track's stream if it is resolved and warming is enabled"""
+        upcoming = self.get_queue(guild_id).peek(1)
+        if not self.prefetch_ffmpeg or not upcoming:
+            return
+        
+        url = upcoming[0].url
+        if guild_id in self.warm_sources:
+            return
+        
+        video_id = self.track_cache.get_video_id(url)
+        track = self.track_cache.get_track(video_id) if video_id else None
+        if track:
+            self.warm_sources[guild_id] = (url, {
+                'source': discord.FFmpegPCMAudio(track['stream_url'], **self.ffmpeg_options),
+                'title': track['title'],
+                'duration': track['duration'],
+                'url': track['webpage_url']
+            })
+
+    def _take_warm_source(self, guild_id, url):
+        warm = self.warm_sources.pop(guild_id, None)
+        if warm is None:
+            return None
+        if warm[0] != url:
+            warm[1]['source'].cleanup()
+            return None
+        return warm[1]
+
+    def _discard_warm_source(self, guild_id):
+        warm = self.warm_sources.pop(guild_id, None)
+        if warm:
+            warm[1]['source'].cleanup()
+
+    def cancel_prefetch(self):
+        """Cancel all lookahead and close warmed FFmpeg processes"""
+        for tasks in self.prefetch_tasks.values():
+            for task in tasks.values():
+                task.cancel()
+        self.prefetch_tasks.clear()
+        for guild_id in list(self.warm_sources):
+            self._discard_warm_source(guild_id)
 
     async def play_next(self, guild_id):
         """Play next track in queue"""
@@ -121,8 +327,12 @@ class MusicPlayer:
             self.is_playing[guild_id] = False
             return False
 
-        track_info = queue.pop(0)
-        audio_source = await self.get_audio_source(track_info['url'])
+        track_info = queue.popleft()
+        # Usually already resolved (and possibly already running) thanks to the lookahead
+        audio_source = self._take_warm_source(guild_id, track_info.url)
+        self.schedule_prefetch(guild_id)
+        if audio_source is None:
+            audio_source = await self.get_audio_source(track_info.url)
         
         if audio_source:
             self.current_track[guild_id] = {
@@ -199,6 +409,10 @@ class MusicCommands(commands.Cog):
         self.bot = bot
         self.music_player = MusicPlayer(bot)
 
+    def cog_unload(self):
+        self.music_player.cancel_prefetch()
+        self.music_player.ytdl_pool.shutdown()
+
     @commands.slash_command(name="join", description="Join your voice channel")
     async def join_command(self, ctx):
         """Join the user's voice channel"""
@@ -248,8 +462,10 @@ class MusicCommands(commands.Cog):
             
             track_info = {
                 'url': search_result['webpage_url'],
-                'title': search_result['title']
+                'title': search_result['title'],
+                'duration': search_result['duration']
             }
+        track_info['requester_id'] = ctx.author.id
 
         # Add to queue
         self.music_player.add_to_queue(ctx.guild.id, track_info)
@@ -264,6 +480,38 @@ class MusicCommands(commands.Cog):
         else:
             await ctx.followup.send(f"📝 Added to queue: **{track_info['title']}**")
 
+    @commands.slash_command(name="playlist", description="Queue a YouTube playlist")
+    async def playlist_command(self, ctx, *, url: str):
+        """Queue every track of a playlist, starting playback as soon as the first ones are listed"""
+        await ctx.defer()
+
+        if not self.music_player.is_connected(ctx.guild.id):
+            if not ctx.author.voice:
+                await ctx.followup.send("❌ You need to be in a voice channel!")
+                return
+            
+            voice_client = await self.music_player.join_voice_channel(ctx.author.voice.channel)
+            if not voice_client:
+                await ctx.followup.send("❌ Failed to join voice channel!")
+                return
+
+        added = 0
+        try:
+            async for tracks in self.music_player.stream_playlist(ctx.guild.id, url, requester_id=ctx.author.id):
+                added += len(tracks)
+                if not self.music_player.is_track_playing(ctx.guild.id):
+                    await self.music_player.play_next(ctx.guild.id)
+        except Exception as e:
+            logging.error(f"Error loading playlist {url}: {e}")
+            if not added:
+                await ctx.followup.send("❌ Could not load that playlist!")
+                return
+
+        if added:
+            await ctx.followup.send(f"📝 Added **{added}** tracks to the queue")
+        else:
+            await ctx.followup.send("❌ No playable tracks found in that playlist!")
+
     @commands.slash_command(name="pause", description="Pause music playback")
     async def pause_command(self, ctx):
         """Pause the current track"""
@@ -295,6 +543,28 @@ class MusicCommands(commands.Cog):
         self.music_player.clear_queue(ctx.guild.id)
         await ctx.respond("⏹️ Stopped music and cleared queue")
 
+    @commands.slash_command(name="shuffle", description="Shuffle the music queue")
+    async def shuffle_command(self, ctx):
+        """Shuffle the upcoming tracks"""
+        if not self.music_player.get_queue(ctx.guild.id):
+            await ctx.respond("❌ The queue is empty!", ephemeral=True)
+            return
+        
+        self.music_player.shuffle_queue(ctx.guild.id)
+        await ctx.respond("🔀 Shuffled the queue")
+
+    @commands.slash_command(name="remove", description="Remove a track from the queue")
+    async def remove_command(self, ctx, position: int):
+        """Remove the track at a position shown by /queue"""
+        queue = self.music_player.get_queue(ctx.guild.id)
+        if position < 1 or position > len(queue):
+            await ctx.respond("❌ No track at that position!", ephemeral=True)
+            return
+        
+        target = queue.peek(position)[-1]
+        track = self.music_player.remove_from_queue(ctx.guild.id, target.id)
+        await ctx.respond(f"🗑️ Removed **{track.title}** from the queue")
+
     @commands.slash_command(name="queue", description="Show music queue")
     async def queue_command(self, ctx):
         """Display the current music queue"""
@@ -311,7 +581,7 @@ class MusicCommands(commands.Cog):
             )
         
         if queue:
-            queue_text = "\n".join([f"{i+1}. {track['title']}" for i, track in enumerate(queue[:10])])
+            queue_text = "\n".join([f"{i+1}. {track.title}" for i, track in enumerate(queue.peek(10))])
             if len(queue) > 10:
                 queue_text += f"\n... and {len(queue) - 10} more"
             embed.add_field(name="Up Next", value=queue_text, inline=False)
@@ -2,7 +2,11 @@
 Statistics tracking utilities for Discord bot
 """
 import os
+import atexit
+import json
 import logging
+import threading
+from collections import Counter
 from datetime import datetime, timezone
 import asyncio
 from typing import Optional
@@ -13,10 +17,33 @@ logger = logging.getLogger(__name__)
 class StatsTracker:
     """Track bot statistics and store in database"""
     
-    def __init__(self):
+    def __init__(self, flush_size: int = 500, flush_interval: float = 5.0,
+                 rollup_interval: float = 60.0, purge_interval: float = 3600.0,
+                 max_buffered_rows: int = 50000):
         self.db_connected = False
         self.db = None
+        
+        # Write-behind buffer: events are collected here and flushed in bulk by a worker thread
+        self.flush_size = flush_size  # Flush early once this many rows are buffered
+        self.flush_interval = flush_interval  # Otherwise flush every N seconds
+        self.max_buffered_rows = max_buffered_rows  # Rows kept for retry while the database is down
+        self._buffer_lock = threading.Lock()
+        self._pending_rows = {}  # model name -> list of row dicts
+        self._pending_counters = Counter()  # stat name -> increment
+        self._pending_count = 0
+        self._flush_requested = threading.Event()
+        self._stopping = threading.Event()
+        self._worker = None
+        
+        # History rollups and retention are maintained by the same worker
+        self.rollup_interval = rollup_interval
+        self.purge_interval = purge_interval
+        self._last_rollup = 0.0
+        self._last_purge = 0.0
+        
         self._init_db()
+        if self.db_connected:
+            self._start_worker()
     
     def _init_db(self):
         """Initialize database connection"""
@@ -24,7 +51,7 @@ class StatsTracker:
             # Import here to avoid circular imports
             import sys
             sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-            from models import db, BotStats, MinecraftServerStats, CommandUsage, BotUptime
+            from models import db, BotStats, MinecraftServerStats, MinecraftServerRollup, MinecraftCounter, CommandUsage, CommandUsageDaily, BotUptime, CACHE_GENERATION_STAT
             
             # Configure Flask app for database operations
             from flask import Flask
@@ -45,72 +72,232 @@ class StatsTracker:
                 self.app = app
                 self.BotStats = BotStats
                 self.MinecraftServerStats = MinecraftServerStats
+                self.MinecraftServerRollup = MinecraftServerRollup
+                self.MinecraftCounter = MinecraftCounter
                 self.CommandUsage = CommandUsage
+                self.CommandUsageDaily = CommandUsageDaily
+                self.cache_generation_stat = CACHE_GENERATION_STAT
                 self.BotUptime = BotUptime
+                
+                # Seed the daily command aggregates from existing history on first run
+                if not CommandUsageDaily.query.first() and CommandUsage.query.first():
+                    backfilled = CommandUsageDaily.backfill()
+                    logger.info(f"Backfilled {backfilled} daily command usage aggregates")
+                
                 logger.info("Database connection established for statistics tracking")
                 
         except Exception as e:
             logger.error(f"Failed to initialize database for stats tracking: {e}")
             self.db_connected = False
     
+    def _start_worker(self):
+        """Start the background thread that flushes buffered stats"""
+        self._worker = threading.Thread(target=self._run_worker, name="stats-writer", daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+    
+    def _run_worker(self):
+        """Flush buffered stats whenever the size or time threshold is reached"""
+        while not self._stopping.is_set():
+            self._flush_requested.wait(self.flush_interval)
+            self._flush_requested.clear()
+            self.flush()
+            self.maintain_history()
+    
+    def _enqueue(self, model_name: str, row: dict, counter_name: str):
+        """Buffer a row insert and a counter increment for the next flush"""
+        with self._buffer_lock:
+            self._pending_rows.setdefault(model_name, []).append(row)
+            self._pending_counters[counter_name] += 1
+            self._pending_count += 1
+            if self._pending_count >= self.flush_size:
+                self._flush_requested.set()
+    
+    def flush(self) -> int:
+        """
+        Write every buffered event to the database
+        
+        Rows are written with one multi-row INSERT per table, counters with one
+        aggregated increment per stat and command usage is folded into the daily
+        aggregates, all in a single transaction.
+        
+        Returns:
+            int: Number of rows written
+        """
+        with self._buffer_lock:
+            pending_rows, self._pending_rows = self._pending_rows, {}
+            pending_counters, self._pending_counters = self._pending_counters, Counter()
+            self._pending_count = 0
+        
+        if not pending_rows and not pending_counters:
+            return 0
+        
+        written = sum(len(rows) for rows in pending_rows.values())
+        try:
+            with self.app.app_context():
+                for model_name, rows in pending_rows.items():
+                    model = getattr(self, model_name)
+                    self.db.session.execute(model.__table__.insert(), rows)
+                
+                # Bump the generation so the dashboard's cached responses go stale
+                counters = pending_counters + Counter({self.cache_generation_stat: 1})
+                self.BotStats.increment_many(counters, commit=False)
+                
+                daily_counts = {}
+                for row in pending_rows.get('CommandUsage', []):
+                    key = (row['timestamp'].date(), row['command_name'], row['guild_id'] or '')
+                    uses, successes = daily_counts.get(key, (0, 0))
+                    daily_counts[key] = (uses + 1, successes + (1 if row['success'] else 0))
+                self.CommandUsageDaily.increment_many(daily_counts, commit=False)
+                
+                self.db.session.commit()
+            return written
+                
+        except Exception as e:
+            logger.error(f"Failed to flush {written} buffered stats rows, keeping them for the next flush: {e}")
+            self._requeue(pending_rows, pending_counters)
+            return 0
+    
+    def _requeue(self, rows_by_model: dict, counters: Counter):
+        """Put a failed flush back in front of the buffer, dropping the oldest rows past max_buffered_rows"""
+        with self._buffer_lock:
+            for model_name, rows in self._pending_rows.items():
+                rows_by_model.setdefault(model_name, []).extend(rows)
+            self._pending_rows = rows_by_model
+            self._pending_counters = counters + self._pending_counters
+            
+            total = sum(len(rows) for rows in self._pending_rows.values())
+            dropped = 0
+            while total > self.max_buffered_rows:
+                # Trim the largest backlog first; its oldest rows go
+                model_name = max(self._pending_rows, key=lambda name: len(self._pending_rows[name]))
+                rows = self._pending_rows[model_name]
+                excess = min(total - self.max_buffered_rows, len(rows))
+                del rows[:excess]
+                total -= excess
+                dropped += excess
+            self._pending_count = total
+        
+        if dropped:
+            logger.warning(f"Stats buffer full, dropped the {dropped} oldest unwritten rows")
+    
+    def maintain_history(self, force: bool = False):
+        """Roll up completed Minecraft history buckets and expire old rows when due"""
+        now = time.time()
+        try:
+            if force or now - self._last_rollup >= self.rollup_interval:
+                self._last_rollup = now
+                with self.app.app_context():
+                    written = self.MinecraftServerRollup.run_pending()
+                    if written:
+                        self.BotStats.increment_stat(self.cache_generation_stat)
+                if written:
+                    logger.debug(f"Minecraft history rollups written: {written}")
+            
+            if force or now - self._last_purge >= self.purge_interval:
+                self._last_purge = now
+                with self.app.app_context():
+                    deleted = self.MinecraftServerRollup.purge_expired()
+                if any(deleted.values()):
+                    logger.info(f"Expired Minecraft history rows: {deleted}")
+                    
+        except Exception as e:
+            logger.error(f"Failed to maintain Minecraft history rollups: {e}")
+    
+    def close(self):
+        """Stop the background writer and flush whatever is still buffered"""
+        if self._worker and self._worker.is_alive():
+            self._stopping.set()
+            self._flush_requested.set()
+            self._worker.join(timeout=10)
+        if self.db_connected:
+            self.flush()
+    
     def track_minecraft_counter_update(self, server_ip: str, server_port: int, 
                                      player_count: int, max_players: int, 
                                      is_online: bool, response_time_ms: int = 0,
                                      players_list: list = None):
-        """Track a Minecraft server counter update"""
+        """Track a Minecraft server counter update (buffered, written by the background worker)"""
         if not self.db_connected:
             return
+        
+        self._enqueue('MinecraftServerStats', {
+            'server_ip': server_ip,
+            'server_port': server_port,
+            'is_online': is_online,
+            'player_count': player_count,
+            'max_players': max_players,
+            'response_time_ms': response_time_ms,
+            'players_list': json.dumps(players_list) if players_list else None,
+            'timestamp': datetime.now(timezone.utc)
+        }, 'minecraft_counter_updates')
+    
+    def track_command_usage(self, command_name: str, user_id: str, 
+                          guild_id: Optional[str] = None, success: bool = True):
+        """Track Discord command usage (buffered, written by the background worker)"""
+        if not self.db_connected:
+            return
+        
+        self._enqueue('CommandUsage', {
+            'command_name': command_name,
+            'user_id': str(user_id),
+            'guild_id': str(guild_id) if guild_id else None,
+            'success': success,
+            'timestamp': datetime.now(timezone.utc)
+        }, 'total_commands_used')
+    
+    def load_minecraft_counters(self) -> dict:
+        """Load every registered Minecraft counter channel in one query"""
+        if not self.db_connected:
+            return {}
             
         try:
             with self.app.app_context():
-                # Increment global counter
-                self.BotStats.increment_stat('minecraft_counter_updates')
-                
-                # Store detailed server stats
-                server_stat = self.MinecraftServerStats(
-                    server_ip=server_ip,
-                    server_port=server_port,
-                    is_online=is_online,
-                    player_count=player_count,
-                    max_players=max_players,
-                    response_time_ms=response_time_ms,
-                    timestamp=datetime.now(timezone.utc)
-                )
+                return {
+                    counter.channel_id: counter.to_server_info()
+                    for counter in self.MinecraftCounter.query.all()
+                }
                 
-                if players_list:
-                    server_stat.players = players_list
+        except Exception as e:
+            logger.error(f"Failed to load Minecraft counters: {e}")
+            return {}
+    
+    def save_minecraft_counter(self, channel_id: int, server_info: dict):
+        """Insert or update a Minecraft counter channel registration"""
+        if not self.db_connected:
+            return
+            
+        try:
+            with self.app.app_context():
+                counter = self.MinecraftCounter.query.filter_by(channel_id=channel_id).first()
+                if not counter:
+                    counter = self.MinecraftCounter(channel_id=channel_id)
+                    self.db.session.add(counter)
                 
-                self.db.session.add(server_stat)
+                counter.guild_id = server_info['guild_id']
+                counter.server_ip = server_info['server_ip']
+                counter.server_port = server_info['server_port']
+                counter.channel_type = server_info.get('channel_type', 'combined')
+                counter.channel_name_template = server_info['channel_name_template']
                 self.db.session.commit()
                 
         except Exception as e:
-            logger.error(f"Failed to track Minecraft counter update: {e}")
+            logger.error(f"Failed to save Minecraft counter {channel_id}: {e}")
     
-    def track_command_usage(self, command_name: str, user_id: str, 
-                          guild_id: Optional[str] = None, success: bool = True):
-        """Track Discord command usage"""
-        if not self.db_connected:
+    def delete_minecraft_counters(self, channel_ids: list):
+        """Remove Minecraft counter channel registrations"""
+        if not self.db_connected or not channel_ids:
             return
             
         try:
             with self.app.app_context():
-                # Increment global command counter
-                self.BotStats.increment_stat('total_commands_used')
-                
-                # Store command usage details
-                command_usage = self.CommandUsage(
-                    command_name=command_name,
-                    user_id=str(user_id),
-                    guild_id=str(guild_id) if guild_id else None,
-                    success=success,
-                    timestamp=datetime.now(timezone.utc)
-                )
-                
-                self.db.session.add(command_usage)
+                self.MinecraftCounter.query.filter(
+                    self.MinecraftCounter.channel_id.in_(list(channel_ids))
+                ).delete(synchronize_session=False)
                 self.db.session.commit()
                 
         except Exception as e:
-            logger.error(f"Failed to track command usage: {e}")
+            logger.error(f"Failed to delete Minecraft counters: {e}")
     
     def track_bot_start(self):
         """Track bot startup"""
@@ -143,7 +330,10 @@ class StatsTracker:
         """Track bot shutdown"""
         if not self.db_connected:
             return
-            
+        
+        # Don't lose buffered events on the way out
+        self.flush()
+        
         try:
             with self.app.app_context():
                 # End current session
@@ -0,0 +1,145 @@
+"""
+Two-level cache of resolved tracks shared by every guild
+"""
+import re
+import time
+from collections import OrderedDict
+from typing import Optional
+
+# googlevideo stream URLs carry their expiry as ?expire=<unix time> (or /expire/<unix time>/ in manifests)
+_EXPIRE_PATTERN = re.compile(r'[?&/]expire[=/](\d+)')
+
+
+def stream_url_expiry(stream_url: str, default_ttl: float, margin: float, now: Optional[float] = None) -> float:
+    """
+    When a direct stream URL should stop being handed out
+
+    Args:
+        stream_url: Direct media URL from yt-dlp
+        default_ttl: Lifetime to assume if the URL has no embedded expiry
+        margin: Seconds before the embedded expiry to stop using the URL
+        now: Current time (default: time.time())
+
+    Returns:
+        float: Unix time the cached URL expires at
+    """
+    now = time.time() if now is None else now
+    match = _EXPIRE_PATTERN.search(stream_url or '')
+    if match:
+        return int(match.group(1)) - margin
+    return now + default_ttl
+
+
+def query_key(query: str) -> str:
+    """Cache key for a search string or URL; searches ignore case and extra spaces"""
+    query = query.strip()
+    if query.startswith('http'):
+        return query
+    return 'search:' + ' '.join(query.lower().split())
+
+
+class TrackCache:
+    """
+    Query -> video ID, and video ID -> metadata plus direct stream URL
+
+    Both levels are LRU-bounded. Video IDs for a query are kept for
+    `query_ttl` seconds. Metadata outlives the stream URL: once the URL is
+    expired the track is re-extracted from its page URL instead of searching
+    again. Only touched from the bot's event loop, so there is no locking.
+    """
+
+    def __init__(self, query_ttl: float = 21600.0, stream_ttl: float = 1800.0,
+                 expiry_margin: float = 300.0, max_entries: int = 2000):
+        self.query_ttl = query_ttl
+        self.stream_ttl = stream_ttl  # Used for stream URLs without an embedded expiry
+        self.expiry_margin = expiry_margin
+        self.max_entries = max_entries
+        self._queries = OrderedDict()  # query key -> (video_id, expires_at)
+        self._tracks = OrderedDict()  # video_id -> track dict
+        self.hits = 0
+        self.misses = 0
+
+    def get_video_id(self, query: str) -> Optional[str]:
+        """Video ID a query resolved to before, if still cached"""
+        key = query_key(query)
+        entry = self._queries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.time():
+            del self._queries[key]
+            return None
+        self._queries.move_to_end(key)
+        return entry[0]
+
+    def get_track(self, video_id: str, require_stream: bool = True) -> Optional[dict]:
+        """
+        Cached track for a video ID
+
+        Args:
+            video_id: yt-dlp video ID
+            require_stream: Only return the track if its stream URL is still valid
+
+        Returns:
+            dict: Track with id, title, duration, webpage_url, stream_url and stream_expires_at
+        """
+        track = self._tracks.get(video_id)
+        if track is None:
+            return None
+        if require_stream and (not track['stream_url'] or track['stream_expires_at'] <= time.time()):
+            return None
+        self._tracks.move_to_end(video_id)
+        return track
+
+    def lookup(self, query: str) -> Optional[dict]:
+        """Playable cached track for a search string or URL"""
+        video_id = self.get_video_id(query)
+        track = self.get_track(video_id) if video_id else None
+        if track is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return track
+
+    def put(self, info: dict, query: Optional[str] = None) -> dict:
+        """
+        Cache an extracted yt-dlp info dict
+
+        Args:
+            info: Info dict for a single video
+            query: Search string or URL it was extracted for
+
+        Returns:
+            dict: The cached track
+        """
+        now = time.time()
+        video_id = info.get('id') or info.get('webpage_url') or query
+        stream_url = info.get('url')
+        track = {
+            'id': video_id,
+            'title': info.get('title', 'Unknown'),
+            'duration': info.get('duration') or 0,
+            'webpage_url': info.get('webpage_url') or query,
+            'stream_url': stream_url,
+            'stream_expires_at': stream_url_expiry(stream_url, self.stream_ttl, self.expiry_margin, now)
+            if stream_url else 0.0
+        }
+
+        self._tracks[video_id] = track
+        self._tracks.move_to_end(video_id)
+
+        # The page URL is what gets queued, so it resolves through the cache too
+        for alias in (query, track['webpage_url']):
+            if alias:
+                key = query_key(alias)
+                self._queries[key] = (video_id, now + self.query_ttl)
+                self._queries.move_to_end(key)
+
+        while len(self._tracks) > self.max_entries:
+            self._tracks.popitem(last=False)
+        while len(self._queries) > self.max_entries * 2:
+            self._queries.popitem(last=False)
+        return track
+
+    def clear(self):
+        self._queries.clear()
+        self._tracks.clear()
@@ -0,0 +1,162 @@
+"""
+Process-wide pool of warmed yt-dlp extractors on a dedicated thread pool
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, List, Optional
+
+import yt_dlp
+
+logger = logging.getLogger(__name__)
+
+
+class YTDLPool:
+    """
+    Run yt-dlp extractions on reused YoutubeDL instances
+
+    Building a YoutubeDL loads its whole extractor registry and opens fresh HTTP
+    sessions, so each worker thread builds one instance per option profile the
+    first time it needs it and keeps it. YoutubeDL instances are not thread-safe;
+    keeping them thread-local means no instance is ever shared.
+
+    Extractions run on this pool's own bounded executor instead of the event
+    loop's default one, so a burst of /play commands can't starve other
+    blocking work (such as DNS lookups for Minecraft probes) of threads.
+    """
+
+    def __init__(self, profiles: Dict[str, dict], max_workers: int = 4):
+        self.profiles = profiles  # Profile name -> YoutubeDL options
+        self.max_workers = max_workers
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='ytdl',
+            initializer=self._init_thread
+        )
+
+    def _init_thread(self):
+        # An initializer that raises would break the whole executor, so only log
+        try:
+            self._build('default')
+        except Exception as e:
+            logger.error(f"Failed to build yt-dlp extractor: {e}")
+
+    def _build(self, profile: str) -> yt_dlp.YoutubeDL:
+        """This thread's extractor for a profile, built on first use"""
+        extractors = getattr(self._local, 'extractors', None)
+        if extractors is None:
+            extractors = self._local.extractors = {}
+        ytdl = extractors.get(profile)
+        if ytdl is None:
+            ytdl = extractors[profile] = yt_dlp.YoutubeDL(self.profiles[profile])
+        return ytdl
+
+    def warm(self, timeout: float = 30.0):
+        """Start every worker thread now so its default extractor is built before the first /play"""
+        barrier = threading.Barrier(self.max_workers, timeout=timeout)
+
+        def hold():
+            # Each task waits for the others, which forces one task per thread
+            try:
+                barrier.wait()
+            except threading.BrokenBarrierError:
+                pass
+
+        for _ in range(self.max_workers):
+            self._executor.submit(hold)
+
+    async def extract_info(self, url: str, profile: str = 'default', **kwargs) -> Optional[dict]:
+        """
+        Run YoutubeDL.extract_info on the pool
+
+        Args:
+            url: URL or search string (e.g. "ytsearch:...")
+            profile: Option profile to extract with
+            **kwargs: Passed to extract_info (download defaults to False)
+
+        Returns:
+            dict: The extracted info
+        """
+        kwargs.setdefault('download', False)
+
+        def run():
+            return self._build(profile).extract_info(url, **kwargs)
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor, run)
+
+    async def iter_entries(self, url: str, profile: str = 'flat', batch_size: int = 50,
+                           limit: Optional[int] = None) -> AsyncIterator[List[dict]]:
+        """
+        Stream a playlist's entries in batches as yt-dlp pages through it
+
+        Runs extract_info with process=False, so entries come from a lazy
+        list that fetches playlist pages on demand. Pair it with a profile that
+        sets extract_flat, so entries are not resolved one by one.
+
+        Args:
+            url: Playlist (or single video) URL
+            profile: Option profile to extract with
+            batch_size: Entries per yielded batch
+            limit: Stop after this many entries
+
+        Yields:
+            list: Raw entry dicts (single videos come through as one entry)
+        """
+        loop = asyncio.get_running_loop()
+        batches = asyncio.Queue()
+        stop = threading.Event()
+        done = object()
+
+        def run():
+            try:
+                ytdl = self._build(profile)
+                info = ytdl.extract_info(url, download=False, process=False)
+                # Follow redirects (e.g. a shortened or "watch?...&list=" URL) to the real result
+                for _ in range(3):
+                    if not info or info.get('_type') not in ('url', 'url_transparent'):
+                        break
+                    info = ytdl.extract_info(info['url'], download=False, process=False, ie_key=info.get('ie_key'))
+
+                if not info:
+                    entries = []
+                elif info.get('_type') in ('playlist', 'multi_video'):
+                    entries = info.get('entries') or []
+                else:
+                    entries = [info]
+
+                batch = []
+                for count, entry in enumerate(entries, 1):
+                    if stop.is_set():
+                        break
+                    if entry:
+                        batch.append(entry)
+                    if len(batch) >= batch_size:
+                        loop.call_soon_threadsafe(batches.put_nowait, batch)
+                        batch = []
+                    if limit and count >= limit:
+                        break
+                if batch:
+                    loop.call_soon_threadsafe(batches.put_nowait, batch)
+            except Exception as e:
+                loop.call_soon_threadsafe(batches.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(batches.put_nowait, done)
+
+        loop.run_in_executor(self._executor, run)
+        try:
+            while True:
+                batch = await batches.get()
+                if batch is done:
+                    break
+                if isinstance(batch, Exception):
+                    raise batch
+                yield batch
+        finally:
+            # If the consumer stopped early, the worker thread quits at its next entry
+            stop.set()
+
+    def shutdown(self):
+        """Stop the worker threads once queued extractions finish"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,125 @@
+"""
+Shared Discord REST client for the web dashboards
+
+One keep-alive connection pool per process, explicit timeouts, and retries
+on 429 responses that wait out Discord's Retry-After.
+"""
+import logging
+import os
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+DISCORD_API_BASE = os.environ.get('DISCORD_API_BASE', 'https://discord.com/api')
+
+# (connect, read) seconds, so a slow upstream can't hold a worker thread indefinitely
+DISCORD_HTTP_TIMEOUT = (3.05, float(os.environ.get('DISCORD_HTTP_TIMEOUT', 10)))
+
+DISCORD_HTTP_POOL_SIZE = int(os.environ.get('DISCORD_HTTP_POOL_SIZE', 20))
+
+
+class DiscordRESTClient:
+    """
+    Thin wrapper around a pooled requests session for Discord API calls
+
+    Methods return the `requests.Response` so callers keep checking
+    `status_code` themselves. Rate-limited calls (429) are retried after the
+    delay Discord asks for, up to `max_retries` times, unless that delay is
+    longer than `max_retry_after` seconds, in which case the 429 is returned.
+    """
+
+    def __init__(self, base_url: str = DISCORD_API_BASE, timeout=DISCORD_HTTP_TIMEOUT,
+                 pool_size: int = DISCORD_HTTP_POOL_SIZE, max_retries: int = 3,
+                 max_retry_after: float = 10.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_retry_after = max_retry_after
+
+        self.session = requests.Session()
+        # Connection failures are retried by urllib3; 429s are handled in request()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.2,
+                              respect_retry_after_header=False, raise_on_status=False)
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """
+        Send a request to the Discord API
+
+        Args:
+            method: HTTP method
+            path: API path such as '/users/@me', or a full URL
+            **kwargs: Passed to requests (headers, data, json, ...)
+
+        Returns:
+            requests.Response: The final response
+        """
+        url = path if path.startswith('http') else f"{self.base_url}{path}"
+        kwargs.setdefault('timeout', self.timeout)
+
+        attempt = 0
+        while True:
+            response = self.session.request(method, url, **kwargs)
+            if response.status_code != 429 or attempt >= self.max_retries:
+                return response
+
+            retry_after = self._retry_after(response)
+            if retry_after > self.max_retry_after:
+                logger.warning(f"Discord rate limited {method} {path} for {retry_after:.1f}s, not retrying")
+                return response
+
+            attempt += 1
+            logger.info(f"Discord rate limited {method} {path}, retrying in {retry_after:.2f}s (attempt {attempt})")
+            time.sleep(retry_after)
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request('POST', path, **kwargs)
+
+    def exchange_code(self, client_id: str, client_secret: str, code: str, redirect_uri: str) -> requests.Response:
+        """Exchange an OAuth authorization code for an access token"""
+        return self.post('/oauth2/token', data={
+            'client_id': client_id,
+            'client_secret': client_secret,
+            'grant_type': 'authorization_code',
+            'code': code,
+            'redirect_uri': redirect_uri
+        }, headers={'Content-Type': 'application/x-www-form-urlencoded'})
+
+    def get_current_user(self, access_token: str) -> requests.Response:
+        """Fetch the user an OAuth access token belongs to"""
+        return self.get('/users/@me', headers={'Authorization': f'Bearer {access_token}'})
+
+    def get_current_user_guilds(self, access_token: str) -> requests.Response:
+        """Fetch the guilds of the user an OAuth access token belongs to"""
+        return self.get('/users/@me/guilds', headers={'Authorization': f'Bearer {access_token}'})
+
+    @staticmethod
+    def _retry_after(response: requests.Response) -> float:
+        """Seconds to wait before retrying a 429, from the headers or the JSON body"""
+        for header in ('Retry-After', 'X-RateLimit-Reset-After'):
+            value = response.headers.get(header)
+            if value:
+                try:
+                    return max(float(value), 0.0)
+                except ValueError:
+                    pass
+        try:
+            return max(float(response.json().get('retry_after', 1.0)), 0.0)
+        except (ValueError, AttributeError):
+            return 1.0
+
+
+# Shared by every thread of a worker process
+discord_api = DiscordRESTClient()
@@ -0,0 +1,58 @@
+"""
+Time series downsampling for the dashboard charts
+"""
+from typing import List, Sequence
+
+
+def lttb_indices(xs: Sequence[float], ys: Sequence[float], threshold: int) -> List[int]:
+    """
+    Pick the points to keep with Largest-Triangle-Three-Buckets
+
+    The first and last points are always kept. The points in between are split
+    into `threshold - 2` buckets, and from each bucket the point forming the largest
+    triangle with the previously kept point and the next bucket's average is kept,
+    so peaks and dips survive while flat stretches are thinned out.
+
+    Args:
+        xs: Ascending x values (e.g. epoch seconds)
+        ys: y values, None is treated as 0
+        threshold: Maximum number of points to keep (at least 3)
+
+    Returns:
+        List[int]: Ascending indices of the kept points
+    """
+    n = len(xs)
+    if threshold >= n or n <= 2:
+        return list(range(n))
+    threshold = max(threshold, 3)
+
+    ys = [y or 0 for y in ys]
+    every = (n - 2) / (threshold - 2)
+    indices = [0]
+    a = 0
+
+    for bucket in range(threshold - 2):
+        # Average of the next bucket is the triangle's third corner
+        avg_start = int((bucket + 1) * every) + 1
+        avg_end = min(int((bucket + 2) * every) + 1, n)
+        avg_count = avg_end - avg_start
+        avg_x = sum(xs[avg_start:avg_end]) / avg_count
+        avg_y = sum(ys[avg_start:avg_end]) / avg_count
+
+        range_start = int(bucket * every) + 1
+        range_end = int((bucket + 1) * every) + 1
+        ax, ay = xs[a], ys[a]
+
+        max_area = -1.0
+        next_a = range_start
+        for j in range(range_start, range_end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > max_area:
+                max_area = area
+                next_a = j
+
+        indices.append(next_a)
+        a = next_a
+
+    indices.append(n - 1)
+    return indices
@@ -1,10 +1,46 @@
+import importlib.util
+import multiprocessing
 import os
 
 bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
-workers = 1
-worker_class = "sync"
+
+# Threaded workers by default: a slow Discord API call or a live dashboard stream
+# only occupies one thread instead of the whole worker. Set GUNICORN_WORKER_CLASS
+# to "gevent" (needs the gevent package) for many mostly-idle connections, or
+# "sync" for the old single-request-per-worker behaviour (threads is forced to 1
+# then, since gunicorn would otherwise quietly switch sync to gthread).
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+if worker_class == 'gevent' and importlib.util.find_spec('gevent') is None:
+    worker_class = 'gthread'
+
+# A sync worker serves one request at a time, so a live dashboard stream would
+# block it entirely; turn streams off there (dashboards fall back to polling)
+raw_env = ['LIVE_UPDATE_MAX_STREAMS=0'] if worker_class == 'sync' else []
+
+# Workers sized from the CPU count, capped so small instances don't run out of memory
+workers = int(os.environ.get('WEB_CONCURRENCY') or min(
+    multiprocessing.cpu_count() * 2 + 1,
+    int(os.environ.get('GUNICORN_MAX_WORKERS', 4))
+))
+threads = 1 if worker_class == 'sync' else int(os.environ.get('GUNICORN_THREADS', 8))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+
 timeout = 120
-keepalive = 30
+graceful_timeout = 30
+keepalive = 5
 max_requests = 1000
 max_requests_jitter = 100
-preload_app = True
\ No newline at end of file
+preload_app = True
+
+def post_fork(server, worker):
+    """Give each worker its own database connections instead of the preloaded master's"""
+    try:
+        app = server.app.wsgi()
+        if 'sqlalchemy' not in getattr(app, 'extensions', {}):
+            return
+        from models import db
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose(close=False)
+    except Exception as e:
+        server.log.warning(f"Could not reset database pool after fork: {e}")
@@ -10,7 +10,7 @@ load_dotenv()
 def init_database():
     """Create all database tables"""
     try:
-        from models import db, BotStats, MinecraftServerStats, CommandUsage, BotUptime
+        from models import db, BotStats, MinecraftServerStats, MinecraftCounter, CommandUsage, BotUptime
         from flask import Flask
         
         app = Flask(__name__)
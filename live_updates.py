@@ -0,0 +1,168 @@
+"""
+Server-Sent Events stream for live dashboard updates
+"""
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def merge_patch(old, new):
+    """
+    Compute a JSON merge patch (RFC 7386) that turns `old` into `new`
+
+    Only changed keys are included; removed keys are reported as None. Lists and
+    scalars are replaced wholesale.
+
+    Returns:
+        The patch, or None when nothing changed
+    """
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return None if old == new else new
+
+    patch = {}
+    for key, value in new.items():
+        if key not in old:
+            patch[key] = value
+        elif isinstance(value, dict) and isinstance(old[key], dict):
+            child = merge_patch(old[key], value)
+            if child:
+                patch[key] = child
+        elif old[key] != value:
+            patch[key] = value
+    for key in old:
+        if key not in new:
+            patch[key] = None
+    return patch or None
+
+
+def format_sse(data=None, event=None, event_id=None, retry_ms=None, comment=None) -> str:
+    """Encode one Server-Sent Events message"""
+    lines = []
+    if comment is not None:
+        lines.append(f": {comment}")
+    if retry_ms is not None:
+        lines.append(f"retry: {retry_ms}")
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    if data is not None:
+        payload = json.dumps(data, separators=(',', ':'), default=str)
+        lines.extend(f"data: {line}" for line in payload.splitlines())
+    return '\n'.join(lines) + '\n\n'
+
+
+class LiveUpdateHub:
+    """
+    Wakes every open dashboard stream when the underlying data changes
+
+    One watcher thread per process polls `generation_source` (the stats writer's
+    generation counter), so the database sees a single cheap read per poll
+    interval no matter how many dashboards are connected. Streams block on a
+    condition variable until the generation moves or their heartbeat is due.
+
+    Each open stream holds a worker thread, so at most `max_streams` are
+    served per process; callers turn the rest away and clients fall back to
+    polling.
+    """
+
+    def __init__(self, app=None, generation_source=None, poll_interval: float = 2.0, max_streams: int = 4):
+        self.app = app
+        self.generation_source = generation_source  # Callable returning the current data generation
+        self.poll_interval = poll_interval
+        self.max_streams = max_streams
+
+        self.open_streams = 0
+        self._streams_lock = threading.Lock()
+
+        self.version = 0  # Bumped every time the generation changes
+        self._generation = None
+        self._condition = threading.Condition()
+        self._watcher = None
+        self._watcher_lock = threading.Lock()
+
+    def _ensure_watcher(self):
+        """Start the watcher thread on first use"""
+        with self._watcher_lock:
+            if self._watcher is None or not self._watcher.is_alive():
+                self._watcher = threading.Thread(target=self._watch, name="live-update-watcher", daemon=True)
+                self._watcher.start()
+
+    def _watch(self):
+        while True:
+            try:
+                if self.app is not None:
+                    with self.app.app_context():
+                        generation = self.generation_source()
+                else:
+                    generation = self.generation_source()
+                if generation != self._generation:
+                    self._generation = generation
+                    self.notify()
+            except Exception as e:
+                logger.warning(f"Could not poll live update generation: {e}")
+            time.sleep(self.poll_interval)
+
+    def acquire_stream(self) -> bool:
+        """Reserve a stream slot; False if this process is already serving `max_streams`"""
+        with self._streams_lock:
+            if self.open_streams >= self.max_streams:
+                return False
+            self.open_streams += 1
+            return True
+
+    def release_stream(self):
+        with self._streams_lock:
+            self.open_streams = max(self.open_streams - 1, 0)
+
+    def notify(self):
+        """Wake every waiting stream"""
+        with self._condition:
+            self.version += 1
+            self._condition.notify_all()
+
+    def wait(self, seen_version: int, timeout: float) -> int:
+        """Block until the version moves past `seen_version` or the timeout runs out"""
+        if self.generation_source is not None:
+            self._ensure_watcher()
+        with self._condition:
+            self._condition.wait_for(lambda: self.version != seen_version, timeout=timeout)
+            return self.version
+
+    def stream(self, build_snapshot, heartbeat: float = 15.0, max_duration: float = 60.0, retry_ms: int = 3000):
+        """
+        Generate the SSE messages for one client
+
+        Sends a full `snapshot` event first, then a `delta` merge patch each time
+        the data changes, with comment heartbeats in between. The stream ends
+        after `max_duration`, which should stay well under the server's worker
+        timeout; EventSource reconnects on its own and receives a fresh snapshot.
+
+        Args:
+            build_snapshot: Zero-argument callable returning the full state dict
+            heartbeat: Seconds between keep-alive comments
+            max_duration: Seconds before the stream is closed
+            retry_ms: Reconnect delay advertised to the client
+        """
+        started = time.monotonic()
+        version = self.version
+        state = build_snapshot()
+        event_id = 0
+        yield format_sse(state, event='snapshot', event_id=event_id, retry_ms=retry_ms)
+
+        while time.monotonic() - started < max_duration:
+            new_version = self.wait(version, timeout=heartbeat)
+            if new_version == version:
+                yield format_sse(comment='heartbeat')
+                continue
+
+            version = new_version
+            new_state = build_snapshot()
+            patch = merge_patch(state, new_state)
+            state = new_state
+            if patch:
+                event_id += 1
+                yield format_sse(patch, event='delta', event_id=event_id)
@@ -0,0 +1,148 @@
+"""
+Load test the web dashboard under the old and new gunicorn profiles
+
+Starts a fake Discord API that answers after a fixed delay, then runs gunicorn
+once with the old profile (1 sync worker) and once with gunicorn.conf.py, and
+drives both with the same mix of dashboard requests from concurrent clients.
+Usage:
+
+    python load_test_dashboard.py --clients 32 --duration 15
+    python load_test_dashboard.py --upstream-delay 0.5 --database-url postgresql://...
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+# Requests each client cycles through. /api/user/servers bypasses the per-user guild cache with
+# ?refresh=1 so every call waits on the (fake) Discord API, the blocking-upstream case being compared
+REQUEST_MIX = ['/api/stats', '/api/minecraft-history', '/api/health', '/api/user/servers?refresh=1']
+
+# An empty --config keeps gunicorn from picking up ./gunicorn.conf.py for the old profile
+PROFILES = {
+    'sync x1 (old)': ['--config', os.devnull, '--workers', '1', '--worker-class', 'sync', '--timeout', '120'],
+    'gunicorn.conf.py': ['--config', 'gunicorn.conf.py'],
+}
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_fake_discord(delay: float) -> ThreadingHTTPServer:
+    """Serve /users/@me/guilds with one managed guild after `delay` seconds"""
+    body = json.dumps([{'id': '1', 'name': 'Load Test', 'icon': None, 'owner': True, 'permissions': '8'}]).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', free_port()), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def wait_until_up(base_url: str, timeout: float = 30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(f"{base_url}/api/health", timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f"Dashboard did not start at {base_url}")
+
+def run_clients(base_url: str, clients: int, duration: float):
+    """Hammer the dashboard from `clients` threads; returns (completed, errors, latencies)"""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.time() + duration
+
+    def client(offset):
+        http = requests.Session()
+        http.get(f"{base_url}/dev-login", allow_redirects=False, timeout=10)
+        i = offset
+        while time.time() < stop_at:
+            path = REQUEST_MIX[i % len(REQUEST_MIX)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                ok = http.get(base_url + path, timeout=30).status_code < 500
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(latencies), errors[0], sorted(latencies)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=32, help='Concurrent clients (default: 32)')
+    parser.add_argument('--duration', type=float, default=15, help='Seconds per profile (default: 15)')
+    parser.add_argument('--upstream-delay', type=float, default=0.25,
+                        help='Seconds the fake Discord API takes per call (default: 0.25)')
+    parser.add_argument('--database-url', default=None, help='Database to use (default: temporary SQLite file)')
+    args = parser.parse_args()
+
+    scratch_dir = tempfile.mkdtemp(prefix='dashboard-load-')
+    discord = start_fake_discord(args.upstream_delay)
+    env = dict(
+        os.environ,
+        DATABASE_URL=args.database_url or f"sqlite:///{os.path.join(scratch_dir, 'load.db')}",
+        DISCORD_API_BASE=f"http://127.0.0.1:{discord.server_address[1]}",
+        FLASK_ENV='development',
+    )
+    env.pop('DISCORD_CLIENT_ID', None)  # Enables /dev-login
+
+    print(f"{args.clients} clients, {args.duration:.0f}s per profile, Discord API delay {args.upstream_delay * 1000:.0f}ms")
+    print(f"{'profile':<18} {'req/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'errors':>7}")
+    for name, options in PROFILES.items():
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', *options, '--bind', f"127.0.0.1:{port}", 'web_app:create_app()'],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            wait_until_up(base_url)
+            completed, errors, latencies = run_clients(base_url, args.clients, args.duration)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+        p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0
+        p95 = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0
+        print(f"{name:<18} {completed / args.duration:>8.1f} {p50:>9.1f} {p95:>9.1f} {errors:>7}")
+
+    discord.shutdown()
+    import shutil
+    shutil.rmtree(scratch_dir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
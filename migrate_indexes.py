@@ -0,0 +1,55 @@
+"""
+Add missing database indexes to existing tables
+
+db.create_all() only creates tables that don't exist yet, so indexes added to
+models.py after a table was created are never built. This script creates every
+index declared on the models that the database is missing. It is safe to run
+repeatedly.
+"""
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+def migrate_indexes():
+    """Create any model indexes missing from the database"""
+    try:
+        from models import db
+        from flask import Flask
+        from sqlalchemy import inspect
+
+        app = Flask(__name__)
+        app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+            "pool_recycle": 300,
+            "pool_pre_ping": True,
+        }
+        app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+
+        db.init_app(app)
+
+        with app.app_context():
+            # New tables get their indexes from create_all
+            db.create_all()
+
+            inspector = inspect(db.engine)
+            created = 0
+            for table in db.metadata.sorted_tables:
+                existing = {index['name'] for index in inspector.get_indexes(table.name)}
+                for index in table.indexes:
+                    if index.name in existing:
+                        continue
+                    print(f"Creating index {index.name} on {table.name}...")
+                    index.create(db.engine)
+                    created += 1
+
+            print(f"Index migration complete ({created} created)")
+
+    except Exception as e:
+        print(f"Error migrating indexes: {e}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == '__main__':
+    migrate_indexes()
@@ -3,11 +3,59 @@ Database models for Discord bot statistics tracking
 """
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import func
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 import json
+import math
 
 db = SQLAlchemy()
 
+# Bucket width in seconds of each Minecraft history rollup resolution
+ROLLUP_RESOLUTIONS = {
+    'minute': 60,
+    'hour': 3600,
+    'day': 86400
+}
+
+# How long raw probes and each rollup resolution are kept (None = forever)
+ROLLUP_RETENTION = {
+    'raw': timedelta(days=3),
+    'minute': timedelta(days=7),
+    'hour': timedelta(days=90),
+    'day': None
+}
+
+# BotStats counter bumped on every stats write so dashboard caches know their data is stale
+CACHE_GENERATION_STAT = 'stats_generation'
+
+def _as_utc(value: datetime) -> datetime:
+    """Treat naive datetimes read back from the database as UTC"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def _floor_time(value: datetime, width: int) -> datetime:
+    """Floor a datetime to the start of its bucket"""
+    epoch = int(_as_utc(value).timestamp())
+    return datetime.fromtimestamp(epoch - epoch % width, tz=timezone.utc)
+
+def _percentile(sorted_values: list, percent: float) -> int:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(percent / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+def _upsert_insert():
+    """Get the dialect's INSERT construct supporting ON CONFLICT, or None if unsupported"""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
 class BotStats(db.Model):
     """General bot statistics"""
     __tablename__ = 'bot_stats'
@@ -17,22 +65,50 @@ class BotStats(db.Model):
     stat_value = db.Column(db.BigInteger, default=0, nullable=False)
     last_updated = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
     
+    @staticmethod
+    def increment_many(increments: dict, commit: bool = True):
+        """
+        Increment several statistics in a single statement
+        
+        Uses INSERT ... ON CONFLICT DO UPDATE SET stat_value = stat_value + excluded.stat_value
+        so concurrent writers never lose updates.
+        """
+        now = datetime.now(timezone.utc)
+        rows = [
+            {'stat_name': stat_name, 'stat_value': increment, 'last_updated': now}
+            for stat_name, increment in sorted(increments.items()) if increment
+        ]
+        if not rows:
+            return
+        
+        insert = _upsert_insert()
+        if insert is not None:
+            stmt = insert(BotStats).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[BotStats.stat_name],
+                set_={
+                    'stat_value': BotStats.stat_value + stmt.excluded.stat_value,
+                    'last_updated': stmt.excluded.last_updated
+                }
+            )
+            db.session.execute(stmt)
+        else:
+            # Fallback for databases without ON CONFLICT support
+            for row in rows:
+                updated = BotStats.query.filter_by(stat_name=row['stat_name']).update({
+                    BotStats.stat_value: BotStats.stat_value + row['stat_value'],
+                    BotStats.last_updated: now
+                }, synchronize_session=False)
+                if not updated:
+                    db.session.add(BotStats(**row))
+        
+        if commit:
+            db.session.commit()
+    
     @staticmethod
     def increment_stat(stat_name: str, increment: int = 1):
         """Increment a statistic by a given amount"""
-        stat = BotStats.query.filter_by(stat_name=stat_name).first()
-        if stat:
-            stat.stat_value += increment
-            stat.last_updated = datetime.now(timezone.utc)
-        else:
-            stat = BotStats(
-                stat_name=stat_name,
-                stat_value=increment,
-                last_updated=datetime.now(timezone.utc)
-            )
-            db.session.add(stat)
-        db.session.commit()
-        return stat
+        BotStats.increment_many({stat_name: increment})
     
     @staticmethod
     def get_stat(stat_name: str, default: int = 0):
@@ -40,22 +116,47 @@ class BotStats(db.Model):
         stat = BotStats.query.filter_by(stat_name=stat_name).first()
         return stat.stat_value if stat else default
     
+    @staticmethod
+    def get_many(stat_names, default: int = 0) -> dict:
+        """
+        Get several statistic values in one query
+        
+        Args:
+            stat_names: Names of the statistics to read
+            default: Value reported for statistics that don't exist yet
+        
+        Returns:
+            dict: stat_name -> value for every requested name
+        """
+        stat_names = list(stat_names)
+        values = dict.fromkeys(stat_names, default)
+        if stat_names:
+            rows = db.session.query(BotStats.stat_name, BotStats.stat_value).filter(
+                BotStats.stat_name.in_(stat_names)
+            )
+            values.update(rows)
+        return values
+    
     @staticmethod
     def set_stat(stat_name: str, value: int):
         """Set a statistic to a specific value"""
-        stat = BotStats.query.filter_by(stat_name=stat_name).first()
-        if stat:
-            stat.stat_value = value
-            stat.last_updated = datetime.now(timezone.utc)
-        else:
-            stat = BotStats(
-                stat_name=stat_name,
-                stat_value=value,
-                last_updated=datetime.now(timezone.utc)
+        now = datetime.now(timezone.utc)
+        insert = _upsert_insert()
+        if insert is not None:
+            stmt = insert(BotStats).values(stat_name=stat_name, stat_value=value, last_updated=now)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[BotStats.stat_name],
+                set_={'stat_value': stmt.excluded.stat_value, 'last_updated': stmt.excluded.last_updated}
             )
-            db.session.add(stat)
+            db.session.execute(stmt)
+        else:
+            updated = BotStats.query.filter_by(stat_name=stat_name).update({
+                BotStats.stat_value: value,
+                BotStats.last_updated: now
+            }, synchronize_session=False)
+            if not updated:
+                db.session.add(BotStats(stat_name=stat_name, stat_value=value, last_updated=now))
         db.session.commit()
-        return stat
 
 class MinecraftServerStats(db.Model):
     """Minecraft server monitoring statistics"""
@@ -77,6 +178,11 @@ class MinecraftServerStats(db.Model):
     # Players list (JSON stored as text)
     players_list = db.Column(db.Text)  # JSON array of player names
     
+    __table_args__ = (
+        db.Index('ix_minecraft_server_stats_server_timestamp', 'server_ip', 'server_port', 'timestamp'),
+        db.Index('ix_minecraft_server_stats_timestamp', 'timestamp'),
+    )
+    
     def __repr__(self):
         return f'<MinecraftServerStats {self.server_ip}:{self.server_port} - {self.player_count}/{self.max_players}>'
     
@@ -95,6 +201,253 @@ class MinecraftServerStats(db.Model):
         """Set players list from Python list"""
         self.players_list = json.dumps(player_list) if player_list else None
 
+    @staticmethod
+    def summary_since(start):
+        """
+        Totals of the raw samples taken since `start`, in the shape of the rollup columns
+
+        Returns:
+            tuple: (sample_count, online_count, sum_response_ms, response_count, max_players, servers)
+        """
+        responded = db.and_(MinecraftServerStats.is_online, MinecraftServerStats.response_time_ms > 0)
+        totals = db.session.query(
+            func.count(MinecraftServerStats.id),
+            func.sum(db.case((MinecraftServerStats.is_online, 1), else_=0)),
+            func.sum(db.case((responded, MinecraftServerStats.response_time_ms), else_=0)),
+            func.sum(db.case((responded, 1), else_=0)),
+            func.max(MinecraftServerStats.player_count)
+        ).filter(MinecraftServerStats.timestamp >= start).one()
+        servers = set(
+            f"{server_ip}:{server_port}"
+            for server_ip, server_port in db.session.query(
+                MinecraftServerStats.server_ip,
+                MinecraftServerStats.server_port
+            ).filter(MinecraftServerStats.timestamp >= start).distinct()
+        )
+        return (*(int(value or 0) for value in totals), servers)
+
+class MinecraftServerRollup(db.Model):
+    """Time-bucketed aggregates of Minecraft server monitoring statistics"""
+    __tablename__ = 'minecraft_server_rollups'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    server_ip = db.Column(db.String(255), nullable=False)
+    server_port = db.Column(db.Integer, nullable=False)
+    resolution = db.Column(db.String(10), nullable=False)  # 'minute', 'hour' or 'day'
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    
+    # Sample counts
+    sample_count = db.Column(db.Integer, default=0, nullable=False)
+    online_count = db.Column(db.Integer, default=0, nullable=False)
+    
+    # Player counts
+    min_players = db.Column(db.Integer, default=0, nullable=False)
+    max_players = db.Column(db.Integer, default=0, nullable=False)
+    sum_players = db.Column(db.BigInteger, default=0, nullable=False)
+    max_capacity = db.Column(db.Integer, default=0, nullable=False)
+    
+    # Response metrics (online probes only)
+    response_count = db.Column(db.Integer, default=0, nullable=False)
+    sum_response_ms = db.Column(db.BigInteger, default=0, nullable=False)
+    p50_response_ms = db.Column(db.Integer, default=0, nullable=False)
+    p95_response_ms = db.Column(db.Integer, default=0, nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('server_ip', 'server_port', 'resolution', 'bucket_start',
+                            name='uq_minecraft_server_rollups_bucket'),
+        db.Index('ix_minecraft_server_rollups_resolution_bucket', 'resolution', 'bucket_start'),
+    )
+    
+    def __repr__(self):
+        return f'<MinecraftServerRollup {self.server_ip}:{self.server_port} {self.resolution} {self.bucket_start}>'
+    
+    @property
+    def avg_players(self):
+        return self.sum_players / self.sample_count if self.sample_count else 0
+    
+    @property
+    def uptime_ratio(self):
+        return self.online_count / self.sample_count if self.sample_count else 0
+    
+    @property
+    def avg_response_ms(self):
+        return self.sum_response_ms / self.response_count if self.response_count else 0
+    
+    @staticmethod
+    def build(resolution: str, start: datetime, end: datetime) -> int:
+        """
+        (Re)build the rollup buckets of one resolution covering [start, end) from raw probes
+        
+        Returns:
+            int: Number of buckets written
+        """
+        width = ROLLUP_RESOLUTIONS[resolution]
+        rows = db.session.query(
+            MinecraftServerStats.server_ip,
+            MinecraftServerStats.server_port,
+            MinecraftServerStats.timestamp,
+            MinecraftServerStats.is_online,
+            MinecraftServerStats.player_count,
+            MinecraftServerStats.max_players,
+            MinecraftServerStats.response_time_ms
+        ).filter(
+            MinecraftServerStats.timestamp >= start,
+            MinecraftServerStats.timestamp < end
+        ).yield_per(5000)
+        
+        buckets = {}
+        for row in rows:
+            key = (row.server_ip, row.server_port, _floor_time(row.timestamp, width))
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = {
+                    'samples': 0, 'online': 0, 'min': None, 'max': 0, 'sum': 0, 'capacity': 0, 'responses': []
+                }
+            players = row.player_count or 0
+            bucket['samples'] += 1
+            bucket['sum'] += players
+            bucket['max'] = max(bucket['max'], players)
+            bucket['min'] = players if bucket['min'] is None else min(bucket['min'], players)
+            bucket['capacity'] = max(bucket['capacity'], row.max_players or 0)
+            if row.is_online:
+                bucket['online'] += 1
+                if row.response_time_ms:
+                    bucket['responses'].append(row.response_time_ms)
+        
+        # Replace any buckets already written for this range so rebuilding is idempotent
+        MinecraftServerRollup.query.filter(
+            MinecraftServerRollup.resolution == resolution,
+            MinecraftServerRollup.bucket_start >= start,
+            MinecraftServerRollup.bucket_start < end
+        ).delete(synchronize_session=False)
+        
+        rollups = []
+        for (server_ip, server_port, bucket_start), bucket in buckets.items():
+            responses = sorted(bucket['responses'])
+            rollups.append({
+                'server_ip': server_ip,
+                'server_port': server_port,
+                'resolution': resolution,
+                'bucket_start': bucket_start,
+                'sample_count': bucket['samples'],
+                'online_count': bucket['online'],
+                'min_players': bucket['min'] or 0,
+                'max_players': bucket['max'],
+                'sum_players': bucket['sum'],
+                'max_capacity': bucket['capacity'],
+                'response_count': len(responses),
+                'sum_response_ms': sum(responses),
+                'p50_response_ms': _percentile(responses, 50),
+                'p95_response_ms': _percentile(responses, 95)
+            })
+        if rollups:
+            db.session.execute(MinecraftServerRollup.__table__.insert(), rollups)
+        db.session.commit()
+        return len(rollups)
+    
+    @staticmethod
+    def run_pending(now: datetime = None, lag_seconds: int = 60) -> dict:
+        """
+        Build every completed bucket that hasn't been rolled up yet
+        
+        Buckets are only built once they ended at least `lag_seconds` ago so
+        buffered probe writes have landed.
+        
+        Returns:
+            dict: resolution -> number of buckets written
+        """
+        now = now or datetime.now(timezone.utc)
+        raw_horizon = now - ROLLUP_RETENTION['raw']
+        written = {}
+        
+        for resolution, width in ROLLUP_RESOLUTIONS.items():
+            end = _floor_time(now - timedelta(seconds=lag_seconds), width)
+            
+            # Resume from where the previous run stopped
+            watermark_name = f'rollup_watermark_{resolution}'
+            watermark = BotStats.get_stat(watermark_name, 0)
+            if watermark:
+                start = datetime.fromtimestamp(watermark, tz=timezone.utc)
+            else:
+                first_probe = db.session.query(func.min(MinecraftServerStats.timestamp)).scalar()
+                if not first_probe:
+                    continue
+                start = _floor_time(first_probe, width)
+            
+            # Raw rows older than the retention window are gone, don't scan for them
+            start = max(start, _floor_time(raw_horizon, width))
+            if start >= end:
+                continue
+            
+            written[resolution] = MinecraftServerRollup.build(resolution, start, end)
+            BotStats.set_stat(watermark_name, int(end.timestamp()))
+        
+        return written
+    
+    @staticmethod
+    def purge_expired(now: datetime = None) -> dict:
+        """
+        Delete raw probes and rollups older than their retention policy
+        
+        Returns:
+            dict: 'raw' / resolution -> number of rows deleted
+        """
+        now = now or datetime.now(timezone.utc)
+        deleted = {}
+        
+        raw_cutoff = now - ROLLUP_RETENTION['raw']
+        # Never drop raw rows that the coarsest rollup still has to be built from
+        day_built = db.session.query(func.max(MinecraftServerRollup.bucket_start)).filter(
+            MinecraftServerRollup.resolution == 'day'
+        ).scalar()
+        if day_built:
+            raw_cutoff = min(raw_cutoff, _as_utc(day_built) + timedelta(seconds=ROLLUP_RESOLUTIONS['day']))
+            deleted['raw'] = MinecraftServerStats.query.filter(
+                MinecraftServerStats.timestamp < raw_cutoff
+            ).delete(synchronize_session=False)
+        
+        for resolution in ROLLUP_RESOLUTIONS:
+            retention = ROLLUP_RETENTION.get(resolution)
+            if retention is None:
+                continue
+            deleted[resolution] = MinecraftServerRollup.query.filter(
+                MinecraftServerRollup.resolution == resolution,
+                MinecraftServerRollup.bucket_start < now - retention
+            ).delete(synchronize_session=False)
+        
+        db.session.commit()
+        return deleted
+
+class MinecraftCounter(db.Model):
+    """Registered Minecraft counter channels"""
+    __tablename__ = 'minecraft_counters'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    channel_id = db.Column(db.BigInteger, unique=True, nullable=False)
+    guild_id = db.Column(db.BigInteger, nullable=False, index=True)
+    server_ip = db.Column(db.String(255), nullable=False)
+    server_port = db.Column(db.Integer, nullable=False)
+    channel_type = db.Column(db.String(20), default='combined', nullable=False)
+    channel_name_template = db.Column(db.String(100), nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_minecraft_counters_server', 'server_ip', 'server_port'),
+    )
+    
+    def __repr__(self):
+        return f'<MinecraftCounter {self.channel_id} -> {self.server_ip}:{self.server_port}>'
+    
+    def to_server_info(self):
+        """Get the counter in the format used by bot.minecraft_counters"""
+        return {
+            'server_ip': self.server_ip,
+            'server_port': self.server_port,
+            'channel_type': self.channel_type,
+            'channel_name_template': self.channel_name_template,
+            'guild_id': self.guild_id
+        }
+
 class CommandUsage(db.Model):
     """Track Discord command usage"""
     __tablename__ = 'command_usage'
@@ -106,9 +459,132 @@ class CommandUsage(db.Model):
     timestamp = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
     success = db.Column(db.Boolean, default=True, nullable=False)
     
+    __table_args__ = (
+        db.Index('ix_command_usage_command_timestamp', 'command_name', 'timestamp'),
+        db.Index('ix_command_usage_guild_timestamp', 'guild_id', 'timestamp'),
+    )
+    
     def __repr__(self):
         return f'<CommandUsage {self.command_name} by {self.user_id}>'
 
+class CommandUsageDaily(db.Model):
+    """Per-day, per-command, per-guild command usage counts"""
+    __tablename__ = 'command_usage_daily'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    command_name = db.Column(db.String(100), nullable=False)
+    guild_id = db.Column(db.String(20), default='', nullable=False)  # '' for commands used outside a guild
+    use_count = db.Column(db.BigInteger, default=0, nullable=False)
+    success_count = db.Column(db.BigInteger, default=0, nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('day', 'command_name', 'guild_id', name='uq_command_usage_daily_bucket'),
+        db.Index('ix_command_usage_daily_day_command', 'day', 'command_name'),
+        db.Index('ix_command_usage_daily_guild_day', 'guild_id', 'day'),
+    )
+    
+    def __repr__(self):
+        return f'<CommandUsageDaily {self.day} {self.command_name} x{self.use_count}>'
+    
+    @staticmethod
+    def increment_many(counts: dict, commit: bool = True):
+        """
+        Add command usage to the daily aggregates in a single statement
+        
+        Args:
+            counts: (day, command_name, guild_id) -> (uses, successes)
+            commit: Whether to commit the session afterwards
+        """
+        rows = [
+            {
+                'day': day,
+                'command_name': command_name,
+                'guild_id': guild_id or '',
+                'use_count': uses,
+                'success_count': successes
+            }
+            for (day, command_name, guild_id), (uses, successes) in sorted(counts.items()) if uses
+        ]
+        if not rows:
+            return
+        
+        insert = _upsert_insert()
+        if insert is not None:
+            stmt = insert(CommandUsageDaily).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[CommandUsageDaily.day, CommandUsageDaily.command_name, CommandUsageDaily.guild_id],
+                set_={
+                    'use_count': CommandUsageDaily.use_count + stmt.excluded.use_count,
+                    'success_count': CommandUsageDaily.success_count + stmt.excluded.success_count
+                }
+            )
+            db.session.execute(stmt)
+        else:
+            # Fallback for databases without ON CONFLICT support
+            for row in rows:
+                updated = CommandUsageDaily.query.filter_by(
+                    day=row['day'], command_name=row['command_name'], guild_id=row['guild_id']
+                ).update({
+                    CommandUsageDaily.use_count: CommandUsageDaily.use_count + row['use_count'],
+                    CommandUsageDaily.success_count: CommandUsageDaily.success_count + row['success_count']
+                }, synchronize_session=False)
+                if not updated:
+                    db.session.add(CommandUsageDaily(**row))
+        
+        if commit:
+            db.session.commit()
+    
+    @staticmethod
+    def backfill() -> int:
+        """
+        Rebuild the daily aggregates from the raw CommandUsage history
+        
+        Returns:
+            int: Number of daily rows written
+        """
+        day = func.date(CommandUsage.timestamp)
+        rows = db.session.query(
+            day.label('day'),
+            CommandUsage.command_name,
+            CommandUsage.guild_id,
+            func.count(CommandUsage.id).label('uses'),
+            func.sum(db.case((CommandUsage.success == True, 1), else_=0)).label('successes')
+        ).group_by(day, CommandUsage.command_name, CommandUsage.guild_id).all()
+        
+        counts = {}
+        for row in rows:
+            row_day = row.day
+            if isinstance(row_day, str):
+                row_day = datetime.strptime(row_day, '%Y-%m-%d').date()
+            key = (row_day, row.command_name, row.guild_id or '')
+            uses, successes = counts.get(key, (0, 0))
+            counts[key] = (uses + row.uses, successes + int(row.successes or 0))
+        
+        CommandUsageDaily.query.delete(synchronize_session=False)
+        CommandUsageDaily.increment_many(counts, commit=False)
+        db.session.commit()
+        return len(counts)
+    
+    @staticmethod
+    def breakdown(since_day=None, guild_id: str = None) -> dict:
+        """
+        Command name -> use count, optionally from a day onwards and for one guild
+        
+        Args:
+            since_day: First day (UTC date) to include (default: all history)
+            guild_id: Only count commands used in this guild
+        """
+        query = db.session.query(
+            CommandUsageDaily.command_name,
+            func.sum(CommandUsageDaily.use_count)
+        )
+        if since_day is not None:
+            query = query.filter(CommandUsageDaily.day >= since_day)
+        if guild_id is not None:
+            query = query.filter(CommandUsageDaily.guild_id == str(guild_id))
+        return {command_name: int(count) for command_name, count in query.group_by(CommandUsageDaily.command_name)}
+
 class BotUptime(db.Model):
     """Track bot uptime sessions"""
     __tablename__ = 'bot_uptime'
@@ -118,6 +594,13 @@ class BotUptime(db.Model):
     session_end = db.Column(db.DateTime)
     uptime_seconds = db.Column(db.Integer, default=0)
     
+    __table_args__ = (
+        # Only the open session has no end; keep the lookup for it tiny
+        db.Index('ix_bot_uptime_open_session', 'session_end',
+                 postgresql_where=db.text('session_end IS NULL'),
+                 sqlite_where=db.text('session_end IS NULL')),
+    )
+    
     def end_session(self):
         """Mark session as ended and calculate uptime"""
         self.session_end = datetime.now(timezone.utc)
@@ -134,4 +617,22 @@ class BotUptime(db.Model):
     @staticmethod
     def get_current_session():
         """Get the current active session (session_end is None)"""
-        return BotUptime.query.filter_by(session_end=None).first()
\ No newline at end of file
+        return BotUptime.query.filter_by(session_end=None).first()
+    
+    @staticmethod
+    def get_summary() -> dict:
+        """
+        Get total uptime and the current session's start in one query
+        
+        Returns:
+            dict: total_seconds across all sessions and current_session_start
+                (timezone-aware, None when no session is open)
+        """
+        total_seconds, current_session_start = db.session.query(
+            func.sum(BotUptime.uptime_seconds),
+            func.max(db.case((BotUptime.session_end.is_(None), BotUptime.session_start)))
+        ).one()
+        return {
+            'total_seconds': int(total_seconds or 0),
+            'current_session_start': _as_utc(current_session_start) if current_session_start else None
+        }
\ No newline at end of file
@@ -12,7 +12,7 @@ load_dotenv()
 def populate_sample_data():
     """Create sample statistics for demonstration"""
     try:
-        from models import db, BotStats, MinecraftServerStats, CommandUsage, BotUptime
+        from models import db, BotStats, MinecraftServerStats, MinecraftServerRollup, CommandUsage, CommandUsageDaily, BotUptime
         from flask import Flask
         
         app = Flask(__name__)
@@ -31,6 +31,7 @@ def populate_sample_data():
             # Clear existing data for fresh start
             db.session.query(BotStats).delete()
             db.session.query(MinecraftServerStats).delete()
+            db.session.query(MinecraftServerRollup).delete()
             db.session.query(CommandUsage).delete()
             db.session.query(BotUptime).delete()
             db.session.commit()
@@ -154,6 +155,10 @@ def populate_sample_data():
             
             # Commit all data
             db.session.commit()
+            
+            # Build the history rollups and command aggregates the dashboard reads from
+            MinecraftServerRollup.run_pending(lag_seconds=0)
+            CommandUsageDaily.backfill()
             print("Sample data populated successfully!")
             print("Dashboard should now show realistic statistics.")
             
@@ -4,7 +4,7 @@ Simplified version that avoids SQLAlchemy compatibility issues
 """
 import os
 import json
-import requests
+from discord_rest import discord_api
 from datetime import datetime
 from dotenv import load_dotenv
 from flask import Flask, render_template, request, redirect, url_for, session, jsonify
@@ -152,17 +152,10 @@ def create_app():
         
         # Exchange code for token
         try:
-            token_data = {
-                'client_id': DISCORD_CLIENT_ID,
-                'client_secret': DISCORD_CLIENT_SECRET,
-                'grant_type': 'authorization_code',
-                'code': code,
-                'redirect_uri': request.url_root.rstrip('/') + '/api/auth/callback'
-            }
-            
-            token_response = requests.post('https://discord.com/api/oauth2/token', 
-                                         data=token_data, 
-                                         headers={'Content-Type': 'application/x-www-form-urlencoded'})
+            token_response = discord_api.exchange_code(
+                DISCORD_CLIENT_ID, DISCORD_CLIENT_SECRET, code,
+                request.url_root.rstrip('/') + '/api/auth/callback'
+            )
             
             if token_response.status_code != 200:
                 return f"Token exchange failed: {token_response.text}"
@@ -171,8 +164,7 @@ def create_app():
             access_token = token_json['access_token']
             
             # Get user info
-            user_response = requests.get('https://discord.com/api/users/@me',
-                                       headers={'Authorization': f'Bearer {access_token}'})
+            user_response = discord_api.get_current_user(access_token)
             
             if user_response.status_code != 200:
                 return f"User info failed: {user_response.text}"
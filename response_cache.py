@@ -0,0 +1,170 @@
+"""
+In-process response cache for the dashboard's expensive API endpoints
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class _CacheEntry:
+    __slots__ = ('value', 'generation', 'fresh_until', 'stale_until')
+
+    def __init__(self, value, generation, fresh_until, stale_until):
+        self.value = value
+        self.generation = generation
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+
+class ResponseCache:
+    """
+    TTL cache with stale-while-revalidate and generation-based invalidation
+
+    Fresh entries are served as-is. Once an entry is past its TTL, or the data
+    generation reported by `generation_source` has moved on, it is still served
+    while a single background refresh recomputes it, until `stale_ttl` runs out.
+    Concurrent misses for the same key wait for one computation instead of each
+    running their own.
+    """
+
+    def __init__(self, app=None, ttl: float = 10.0, stale_ttl: float = 60.0,
+                 generation_source=None, generation_check_interval: float = 1.0,
+                 max_entries: int = None):
+        self.app = app
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.generation_source = generation_source  # Callable returning the current data generation
+        self.generation_check_interval = generation_check_interval
+        self.max_entries = max_entries  # Oldest entries are evicted past this many (None = unbounded)
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}  # key -> [lock, callers holding or waiting for it]
+        self._refreshing = set()
+        self._generation = None
+        self._generation_checked = 0.0
+
+    def current_generation(self, now: float = None, force: bool = False):
+        """Poll the generation source at most once per check interval (every call when forced)"""
+        if self.generation_source is None:
+            return None
+        now = time.time() if now is None else now
+        if force or now - self._generation_checked >= self.generation_check_interval:
+            self._generation_checked = now
+            try:
+                self._generation = self.generation_source()
+            except Exception as e:
+                logger.warning(f"Could not read cache generation: {e}")
+        return self._generation
+
+    @contextmanager
+    def _key_lock(self, key):
+        """Per-key lock that only exists while someone holds or waits for it"""
+        with self._lock:
+            slot = self._key_locks.get(key)
+            if slot is None:
+                slot = self._key_locks[key] = [threading.Lock(), 0]
+            slot[1] += 1
+        try:
+            with slot[0]:
+                yield
+        finally:
+            with self._lock:
+                slot[1] -= 1
+                if slot[1] == 0:
+                    del self._key_locks[key]
+
+    def _store(self, key, value, generation):
+        now = time.time()
+        with self._lock:
+            self._entries[key] = _CacheEntry(value, generation, now + self.ttl, now + self.ttl + self.stale_ttl)
+            self._entries.move_to_end(key)
+            # Entries are ordered by store time, so the expired ones are at the front
+            while self._entries and next(iter(self._entries.values())).stale_until <= now:
+                self._entries.popitem(last=False)
+            if self.max_entries is not None:
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+    def set(self, key, value):
+        """Store a value computed elsewhere, e.g. data that came with a login"""
+        self._store(key, value, self.current_generation())
+
+    def get_or_compute(self, key, compute, allow_stale: bool = True):
+        """
+        Get a cached value, computing it on a miss
+
+        Args:
+            key: Hashable cache key (endpoint and parameters)
+            compute: Zero-argument callable producing the value
+            allow_stale: Serve a stale entry while it refreshes in the background;
+                when False a stale entry is recomputed before returning
+
+        Returns:
+            The cached or freshly computed value
+        """
+        now = time.time()
+        generation = self.current_generation(now)
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            if now < entry.fresh_until and entry.generation == generation:
+                return entry.value
+            if allow_stale and now < entry.stale_until:
+                self._refresh_in_background(key, compute, generation)
+                return entry.value
+
+        # Miss: only one caller computes, the others wait for its result
+        with self._key_lock(key):
+            entry = self._entries.get(key)
+            if entry is not None and time.time() < entry.fresh_until and entry.generation == generation:
+                return entry.value
+            value = compute()
+            self._store(key, value, generation)
+            return value
+
+    def _refresh_in_background(self, key, compute, generation):
+        """Recompute a stale entry on a worker thread, once per key at a time"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                if self.app is not None:
+                    with self.app.app_context():
+                        value = compute()
+                else:
+                    value = compute()
+                self._store(key, value, generation)
+            except Exception as e:
+                logger.error(f"Background refresh of {key} failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name="response-cache-refresh", daemon=True).start()
+
+    def invalidate(self, prefix=None, key=None):
+        """
+        Drop cached entries
+
+        Args:
+            prefix: Only drop tuple keys whose first element equals this
+            key: Only drop this exact key
+
+        With neither argument every entry is dropped.
+        """
+        with self._lock:
+            if key is not None:
+                self._entries.pop(key, None)
+            elif prefix is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if isinstance(key, tuple) and key and key[0] == prefix]:
+                    del self._entries[key]
@@ -0,0 +1,252 @@
+"""
+Optional server-side Flask session storage
+
+With a server-side backend the session cookie carries only an opaque random
+session ID; the data lives in process memory or in a database table. Enable it
+with SESSION_BACKEND=memory (single node) or SESSION_BACKEND=sql (SQLite or
+Postgres, shared by every worker). The default, "cookie", keeps Flask's signed
+cookie sessions.
+"""
+import logging
+import os
+import secrets
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask.sessions import SessionInterface, SessionMixin, session_json_serializer
+from werkzeug.datastructures import CallbackDict
+
+logger = logging.getLogger(__name__)
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Session dict that remembers its ID and whether it was changed"""
+
+    def __init__(self, initial=None, sid=None, new=False, expires_at=0.0):
+        def on_update(session):
+            session.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.expires_at = expires_at
+        self.modified = False
+        self.regenerate = False
+        self.identity = None  # Logged-in user when the session was loaded, see ServerSideSessionInterface
+
+    def clear(self):
+        # Logins and logouts clear the session; a fresh ID keeps the old one from being reused
+        super().clear()
+        self.regenerate = True
+
+
+class MemorySessionStore:
+    """In-process store; sessions are lost on restart and not shared between workers"""
+
+    def __init__(self):
+        self._sessions = {}  # sid -> (expires_at, serialized data)
+        self._lock = threading.Lock()
+
+    def load(self, sid):
+        """Return (data, expires_at), or None if the session is missing or expired"""
+        entry = self._sessions.get(sid)
+        if entry is None or entry[0] <= time.time():
+            return None
+        return session_json_serializer.loads(entry[1]), entry[0]
+
+    def save(self, sid, data, expires_at):
+        with self._lock:
+            self._sessions[sid] = (expires_at, session_json_serializer.dumps(data))
+
+    def delete(self, sid):
+        with self._lock:
+            self._sessions.pop(sid, None)
+
+    def sweep(self) -> int:
+        """Delete expired sessions, returning how many were removed"""
+        now = time.time()
+        with self._lock:
+            expired = [sid for sid, (expires_at, _) in self._sessions.items() if expires_at <= now]
+            for sid in expired:
+                del self._sessions[sid]
+        return len(expired)
+
+
+class SQLSessionStore:
+    """Store backed by a `web_sessions` table in SQLite or Postgres"""
+
+    def __init__(self, database_url: str):
+        from sqlalchemy import create_engine, MetaData, Table, Column, String, Text, DateTime
+
+        self.engine = create_engine(database_url, pool_pre_ping=True, pool_recycle=300)
+        metadata = MetaData()
+        self.table = Table(
+            'web_sessions', metadata,
+            Column('sid', String(64), primary_key=True),
+            Column('data', Text, nullable=False),
+            Column('expires_at', DateTime, nullable=False, index=True)
+        )
+        metadata.create_all(self.engine, checkfirst=True)
+
+    @staticmethod
+    def _as_datetime(timestamp: float) -> datetime:
+        return datetime.fromtimestamp(timestamp, tz=timezone.utc).replace(tzinfo=None)
+
+    def load(self, sid):
+        """Return (data, expires_at), or None if the session is missing or expired"""
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                self.table.select().where(
+                    self.table.c.sid == sid,
+                    self.table.c.expires_at > self._as_datetime(time.time())
+                )
+            ).first()
+        if row is None:
+            return None
+        expires_at = row.expires_at.replace(tzinfo=timezone.utc).timestamp()
+        return session_json_serializer.loads(row.data), expires_at
+
+    def save(self, sid, data, expires_at):
+        values = {'data': session_json_serializer.dumps(data), 'expires_at': self._as_datetime(expires_at)}
+        with self.engine.begin() as conn:
+            updated = conn.execute(self.table.update().where(self.table.c.sid == sid).values(**values)).rowcount
+            if not updated:
+                conn.execute(self.table.insert().values(sid=sid, **values))
+
+    def delete(self, sid):
+        with self.engine.begin() as conn:
+            conn.execute(self.table.delete().where(self.table.c.sid == sid))
+
+    def sweep(self) -> int:
+        """Delete expired sessions, returning how many were removed"""
+        with self.engine.begin() as conn:
+            return conn.execute(
+                self.table.delete().where(self.table.c.expires_at <= self._as_datetime(time.time()))
+            ).rowcount
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """
+    Flask session interface keeping session data in a server-side store
+
+    A session's expiry is pushed out when it is modified, or when less than
+    half its lifetime is left, so unchanged sessions are not rewritten on every
+    request. Expired sessions are swept at most once per `sweep_interval`
+    seconds, piggybacking on requests. The session ID is replaced whenever a
+    value under one of `identity_keys` changes, so an ID handed out before a
+    login is not valid after it (session fixation).
+    """
+
+    def __init__(self, store, sweep_interval: float = 600.0, identity_keys=('user', 'user_id')):
+        self.store = store
+        self.sweep_interval = sweep_interval
+        self.identity_keys = identity_keys
+        self._last_sweep = time.time()
+        self._sweep_lock = threading.Lock()
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            try:
+                loaded = self.store.load(sid)
+            except Exception as e:
+                logger.error(f"Could not load session: {e}")
+                loaded = None
+            if loaded is not None:
+                data, expires_at = loaded
+                session = ServerSideSession(data, sid=sid, expires_at=expires_at)
+                session.identity = self._identity(session)
+                return session
+        return ServerSideSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def _identity(self, session):
+        return [session.get(key) for key in self.identity_keys]
+
+    def save_session(self, app, session, response):
+        self._maybe_sweep()
+
+        if not session.new and self._identity(session) != session.identity:
+            session.regenerate = True
+        if session.regenerate and not session.new:
+            self.store.delete(session.sid)
+            session.sid = secrets.token_urlsafe(32)
+            session.new = True
+
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            # Emptied (e.g. logout): drop the stored data and the cookie
+            if not session.new:
+                self.store.delete(session.sid)
+            if session.modified:
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        lifetime = app.permanent_session_lifetime.total_seconds()
+        now = time.time()
+        if not (session.modified or session.new or session.expires_at - now < lifetime / 2):
+            return
+
+        self.store.save(session.sid, dict(session), now + lifetime)
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app)
+        )
+
+    def _maybe_sweep(self):
+        if time.time() - self._last_sweep < self.sweep_interval:
+            return
+        if not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_sweep = time.time()
+            removed = self.store.sweep()
+            if removed:
+                logger.info(f"Swept {removed} expired sessions")
+        except Exception as e:
+            logger.error(f"Could not sweep expired sessions: {e}")
+        finally:
+            self._sweep_lock.release()
+
+
+def init_session_store(app, backend=None, database_url=None):
+    """
+    Switch an app to server-side sessions if configured
+
+    Args:
+        app: Flask app
+        backend: 'cookie', 'memory' or 'sql' (default: SESSION_BACKEND, else 'cookie')
+        database_url: Database for the 'sql' backend (default: SESSION_DATABASE_URL, else DATABASE_URL)
+
+    Returns:
+        str: The backend in use
+    """
+    backend = (backend or os.environ.get('SESSION_BACKEND') or 'cookie').lower()
+    if backend == 'memory':
+        store = MemorySessionStore()
+    elif backend == 'sql':
+        database_url = database_url or os.environ.get('SESSION_DATABASE_URL') or os.environ.get('DATABASE_URL')
+        if not database_url:
+            logger.warning("SESSION_BACKEND=sql needs SESSION_DATABASE_URL or DATABASE_URL, using cookie sessions")
+            return 'cookie'
+        try:
+            store = SQLSessionStore(database_url)
+        except Exception as e:
+            logger.error(f"Could not set up the SQL session store, using cookie sessions: {e}")
+            return 'cookie'
+    else:
+        return 'cookie'
+
+    app.session_interface = ServerSideSessionInterface(
+        store, sweep_interval=float(os.environ.get('SESSION_SWEEP_INTERVAL', 600))
+    )
+    return backend
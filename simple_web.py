@@ -3,7 +3,7 @@ Simple Discord Bot Dashboard - Health Check Version
 """
 import os
 from flask import Flask, render_template, jsonify, request, session, redirect
-import requests
+from discord_rest import discord_api
 
 def create_app():
     app = Flask(__name__)
@@ -119,25 +119,18 @@ def create_app():
         if not client_id or not client_secret:
             return "OAuth error: Discord credentials not configured"
         
-        # Token exchange
-        token_data = {
-            'client_id': client_id,
-            'client_secret': client_secret,
-            'grant_type': 'authorization_code',
-            'code': code,
-            'redirect_uri': 'https://magmacraft-bot.onrender.com/callback'
-        }
-        
         try:
-            token_response = requests.post('https://discord.com/api/oauth2/token', data=token_data)
+            # Token exchange
+            token_response = discord_api.exchange_code(
+                client_id, client_secret, code, 'https://magmacraft-bot.onrender.com/callback'
+            )
             token_json = token_response.json()
             
             if 'access_token' not in token_json:
                 return f"OAuth error: {token_json.get('error', 'Unknown error')}"
             
             # Get user info
-            headers = {'Authorization': f"Bearer {token_json['access_token']}"}
-            user_response = requests.get('https://discord.com/api/users/@me', headers=headers)
+            user_response = discord_api.get_current_user(token_json['access_token'])
             user_data = user_response.json()
             
             # Store in session (simple version)
@@ -17,7 +17,7 @@ class Dashboard {
         this.setupVolumeSlider();
         this.setupActivityTimeline();
         await this.loadData();
-        this.startAutoUpdate();
+        this.startLiveUpdates();
         this.loadModerationStats();
         this.loadMinecraftServers();
     }
@@ -181,7 +181,10 @@ class Dashboard {
 
         // Update charts
         this.updateCommandChart(data.command_breakdown);
-        this.updateMinecraftHistory();
+        if (!this.liveState) {
+            // The live stream delivers history itself
+            this.updateMinecraftHistory();
+        }
 
         // Update last updated timestamp
         const lastUpdated = new Date(data.last_updated);
@@ -269,12 +272,16 @@ class Dashboard {
             const server = serverData[serverKey];
             const color = colors[colorIndex % colors.length];
             
+            // Columnar payload: epoch start plus per-point deltas in seconds
+            let time = server.start;
+            const points = server.time_deltas.map((delta, index) => {
+                time += delta;
+                return { x: time * 1000, y: server.player_counts[index] };
+            });
+
             datasets.push({
                 label: `${serverKey} Players`,
-                data: server.timestamps.map((timestamp, index) => ({
-                    x: timestamp,
-                    y: server.player_counts[index]
-                })),
+                data: points,
                 borderColor: color,
                 backgroundColor: color + '20',
                 fill: false,
@@ -404,12 +411,65 @@ class Dashboard {
     }
 
     startAutoUpdate() {
-        setInterval(() => {
+        if (this.autoUpdateTimer) return;
+        this.autoUpdateTimer = setInterval(() => {
             if (this.currentTab === 'dashboard') {
                 this.loadData();
             }
         }, this.updateInterval);
     }
+
+    startLiveUpdates() {
+        // Server-Sent Events: one snapshot, then merge-patch deltas whenever the data changes
+        if (!window.EventSource) {
+            this.startAutoUpdate();
+            return;
+        }
+
+        this.liveSource = new EventSource('/api/stream');
+
+        this.liveSource.addEventListener('snapshot', (event) => {
+            this.liveState = JSON.parse(event.data);
+            this.updateUI(this.liveState.stats);
+            this.renderMinecraftChart(this.liveState.minecraft_history.data);
+        });
+
+        this.liveSource.addEventListener('delta', (event) => {
+            if (!this.liveState) return;
+            const patch = JSON.parse(event.data);
+            this.liveState = applyMergePatch(this.liveState, patch);
+            if (patch.stats) {
+                this.updateUI(this.liveState.stats);
+            }
+            if (patch.minecraft_history) {
+                this.renderMinecraftChart(this.liveState.minecraft_history.data);
+            }
+        });
+
+        this.liveSource.onerror = () => {
+            // EventSource reconnects by itself; fall back to polling only if it gave up
+            if (this.liveSource.readyState === EventSource.CLOSED) {
+                this.liveState = null;
+                this.startAutoUpdate();
+            }
+        };
+    }
+}
+
+// Apply a JSON merge patch (RFC 7386) as sent by /api/stream
+function applyMergePatch(target, patch) {
+    if (patch === null || typeof patch !== 'object' || Array.isArray(patch)) {
+        return patch;
+    }
+    const result = (target && typeof target === 'object' && !Array.isArray(target)) ? { ...target } : {};
+    for (const [key, value] of Object.entries(patch)) {
+        if (value === null) {
+            delete result[key];
+        } else {
+            result[key] = applyMergePatch(result[key], value);
+        }
+    }
+    return result;
 }
 
 // Tab Navigation
@@ -805,8 +865,9 @@ function refreshMinecraftData() {
 }
 
 function exportMinecraftData() {
-    console.log('Exporting Minecraft data...');
-    showNotification('Minecraft data exported successfully');
+    // The export streams straight into a download
+    window.location.href = '/api/logs/export?dataset=minecraft&format=csv';
+    showNotification('Minecraft data export started');
 }
 
 // Utility Functions
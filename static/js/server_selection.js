@@ -128,14 +128,21 @@ class ServerSelectionDashboard {
                 this.updateMusicStatus(statusData);
             }
 
-            // Load queue
+            await this.loadMusicQueue();
+        } catch (error) {
+            console.error('Error loading music data:', error);
+        }
+    }
+
+    async loadMusicQueue() {
+        try {
             const queueResponse = await fetch('/api/music/queue');
             if (queueResponse.ok) {
                 const queueData = await queueResponse.json();
                 this.updateMusicQueue(queueData);
             }
         } catch (error) {
-            console.error('Error loading music data:', error);
+            console.error('Error loading music queue:', error);
         }
     }
 
@@ -454,7 +461,8 @@ async function loadPlaylist(playlistId) {
             dashboard.showMessage('Playlist loaded', 'success');
             dashboard.loadMusicData();
         } else {
-            dashboard.showMessage('Error loading playlist', 'error');
+            const data = await response.json().catch(() => ({}));
+            dashboard.showMessage(data.error || 'Error loading playlist', 'error');
         }
     } catch (error) {
         console.error('Error loading playlist:', error);
@@ -665,22 +673,10 @@ async function saveTokens() {
     }
 }
 
-async function exportLogs() {
-    try {
-        const response = await fetch('/api/logs/export', {
-            method: 'POST'
-        });
-
-        if (response.ok) {
-            const data = await response.json();
-            dashboard.showMessage(data.message, 'success');
-        } else {
-            dashboard.showMessage('Error exporting logs', 'error');
-        }
-    } catch (error) {
-        console.error('Error exporting logs:', error);
-        dashboard.showMessage('Error exporting logs', 'error');
-    }
+function exportLogs() {
+    // The export streams straight into a download
+    window.location.href = '/api/logs/export?dataset=commands&format=csv&gzip=1';
+    dashboard.showMessage('Export started', 'success');
 }
 
 async function restartBot() {
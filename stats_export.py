@@ -0,0 +1,244 @@
+"""
+Streaming CSV / NDJSON export of the statistics history tables
+"""
+import csv
+import io
+import json
+import logging
+import os
+import zlib
+from datetime import datetime, timezone
+
+from sqlalchemy import exists, select
+
+from models import MinecraftServerStats, MinecraftCounter, CommandUsage, BotUptime
+
+logger = logging.getLogger(__name__)
+
+# Exportable datasets: name -> (table, time column used for the range filter)
+EXPORT_DATASETS = {
+    'minecraft': (MinecraftServerStats.__table__, 'timestamp'),
+    'commands': (CommandUsage.__table__, 'timestamp'),
+    'uptime': (BotUptime.__table__, 'session_start'),
+}
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = 5000
+
+# Encoded bytes gathered before a chunk is handed to the response
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+# Discord user IDs allowed to export every guild's data (comma-separated)
+EXPORT_ADMIN_IDS = {user_id.strip() for user_id in os.environ.get('DASHBOARD_ADMIN_IDS', '').split(',') if user_id.strip()}
+
+
+class ExportError(ValueError):
+    """Invalid export parameters"""
+
+
+class ExportPermissionError(Exception):
+    """The user may not export the requested guild's data"""
+
+
+def export_guild_scope(user_id, managed_guild_ids, guild_id=None):
+    """
+    Guilds a user's export is limited to
+
+    Args:
+        user_id: Discord ID of the logged-in user
+        managed_guild_ids: IDs of the guilds the user can manage
+        guild_id: Guild the export was requested for, if any
+
+    Returns:
+        list: Guild IDs to export, or None for everything (admins only)
+
+    Raises:
+        ExportPermissionError: If the user does not manage the requested guild, or any guild
+    """
+    managed = {str(managed_id) for managed_id in managed_guild_ids}
+    if str(user_id) in EXPORT_ADMIN_IDS:
+        return [str(guild_id)] if guild_id else None
+    if guild_id:
+        if str(guild_id) not in managed:
+            raise ExportPermissionError(f"You do not manage guild {guild_id}")
+        return [str(guild_id)]
+    if not managed:
+        raise ExportPermissionError("You do not manage any guilds")
+    return sorted(managed)
+
+
+def parse_export_time(value):
+    """
+    Parse an export range bound
+
+    Args:
+        value: ISO 8601 string, epoch seconds, or empty for an open bound
+
+    Returns:
+        Timezone-aware datetime, or None
+    """
+    if value in (None, ''):
+        return None
+    try:
+        if isinstance(value, (int, float)) or str(value).replace('.', '', 1).isdigit():
+            return datetime.fromtimestamp(float(value), tz=timezone.utc)
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except (TypeError, ValueError, OverflowError, OSError):
+        # Out-of-range epochs raise OverflowError or OSError from the platform's time functions
+        raise ExportError(f"Invalid time '{value}', use ISO 8601 or epoch seconds")
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def guild_condition(dataset, guild_ids):
+    """
+    WHERE clause limiting a dataset to some guilds
+
+    Command usage carries its guild; Minecraft history belongs to the guilds
+    with a counter for that server. Uptime is bot-wide (and already public
+    through /api/stats), so it is not limited.
+    """
+    if dataset == 'commands':
+        return CommandUsage.__table__.c.guild_id.in_([str(guild_id) for guild_id in guild_ids])
+    if dataset == 'minecraft':
+        stats = MinecraftServerStats.__table__
+        counters = MinecraftCounter.__table__
+        return exists().where(
+            counters.c.server_ip == stats.c.server_ip,
+            counters.c.server_port == stats.c.server_port,
+            counters.c.guild_id.in_([int(guild_id) for guild_id in guild_ids if str(guild_id).isdigit()])
+        )
+    return None
+
+
+def iter_rows(engine, dataset, since=None, until=None, batch_size=EXPORT_BATCH_SIZE, guild_ids=None):
+    """
+    Yield a dataset's rows in time order without loading them all
+
+    The query runs on a server-side cursor (stream_results) and rows are
+    fetched `batch_size` at a time, so memory use does not grow with the range.
+    `guild_ids` (None for all) limits the rows to those guilds.
+    """
+    table, time_column = EXPORT_DATASETS[dataset]
+    column = table.c[time_column]
+
+    query = select(table).order_by(column, table.c.id)
+    if since is not None:
+        query = query.where(column >= since)
+    if until is not None:
+        query = query.where(column < until)
+    if guild_ids is not None:
+        condition = guild_condition(dataset, guild_ids)
+        if condition is not None:
+            query = query.where(condition)
+
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(query)
+        for partition in result.mappings().partitions():
+            yield from partition
+
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def encode_csv(columns, rows):
+    """Encode rows as CSV with a header, in chunks of about EXPORT_CHUNK_SIZE bytes"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([_json_value(row[column]) for column in columns])
+        if buffer.tell() >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def encode_ndjson(columns, rows):
+    """Encode rows as newline-delimited JSON objects, in chunks of about EXPORT_CHUNK_SIZE bytes"""
+    parts = []
+    size = 0
+    for row in rows:
+        line = json.dumps({column: _json_value(row[column]) for column in columns}, separators=(',', ':')) + '\n'
+        parts.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_SIZE:
+            yield ''.join(parts).encode()
+            parts = []
+            size = 0
+    yield ''.join(parts).encode()
+
+
+def gzip_chunks(chunks):
+    """Gzip a stream of byte chunks on the fly"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def build_export(engine, dataset, fmt='csv', since=None, until=None, compress=False, guild_ids=None):
+    """
+    Prepare a streaming export
+
+    Args:
+        engine: SQLAlchemy engine to read from
+        dataset: One of EXPORT_DATASETS
+        fmt: One of EXPORT_FORMATS
+        since: Inclusive lower time bound (string, epoch or datetime)
+        until: Exclusive upper time bound (string, epoch or datetime)
+        compress: Gzip the output
+        guild_ids: Guilds to limit the export to (see export_guild_scope), or None for all
+
+    Returns:
+        tuple: (chunk generator, mimetype, download filename)
+
+    Raises:
+        ExportError: If a parameter is invalid
+    """
+    if dataset not in EXPORT_DATASETS:
+        raise ExportError(f"dataset must be one of {', '.join(EXPORT_DATASETS)}")
+    if fmt not in EXPORT_FORMATS:
+        raise ExportError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    if not isinstance(since, datetime):
+        since = parse_export_time(since)
+    if not isinstance(until, datetime):
+        until = parse_export_time(until)
+    if since and until and since >= until:
+        raise ExportError("'since' must be before 'until'")
+
+    table, _ = EXPORT_DATASETS[dataset]
+    columns = [column.name for column in table.columns]
+    encoder = encode_csv if fmt == 'csv' else encode_ndjson
+
+    def generate():
+        written = 0
+
+        def counted(rows):
+            nonlocal written
+            for row in rows:
+                written += 1
+                yield row
+
+        try:
+            yield from encoder(columns, counted(iter_rows(engine, dataset, since, until, guild_ids=guild_ids)))
+        finally:
+            logger.info(f"Exported {written} {dataset} rows as {fmt}")
+
+    chunks = generate()
+    mimetype = EXPORT_FORMATS[fmt]
+    filename = f"{dataset}-{datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')}.{fmt}"
+    if compress:
+        chunks = gzip_chunks(chunks)
+        mimetype = 'application/gzip'
+        filename += '.gz'
+    return chunks, mimetype, filename
@@ -0,0 +1,38 @@
+from downsample import lttb_indices
+
+
+def test_short_series_is_kept_whole():
+    assert lttb_indices([0, 1, 2], [5, 6, 7], 10) == [0, 1, 2]
+    assert lttb_indices([0, 1], [5, 6], 3) == [0, 1]
+    assert lttb_indices([], [], 3) == []
+
+
+def test_keeps_endpoints_and_threshold():
+    xs = list(range(1000))
+    ys = [x % 7 for x in xs]
+    indices = lttb_indices(xs, ys, 50)
+    assert len(indices) == 50
+    assert indices[0] == 0
+    assert indices[-1] == 999
+    assert indices == sorted(set(indices))
+
+
+def test_keeps_spikes():
+    xs = list(range(200))
+    ys = [0] * 200
+    ys[57] = 100
+    ys[143] = -100
+    indices = lttb_indices(xs, ys, 10)
+    assert 57 in indices
+    assert 143 in indices
+
+
+def test_none_is_treated_as_zero():
+    xs = list(range(20))
+    ys = [None] * 20
+    ys[10] = 5
+    assert 10 in lttb_indices(xs, ys, 5)
+
+
+def test_threshold_below_three_is_raised_to_three():
+    assert lttb_indices(list(range(10)), [0] * 10, 1) == [0, 1, 9]
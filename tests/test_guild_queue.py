@@ -0,0 +1,92 @@
+import pytest
+
+# Importing the bot package pulls in discord.py
+pytest.importorskip('discord')
+
+from bot.guild_queue import GuildQueue
+
+
+def entry(n):
+    return {'url': f'https://example.com/{n}', 'title': f'Track {n}', 'duration': n}
+
+
+def test_fifo_order():
+    queue = GuildQueue()
+    queue.append(entry(1))
+    queue.extend([entry(2), entry(3)])
+
+    assert len(queue) == 3
+    assert [track.title for track in queue.peek(2)] == ['Track 1', 'Track 2']
+    assert queue.popleft().title == 'Track 1'
+    assert [track.title for track in queue] == ['Track 2', 'Track 3']
+
+
+def test_popleft_on_empty_queue():
+    assert GuildQueue().popleft() is None
+
+
+def test_defaults_for_missing_metadata():
+    track = GuildQueue().append({'url': 'https://example.com/x', 'title': None})
+    assert track.title == 'Unknown Track'
+    assert track.duration == 0
+    assert track.requester_id is None
+
+
+def test_ids_are_unique_and_stable():
+    queue = GuildQueue()
+    tracks = queue.extend([entry(n) for n in range(5)])
+    assert len({track.id for track in tracks}) == 5
+
+    queue.popleft()
+    queue.shuffle()
+    removed = queue.remove(tracks[3].id)
+    assert removed is tracks[3]
+    assert tracks[3] not in list(queue)
+    assert len(queue) == 3
+
+
+def test_remove_unknown_id():
+    queue = GuildQueue()
+    queue.append(entry(1))
+    assert queue.remove(999) is None
+    assert len(queue) == 1
+
+
+def test_shuffle_keeps_tracks():
+    queue = GuildQueue()
+    tracks = queue.extend([entry(n) for n in range(20)])
+    queue.shuffle()
+    assert sorted(track.id for track in queue) == sorted(track.id for track in tracks)
+
+
+def test_clear():
+    queue = GuildQueue()
+    queue.extend([entry(1), entry(2)])
+    queue.clear()
+    assert len(queue) == 0
+    assert queue.peek() == []
+
+
+def test_move():
+    queue = GuildQueue()
+    tracks = queue.extend([entry(n) for n in range(4)])
+
+    assert queue.move(tracks[3].id, 0)
+    assert [track.duration for track in queue] == [3, 0, 1, 2]
+    assert queue.move(tracks[3].id, 99)
+    assert [track.duration for track in queue] == [0, 1, 2, 3]
+    assert not queue.move(999, 0)
+
+
+def test_serialize_round_trip():
+    queue = GuildQueue()
+    queue.append({**entry(1), 'requester_id': 42})
+    queue.append(entry(2))
+
+    rows = queue.serialize()
+    assert rows == [['https://example.com/1', 'Track 1', 1, 42], ['https://example.com/2', 'Track 2', 2, None]]
+
+    restored = GuildQueue.deserialize(rows)
+    assert restored.serialize() == rows
+    assert len({track.id for track in restored}) == 2
+    assert restored.append(entry(3)).id not in {track.id for track in restored.peek(2)}
@@ -0,0 +1,105 @@
+import threading
+import time
+
+import pytest
+
+from response_cache import ResponseCache
+
+
+def test_caches_until_ttl():
+    cache = ResponseCache(ttl=60)
+    calls = []
+    assert cache.get_or_compute('key', lambda: calls.append(1) or len(calls)) == 1
+    assert cache.get_or_compute('key', lambda: calls.append(1) or len(calls)) == 1
+    assert len(calls) == 1
+
+
+def test_generation_change_invalidates():
+    generation = [1]
+    cache = ResponseCache(ttl=60, generation_source=lambda: generation[0], generation_check_interval=0)
+    assert cache.get_or_compute('key', lambda: 'old') == 'old'
+    generation[0] = 2
+    assert cache.get_or_compute('key', lambda: 'new', allow_stale=False) == 'new'
+
+
+def test_stale_entry_is_served_while_refreshing():
+    cache = ResponseCache(ttl=0.01, stale_ttl=60)
+    cache.get_or_compute('key', lambda: 'old')
+    time.sleep(0.02)
+    refreshed = threading.Event()
+
+    def compute():
+        refreshed.set()
+        return 'new'
+
+    assert cache.get_or_compute('key', compute) == 'old'
+    assert refreshed.wait(1)
+    for _ in range(100):
+        if cache.get_or_compute('key', lambda: 'unexpected') == 'new':
+            break
+        time.sleep(0.01)
+    assert cache.get_or_compute('key', lambda: 'unexpected') == 'new'
+
+
+def test_stale_entry_is_recomputed_when_not_allowed():
+    cache = ResponseCache(ttl=0.01, stale_ttl=60)
+    cache.get_or_compute('key', lambda: 'old')
+    time.sleep(0.02)
+    assert cache.get_or_compute('key', lambda: 'new', allow_stale=False) == 'new'
+
+
+def test_concurrent_misses_compute_once():
+    cache = ResponseCache(ttl=60)
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(1)
+        return 'value'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute('key', compute)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ['value'] * 5
+    assert len(calls) == 1
+    assert cache._key_locks == {}
+
+
+def test_key_lock_is_released_when_compute_fails():
+    cache = ResponseCache(ttl=60)
+
+    def compute():
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute('key', compute)
+    assert cache._key_locks == {}
+    assert cache.get_or_compute('key', lambda: 'value') == 'value'
+
+
+def test_max_entries_evicts_oldest():
+    cache = ResponseCache(ttl=60, max_entries=2)
+    for key in ('a', 'b', 'c'):
+        cache.set(key, key)
+    assert list(cache._entries) == ['b', 'c']
+
+
+def test_invalidate_by_prefix_and_key():
+    cache = ResponseCache(ttl=60)
+    cache.set(('stats', 1), 'a')
+    cache.set(('stats', 2), 'b')
+    cache.set(('history', 1), 'c')
+
+    cache.invalidate(prefix='stats')
+    assert list(cache._entries) == [('history', 1)]
+
+    cache.invalidate(key=('history', 1))
+    assert not cache._entries
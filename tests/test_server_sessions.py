@@ -0,0 +1,155 @@
+import time
+
+import pytest
+from flask import Flask, request, session
+
+from server_sessions import MemorySessionStore, SQLSessionStore, init_session_store
+
+
+def make_app(backend, **kwargs):
+    app = Flask(__name__)
+    app.secret_key = 'test'
+
+    @app.route('/login')
+    def login():
+        session.clear()
+        session['user'] = 'alice'
+        return 'ok'
+
+    @app.route('/login-in-place')
+    def login_in_place():
+        # Logs in without clearing the session first
+        session['user'] = request.args.get('user', 'alice')
+        return 'ok'
+
+    @app.route('/visit')
+    def visit():
+        session['visits'] = session.get('visits', 0) + 1
+        return 'ok'
+
+    @app.route('/whoami')
+    def whoami():
+        return session.get('user', '')
+
+    @app.route('/logout')
+    def logout():
+        session.clear()
+        return 'ok'
+
+    assert init_session_store(app, backend=backend, **kwargs) == backend
+    return app
+
+
+def session_cookie(client):
+    cookie = client.get_cookie('session')
+    return cookie.value if cookie else None
+
+
+@pytest.fixture(params=['memory', 'sql'])
+def app(request, tmp_path):
+    if request.param == 'sql':
+        return make_app('sql', database_url=f"sqlite:///{tmp_path / 'sessions.db'}")
+    return make_app('memory')
+
+
+def test_cookie_is_the_default(monkeypatch):
+    monkeypatch.delenv('SESSION_BACKEND', raising=False)
+    app = Flask(__name__)
+    default_interface = app.session_interface
+    assert init_session_store(app) == 'cookie'
+    assert app.session_interface is default_interface
+
+
+def test_sql_without_database_falls_back_to_cookie(monkeypatch):
+    monkeypatch.delenv('SESSION_DATABASE_URL', raising=False)
+    monkeypatch.delenv('DATABASE_URL', raising=False)
+    assert init_session_store(Flask(__name__), backend='sql') == 'cookie'
+
+
+def test_session_round_trip(app):
+    client = app.test_client()
+    client.get('/login')
+    sid = session_cookie(client)
+    assert sid and 'alice' not in sid
+    assert client.get('/whoami').text == 'alice'
+
+
+def test_login_regenerates_session_id(app):
+    client = app.test_client()
+    client.get('/login')
+    first = session_cookie(client)
+    client.get('/login')
+    assert session_cookie(client) != first
+
+    # The old ID no longer loads the session
+    stale = app.test_client()
+    stale.set_cookie('session', first)
+    assert stale.get('/whoami').text == ''
+
+
+def test_login_without_clear_regenerates_session_id(app):
+    client = app.test_client()
+    client.get('/visit')
+    before_login = session_cookie(client)
+
+    client.get('/login-in-place')
+    assert session_cookie(client) != before_login
+    assert client.get('/whoami').text == 'alice'
+
+    # A session ID planted before the login doesn't get the logged-in user
+    planted = app.test_client()
+    planted.set_cookie('session', before_login)
+    assert planted.get('/whoami').text == ''
+
+
+def test_switching_user_regenerates_session_id(app):
+    client = app.test_client()
+    client.get('/login-in-place')
+    first = session_cookie(client)
+    client.get('/login-in-place?user=bob')
+    assert session_cookie(client) != first
+    assert client.get('/whoami').text == 'bob'
+
+
+def test_other_changes_keep_session_id(app):
+    client = app.test_client()
+    client.get('/login')
+    sid = session_cookie(client)
+    client.get('/visit')
+    client.get('/visit')
+    assert session_cookie(client) == sid
+
+
+def test_logout_drops_session(app):
+    client = app.test_client()
+    client.get('/login')
+    sid = session_cookie(client)
+    client.get('/logout')
+    assert session_cookie(client) is None
+    assert app.session_interface.store.load(sid) is None
+
+
+def test_unchanged_session_is_not_rewritten(app):
+    client = app.test_client()
+    client.get('/login')
+    store = app.session_interface.store
+    saves = []
+    original_save = store.save
+    store.save = lambda *args: saves.append(args) or original_save(*args)
+    client.get('/whoami')
+    assert saves == []
+
+
+@pytest.mark.parametrize('store_factory', [
+    MemorySessionStore,
+    lambda: SQLSessionStore('sqlite://'),
+])
+def test_store_expiry_and_sweep(store_factory):
+    store = store_factory()
+    store.save('live', {'user': 'alice'}, time.time() + 60)
+    store.save('expired', {'user': 'bob'}, time.time() - 1)
+
+    assert store.load('live')[0] == {'user': 'alice'}
+    assert store.load('expired') is None
+    assert store.sweep() == 1
+    assert store.load('live') is not None
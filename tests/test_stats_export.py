@@ -0,0 +1,96 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine
+
+import stats_export
+from models import db, CommandUsage, MinecraftCounter, MinecraftServerStats
+from stats_export import ExportError, ExportPermissionError, export_guild_scope, iter_rows, parse_export_time
+
+
+@pytest.mark.parametrize('value', [None, ''])
+def test_empty_is_open_bound(value):
+    assert parse_export_time(value) is None
+
+
+def test_epoch_seconds():
+    assert parse_export_time('1700000000') == datetime(2023, 11, 14, 22, 13, 20, tzinfo=timezone.utc)
+    assert parse_export_time(1700000000.5).microsecond == 500000
+
+
+def test_iso_8601():
+    assert parse_export_time('2024-05-01T12:00:00Z') == datetime(2024, 5, 1, 12, tzinfo=timezone.utc)
+    assert parse_export_time('2024-05-01T14:00:00+02:00') == datetime(2024, 5, 1, 12, tzinfo=timezone.utc)
+
+
+def test_naive_iso_is_utc():
+    assert parse_export_time('2024-05-01').tzinfo == timezone.utc
+
+
+@pytest.mark.parametrize('value', ['yesterday', '2024-13-01', '1e400', '99999999999999999999', float('inf')])
+def test_invalid_values_raise_export_error(value):
+    with pytest.raises(ExportError):
+        parse_export_time(value)
+
+
+@pytest.fixture
+def admins(monkeypatch):
+    monkeypatch.setattr(stats_export, 'EXPORT_ADMIN_IDS', {'1'})
+
+
+def test_admin_exports_everything_or_one_guild(admins):
+    assert export_guild_scope('1', []) is None
+    assert export_guild_scope(1, [], guild_id='300') == ['300']
+
+
+def test_user_exports_their_managed_guilds(admins):
+    assert export_guild_scope('2', [200, '100']) == ['100', '200']
+    assert export_guild_scope('2', ['100', '200'], guild_id=100) == ['100']
+
+
+def test_user_cannot_export_unmanaged_guild(admins):
+    with pytest.raises(ExportPermissionError):
+        export_guild_scope('2', ['100'], guild_id='300')
+
+
+def test_user_without_guilds_cannot_export(admins):
+    with pytest.raises(ExportPermissionError):
+        export_guild_scope('2', [])
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine('sqlite://')
+    db.metadata.create_all(engine, tables=[
+        CommandUsage.__table__, MinecraftCounter.__table__, MinecraftServerStats.__table__
+    ])
+    at = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    with engine.begin() as conn:
+        conn.execute(CommandUsage.__table__.insert(), [
+            {'command_name': 'play', 'user_id': '2', 'guild_id': '100', 'timestamp': at, 'success': True},
+            {'command_name': 'skip', 'user_id': '2', 'guild_id': '200', 'timestamp': at, 'success': True},
+        ])
+        conn.execute(MinecraftCounter.__table__.insert(), [
+            {'channel_id': 1, 'guild_id': 100, 'server_ip': 'mine.example', 'server_port': 25565,
+             'channel_name_template': '{count}', 'created_at': at},
+            {'channel_id': 2, 'guild_id': 200, 'server_ip': 'other.example', 'server_port': 25565,
+             'channel_name_template': '{count}', 'created_at': at},
+        ])
+        conn.execute(MinecraftServerStats.__table__.insert(), [
+            {'server_ip': server_ip, 'server_port': 25565, 'timestamp': at, 'is_online': True}
+            for server_ip in ('mine.example', 'other.example', 'untracked.example')
+        ])
+    return engine
+
+
+def test_iter_rows_filters_commands_by_guild(engine):
+    rows = list(iter_rows(engine, 'commands', guild_ids=['100']))
+    assert [row['command_name'] for row in rows] == ['play']
+    assert len(list(iter_rows(engine, 'commands'))) == 2
+
+
+def test_iter_rows_filters_minecraft_by_counter_guild(engine):
+    rows = list(iter_rows(engine, 'minecraft', guild_ids=['100']))
+    assert [row['server_ip'] for row in rows] == ['mine.example']
+    assert list(iter_rows(engine, 'minecraft', guild_ids=['999'])) == []
+    assert len(list(iter_rows(engine, 'minecraft'))) == 3
@@ -0,0 +1,68 @@
+import time
+
+import pytest
+
+# Importing the bot package pulls in discord.py
+pytest.importorskip('discord')
+
+from bot.track_cache import TrackCache, query_key, stream_url_expiry
+
+
+def make_info(video_id='abc', stream_url='https://example.com/stream', **extra):
+    return {
+        'id': video_id,
+        'title': f'Track {video_id}',
+        'duration': 180,
+        'webpage_url': f'https://www.youtube.com/watch?v={video_id}',
+        'url': stream_url,
+        **extra
+    }
+
+
+def test_query_key_normalizes_searches_only():
+    assert query_key('  Never  Gonna GIVE ') == 'search:never gonna give'
+    assert query_key('https://youtu.be/ABC') == 'https://youtu.be/ABC'
+
+
+def test_stream_url_expiry():
+    assert stream_url_expiry('https://x.googlevideo.com/videoplayback?expire=2000&id=1', 60, 300, now=0) == 1700
+    assert stream_url_expiry('https://x.googlevideo.com/api/manifest/expire/2000/id/1', 60, 300, now=0) == 1700
+    assert stream_url_expiry('https://example.com/stream', 60, 300, now=1000) == 1060
+
+
+def test_lookup_by_query_and_page_url():
+    cache = TrackCache()
+    cache.put(make_info(), query='some song')
+
+    assert cache.lookup('Some  Song')['id'] == 'abc'
+    assert cache.lookup('https://www.youtube.com/watch?v=abc')['id'] == 'abc'
+    assert cache.lookup('other song') is None
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_expired_stream_url_keeps_metadata():
+    cache = TrackCache()
+    expired = f'https://x.googlevideo.com/videoplayback?expire={int(time.time())}'
+    cache.put(make_info(stream_url=expired), query='some song')
+
+    assert cache.lookup('some song') is None
+    assert cache.get_video_id('some song') == 'abc'
+    assert cache.get_track('abc', require_stream=False)['title'] == 'Track abc'
+
+
+def test_query_ttl():
+    cache = TrackCache(query_ttl=-1)
+    cache.put(make_info(), query='some song')
+    assert cache.get_video_id('some song') is None
+
+
+def test_lru_bound():
+    cache = TrackCache(max_entries=2)
+    cache.put(make_info('a'))
+    cache.put(make_info('b'))
+    cache.get_track('a')
+    cache.put(make_info('c'))
+
+    assert cache.get_track('a') is not None
+    assert cache.get_track('b') is None
+    assert cache.get_track('c') is not None
@@ -0,0 +1,111 @@
+"""
+Server-side cache of each user's Discord guild list
+"""
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from discord_rest import discord_api
+from response_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+# ADMINISTRATOR or MANAGE_GUILD
+MANAGE_PERMISSIONS = 0x8 | 0x20
+
+# Discord rate-limits /users/@me/guilds hard, so lists are kept for minutes and a
+# stale list is served while a background refresh runs
+guild_cache = ResponseCache(
+    ttl=float(os.environ.get('GUILD_CACHE_TTL', 300)),
+    stale_ttl=float(os.environ.get('GUILD_CACHE_STALE_TTL', 1800)),
+    max_entries=int(os.environ.get('GUILD_CACHE_MAX_USERS', 10000))
+)
+
+# OAuth access tokens by user ID, kept here rather than in a (readable) session cookie
+MAX_ACCESS_TOKENS = int(os.environ.get('GUILD_CACHE_MAX_USERS', 10000))
+_access_tokens = OrderedDict()
+_access_tokens_lock = threading.Lock()
+
+
+class GuildFetchError(Exception):
+    """Discord did not return the user's guilds"""
+
+
+def managed_guilds(guilds):
+    """Guilds the user can manage, in the shape /api/user/servers returns"""
+    managed = []
+    for guild in guilds:
+        permissions = int(guild.get('permissions', 0))
+        if permissions & MANAGE_PERMISSIONS:
+            icon_url = None
+            if guild.get('icon'):
+                icon_url = f"https://cdn.discordapp.com/icons/{guild['id']}/{guild['icon']}.png"
+
+            managed.append({
+                'id': guild['id'],
+                'name': guild['name'],
+                'icon': icon_url,
+                'owner': guild.get('owner', False),
+                'permissions': permissions,
+                'bot_installed': True  # Assume bot is installed for demo
+            })
+    return managed
+
+
+def _entry(guilds):
+    return {'guilds': guilds, 'managed': managed_guilds(guilds)}
+
+
+def get_user_guilds(user_id, access_token, refresh=False):
+    """
+    Get a user's guilds, fetching them from Discord only on a miss
+
+    Args:
+        user_id: Discord user ID the list is cached under
+        access_token: OAuth token used if the list has to be fetched
+        refresh: Drop the cached list and fetch it again
+
+    Returns:
+        dict: 'guilds' (raw Discord guild objects) and 'managed' (the ones the user can manage)
+
+    Raises:
+        GuildFetchError: If the list had to be fetched and Discord refused
+    """
+    key = ('user-guilds', str(user_id))
+    if refresh:
+        guild_cache.invalidate(key=key)
+
+    def fetch():
+        response = discord_api.get_current_user_guilds(access_token)
+        if response.status_code != 200:
+            raise GuildFetchError(f"Discord returned {response.status_code} for user {user_id}'s guilds")
+        return _entry(response.json())
+
+    return guild_cache.get_or_compute(key, fetch)
+
+
+def store_user_guilds(user_id, guilds):
+    """Cache a guild list fetched elsewhere, e.g. during the OAuth callback"""
+    guild_cache.set(('user-guilds', str(user_id)), _entry(guilds))
+
+
+def store_access_token(user_id, access_token):
+    """Remember a user's OAuth token server-side, so later guild fetches can use it"""
+    with _access_tokens_lock:
+        _access_tokens[str(user_id)] = access_token
+        _access_tokens.move_to_end(str(user_id))
+        while len(_access_tokens) > MAX_ACCESS_TOKENS:
+            _access_tokens.popitem(last=False)
+
+
+def get_access_token(user_id):
+    """A user's stored OAuth token, or None"""
+    return _access_tokens.get(str(user_id))
+
+
+def forget_user_guilds(user_id):
+    """Drop a user's cached guild list and OAuth token, e.g. on logout"""
+    guild_cache.invalidate(key=('user-guilds', str(user_id)))
+    with _access_tokens_lock:
+        _access_tokens.pop(str(user_id), None)
@@ -1,16 +1,28 @@
 """
 Discord Bot Statistics Web Dashboard
 """
+import logging
 import os
 from datetime import datetime, timezone, timedelta
-from flask import Flask, render_template, jsonify, redirect, url_for, request, session
+from flask import Flask, Response, render_template, jsonify, redirect, url_for, request, session
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
-from models import db, BotStats, MinecraftServerStats, CommandUsage, BotUptime
+from models import db, BotStats, MinecraftServerStats, MinecraftServerRollup, CommandUsage, CommandUsageDaily, BotUptime, CACHE_GENERATION_STAT
+from response_cache import ResponseCache
+from live_updates import LiveUpdateHub
+from downsample import lttb_indices
+from stats_export import build_export, export_guild_scope, ExportError, ExportPermissionError
+from discord_rest import discord_api
+from server_sessions import init_session_store
+from user_guilds import get_user_guilds, forget_user_guilds, GuildFetchError
+import hashlib
 import json
+import re
 import requests
 from urllib.parse import urlencode
 
+logger = logging.getLogger(__name__)
+
 def create_app():
     app = Flask(__name__)
     
@@ -21,16 +33,45 @@ def create_app():
         "pool_recycle": 300,
         "pool_pre_ping": True,
     }
+    if not (app.config["SQLALCHEMY_DATABASE_URI"] or '').startswith('sqlite'):
+        # Per-worker pool: one connection per gunicorn thread plus headroom for
+        # background cache refreshes and live update polling
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"].update({
+            "pool_size": int(os.environ.get('DB_POOL_SIZE', 10)),
+            "max_overflow": int(os.environ.get('DB_MAX_OVERFLOW', 5)),
+            "pool_timeout": int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        })
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     
     # Initialize extensions
     db.init_app(app)
+    init_session_store(app)
     migrate = Migrate(app, db)
     
     with app.app_context():
         # Create tables
         db.create_all()
     
+    # Cache for the expensive dashboard endpoints; the bot's stats writer bumps the
+    # generation whenever it writes, which marks every cached response stale
+    app.response_cache = ResponseCache(
+        app=app,
+        ttl=float(os.environ.get('STATS_CACHE_TTL', 10)),
+        stale_ttl=float(os.environ.get('STATS_CACHE_STALE_TTL', 60)),
+        generation_source=lambda: BotStats.get_stat(CACHE_GENERATION_STAT, 0),
+        max_entries=int(os.environ.get('STATS_CACHE_MAX_ENTRIES', 256))
+    )
+    
+    # Pushes changes to connected dashboards; polling the cache's generation here also
+    # keeps the cache from serving a response older than the change being pushed
+    app.live_updates = LiveUpdateHub(
+        app=app,
+        generation_source=lambda: app.response_cache.current_generation(force=True),
+        poll_interval=float(os.environ.get('LIVE_UPDATE_POLL_INTERVAL', 2)),
+        max_streams=int(os.environ.get('LIVE_UPDATE_MAX_STREAMS', 4))
+    )
+    live_update_max_duration = float(os.environ.get('LIVE_UPDATE_MAX_DURATION', 60))
+    
     @app.route('/')
     def dashboard():
         """Main dashboard page - shows login if not authenticated"""
@@ -46,6 +87,7 @@ def create_app():
         no_discord = not os.environ.get('DISCORD_CLIENT_ID')
         
         if is_dev or no_discord:
+            session.clear()  # Start a fresh session so an ID from before the login can't be reused
             session['user'] = {
                 'id': '123456789',
                 'username': 'DevUser',
@@ -73,85 +115,22 @@ def create_app():
     @app.route('/api/stats')
     def api_stats():
         """API endpoint for dashboard statistics"""
-        try:
-            # Get basic bot stats
-            minecraft_counter_updates = BotStats.get_stat('minecraft_counter_updates', 0)
-            total_commands_used = BotStats.get_stat('total_commands_used', 0)
-            bot_restarts = BotStats.get_stat('bot_restarts', 0)
-            guilds_joined = BotStats.get_stat('guilds_joined', 0)
-            
-            # Get command usage breakdown
-            command_stats = db.session.query(
-                CommandUsage.command_name,
-                db.func.count(CommandUsage.id).label('count')
-            ).group_by(CommandUsage.command_name).all()
-            
-            command_breakdown = {stat.command_name: stat.count for stat in command_stats}
-            
-            # Get recent Minecraft server stats (last 24 hours)
-            yesterday = datetime.now(timezone.utc) - timedelta(hours=24)
-            recent_minecraft_stats = MinecraftServerStats.query.filter(
-                MinecraftServerStats.timestamp >= yesterday
-            ).order_by(MinecraftServerStats.timestamp.desc()).limit(100).all()
-            
-            # Calculate Minecraft server metrics
-            total_minecraft_queries = len(recent_minecraft_stats)
-            successful_queries = len([stat for stat in recent_minecraft_stats if stat.is_online])
-            avg_response_time = 0
-            max_players_seen = 0
-            current_servers = set()
-            
-            if recent_minecraft_stats:
-                total_response_time = sum(stat.response_time_ms for stat in recent_minecraft_stats if stat.response_time_ms)
-                if total_response_time > 0:
-                    avg_response_time = total_response_time / len([s for s in recent_minecraft_stats if s.response_time_ms])
-                
-                max_players_seen = max(stat.player_count for stat in recent_minecraft_stats)
-                current_servers = set(f"{stat.server_ip}:{stat.server_port}" for stat in recent_minecraft_stats)
-            
-            # Get uptime statistics
-            total_uptime = BotUptime.get_total_uptime()
-            current_session = BotUptime.get_current_session()
-            current_uptime = 0
-            if current_session and current_session.session_start:
-                # Ensure timezone-aware comparison
-                session_start = current_session.session_start
-                if session_start.tzinfo is None:
-                    session_start = session_start.replace(tzinfo=timezone.utc)
-                current_uptime = int((datetime.now(timezone.utc) - session_start).total_seconds())
-            
-            # Calculate uptime percentage (assume we want 24/7 uptime)
-            # For demo purposes, let's calculate based on last 7 days
-            total_possible_uptime = 7 * 24 * 60 * 60  # 7 days in seconds
-            uptime_percentage = min(100, (total_uptime / total_possible_uptime) * 100) if total_uptime > 0 else 0
-            
+        window = request.args.get('window', 'all')
+        if window not in COMMAND_WINDOWS:
             return jsonify({
-                'status': 'success',
-                'data': {
-                    'minecraft_counter_updates': minecraft_counter_updates,
-                    'total_commands_used': total_commands_used,
-                    'bot_restarts': bot_restarts,
-                    'guilds_joined': guilds_joined,
-                    'command_breakdown': command_breakdown,
-                    'minecraft_stats': {
-                        'total_queries': total_minecraft_queries,
-                        'successful_queries': successful_queries,
-                        'success_rate': (successful_queries / total_minecraft_queries * 100) if total_minecraft_queries > 0 else 0,
-                        'avg_response_time': round(avg_response_time, 2),
-                        'max_players_seen': max_players_seen,
-                        'servers_monitored': len(current_servers),
-                        'server_list': list(current_servers)
-                    },
-                    'uptime': {
-                        'total_seconds': total_uptime,
-                        'current_session_seconds': current_uptime,
-                        'uptime_percentage': round(uptime_percentage, 2),
-                        'formatted_total': format_uptime(total_uptime),
-                        'formatted_current': format_uptime(current_uptime)
-                    },
-                    'last_updated': datetime.now(timezone.utc).isoformat()
-                }
-            })
+                'status': 'error',
+                'message': f"window must be one of {', '.join(COMMAND_WINDOWS)}"
+            }), 400
+        guild_id = request.args.get('guild_id')
+        if guild_id and not is_snowflake(guild_id):
+            return jsonify({'status': 'error', 'message': 'guild_id must be a Discord ID'}), 400
+        
+        try:
+            payload = app.response_cache.get_or_compute(
+                ('stats', window, guild_id),
+                lambda: build_stats_payload(window, guild_id)
+            )
+            return jsonify(payload)
         except Exception as e:
             return jsonify({
                 'status': 'error',
@@ -188,52 +167,105 @@ def create_app():
     
     @app.route('/api/minecraft-history')
     def api_minecraft_history():
-        """Get Minecraft server monitoring history for charts"""
-        try:
-            # Get data for the last 24 hours
-            yesterday = datetime.now(timezone.utc) - timedelta(hours=24)
-            stats = MinecraftServerStats.query.filter(
-                MinecraftServerStats.timestamp >= yesterday
-            ).order_by(MinecraftServerStats.timestamp).all()
-            
-            # Group by server and format for chart
-            server_data = {}
-            for stat in stats:
-                server_key = f"{stat.server_ip}:{stat.server_port}"
-                if server_key not in server_data:
-                    server_data[server_key] = {
-                        'timestamps': [],
-                        'player_counts': [],
-                        'online_status': [],
-                        'response_times': []
-                    }
-                
-                server_data[server_key]['timestamps'].append(stat.timestamp.isoformat())
-                server_data[server_key]['player_counts'].append(stat.player_count)
-                server_data[server_key]['online_status'].append(stat.is_online)
-                server_data[server_key]['response_times'].append(stat.response_time_ms or 0)
-            
+        """
+        Get Minecraft server monitoring history for charts
+        
+        Each server's series is downsampled to at most `max_points` points and sent
+        as columnar arrays: `start` is the first point's epoch second and
+        `time_deltas` the seconds since the previous point. Responses carry an
+        ETag, so unchanged history costs a 304. `hours` and `max_points` are
+        rounded up to the nearest of HISTORY_HOURS / HISTORY_POINT_STEPS.
+        """
+        hours = snap_up(request.args.get('hours', 24, type=int), HISTORY_HOURS)
+        resolution = request.args.get('resolution') or pick_history_resolution(hours)
+        if resolution not in HISTORY_RESOLUTIONS:
             return jsonify({
-                'status': 'success',
-                'data': server_data
-            })
+                'status': 'error',
+                'message': f"resolution must be one of {', '.join(HISTORY_RESOLUTIONS)}"
+            }), 400
+        max_points = snap_up(request.args.get('max_points', DEFAULT_HISTORY_POINTS, type=int), HISTORY_POINT_STEPS)
+        
+        try:
+            def encode():
+                # Never stale here: this runs when the body entry is refreshed, and a stale
+                # payload would be stored again under the new generation with a new ETag
+                payload = app.response_cache.get_or_compute(
+                    ('minecraft-history', hours, resolution, max_points),
+                    lambda: build_minecraft_history_payload(hours, resolution, max_points),
+                    allow_stale=False
+                )
+                body = json.dumps(payload, separators=(',', ':')).encode()
+                return body, hashlib.sha1(body).hexdigest()
+            
+            # Cache the encoded body too, so repeat requests skip serialization
+            body, etag = app.response_cache.get_or_compute(
+                ('minecraft-history-body', hours, resolution, max_points), encode
+            )
+            response = app.response_class(body, mimetype='application/json')
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response.make_conditional(request)
         except Exception as e:
             return jsonify({
                 'status': 'error',
                 'message': str(e)
             }), 500
     
+    @app.route('/api/stream')
+    def api_stream():
+        """Server-Sent Events stream of dashboard stats and Minecraft history"""
+        window = request.args.get('window', 'all')
+        if window not in COMMAND_WINDOWS:
+            return jsonify({
+                'status': 'error',
+                'message': f"window must be one of {', '.join(COMMAND_WINDOWS)}"
+            }), 400
+        guild_id = request.args.get('guild_id')
+        if guild_id and not is_snowflake(guild_id):
+            return jsonify({'status': 'error', 'message': 'guild_id must be a Discord ID'}), 400
+        hours = snap_up(request.args.get('hours', 24, type=int), HISTORY_HOURS)
+        resolution = pick_history_resolution(hours)
+        
+        # Every stream holds a worker thread; past the cap the dashboard falls back to polling
+        if not app.live_updates.acquire_stream():
+            response = jsonify({'status': 'error', 'message': 'Too many live connections, poll instead'})
+            response.status_code = 503
+            response.headers['Retry-After'] = '30'
+            return response
+        
+        def build_snapshot():
+            # A short-lived app context per snapshot returns the database connection
+            # to the pool instead of holding it for the life of the stream
+            with app.app_context():
+                stats = app.response_cache.get_or_compute(
+                    ('stats', window, guild_id),
+                    lambda: build_stats_payload(window, guild_id),
+                    allow_stale=False
+                )
+                history = app.response_cache.get_or_compute(
+                    ('minecraft-history', hours, resolution, DEFAULT_HISTORY_POINTS),
+                    lambda: build_minecraft_history_payload(hours, resolution, DEFAULT_HISTORY_POINTS),
+                    allow_stale=False
+                )
+            return {
+                'stats': stats['data'],
+                'minecraft_history': {'resolution': history['resolution'], 'data': history['data']}
+            }
+        
+        response = Response(
+            app.live_updates.stream(build_snapshot, max_duration=live_update_max_duration),
+            mimetype='text/event-stream'
+        )
+        response.call_on_close(app.live_updates.release_stream)
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+    
     # Music API Endpoints
     @app.route('/api/music/status')
     def music_status():
         """Get current music status"""
-        return jsonify({
-            'is_playing': False,
-            'current_track': None,
-            'queue_length': 0,
-            'volume': 50,
-            'connected_to_voice': False
-        })
+        return jsonify(build_music_status())
 
     @app.route('/api/music/play', methods=['POST'])
     def music_play():
@@ -416,14 +448,50 @@ def create_app():
             'message': 'Bot restart initiated'
         })
 
-    @app.route('/api/logs/export', methods=['POST'])
+    @app.route('/api/logs/export', methods=['GET', 'POST'])
+    @app.route('/api/settings/export-logs')
     def export_logs():
-        """Export bot logs"""
-        return jsonify({
-            'success': True,
-            'download_url': '/downloads/bot_logs.zip',
-            'message': 'Logs exported successfully'
-        })
+        """
+        Stream a statistics history export
+        
+        Parameters (query string, form or JSON body): dataset (minecraft, commands
+        or uptime), format (csv or ndjson), since / until (ISO 8601 or epoch
+        seconds), gzip (1 to compress) and guild_id. Only the guilds the user
+        manages are exported (all of them unless guild_id picks one); users in
+        DASHBOARD_ADMIN_IDS may export everything.
+        """
+        if 'user' not in session:
+            return jsonify({'success': False, 'message': 'Not authenticated'}), 401
+        
+        params = {**request.values.to_dict(), **(request.get_json(silent=True) or {})}
+        try:
+            guilds = get_user_guilds(session['user']['id'], session['user']['access_token'])
+            guild_ids = export_guild_scope(
+                session['user']['id'],
+                [guild['id'] for guild in guilds['managed']],
+                guild_id=params.get('guild_id')
+            )
+            chunks, mimetype, filename = build_export(
+                db.engine,
+                params.get('dataset', 'minecraft'),
+                fmt=params.get('format', 'csv'),
+                since=params.get('since'),
+                until=params.get('until'),
+                compress=str(params.get('gzip', '')).lower() in ('1', 'true', 'yes'),
+                guild_ids=guild_ids
+            )
+        except (GuildFetchError, requests.RequestException) as e:
+            logger.error(f"Server fetch error: {e}")
+            return jsonify({'success': False, 'message': 'Failed to fetch servers'}), 502
+        except ExportPermissionError as e:
+            return jsonify({'success': False, 'message': str(e)}), 403
+        except ExportError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        
+        response = Response(chunks, mimetype=mimetype)
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
 
     # Discord OAuth and Server Management API Endpoints
     @app.route('/api/auth/discord')
@@ -473,18 +541,8 @@ def create_app():
         
         try:
             # Exchange code for access token
-            token_data = {
-                'client_id': client_id,
-                'client_secret': client_secret,
-                'grant_type': 'authorization_code',
-                'code': code,
-                'redirect_uri': request.url_root + 'api/auth/callback'
-            }
-            
-            token_response = requests.post(
-                'https://discord.com/api/oauth2/token',
-                data=token_data,
-                headers={'Content-Type': 'application/x-www-form-urlencoded'}
+            token_response = discord_api.exchange_code(
+                client_id, client_secret, code, request.url_root + 'api/auth/callback'
             )
             
             if token_response.status_code != 200:
@@ -497,17 +555,15 @@ def create_app():
                 return redirect(url_for('dashboard') + '?error=no_access_token')
             
             # Get user information
-            user_response = requests.get(
-                'https://discord.com/api/users/@me',
-                headers={'Authorization': f'Bearer {access_token}'}
-            )
+            user_response = discord_api.get_current_user(access_token)
             
             if user_response.status_code != 200:
                 return redirect(url_for('dashboard') + '?error=user_fetch_failed')
             
             user_data = user_response.json()
             
-            # Store user in session
+            # Store user in a fresh session so an ID from before the login can't be reused
+            session.clear()
             session['user'] = {
                 'id': user_data['id'],
                 'username': user_data['username'],
@@ -529,39 +585,13 @@ def create_app():
             return jsonify({'error': 'Not authenticated'}), 401
         
         try:
-            access_token = session['user']['access_token']
-            
-            # Get user's servers
-            guilds_response = requests.get(
-                'https://discord.com/api/users/@me/guilds',
-                headers={'Authorization': f'Bearer {access_token}'}
+            # Served from the per-user cache; ?refresh=1 fetches the list from Discord again
+            guilds = get_user_guilds(
+                session['user']['id'],
+                session['user']['access_token'],
+                refresh=request.args.get('refresh', '').lower() in ('1', 'true', 'yes')
             )
-            
-            if guilds_response.status_code != 200:
-                return jsonify({'error': 'Failed to fetch servers'}), 500
-            
-            guilds = guilds_response.json()
-            
-            # Filter servers where user has manage permissions
-            managed_servers = []
-            for guild in guilds:
-                # Check if user has administrator or manage_guild permissions
-                permissions = int(guild.get('permissions', 0))
-                if permissions & 0x8 or permissions & 0x20:  # ADMINISTRATOR or MANAGE_GUILD
-                    icon_url = None
-                    if guild.get('icon'):
-                        icon_url = f"https://cdn.discordapp.com/icons/{guild['id']}/{guild['icon']}.png"
-                    
-                    managed_servers.append({
-                        'id': guild['id'],
-                        'name': guild['name'],
-                        'icon': icon_url,
-                        'owner': guild.get('owner', False),
-                        'permissions': permissions,
-                        'bot_installed': True  # Assume bot is installed for demo
-                    })
-            
-            return jsonify(managed_servers)
+            return jsonify(guilds['managed'])
             
         except Exception as e:
             print(f"Server fetch error: {e}")
@@ -570,6 +600,8 @@ def create_app():
     @app.route('/api/auth/logout', methods=['POST'])
     def logout():
         """Logout user and clear session"""
+        if 'user' in session:
+            forget_user_guilds(session['user']['id'])
         session.clear()
         return jsonify({'success': True, 'message': 'Logged out successfully'})
 
@@ -646,11 +678,17 @@ def create_app():
     @app.route('/api/music/playlist/<playlist_id>', methods=['POST'])
     def load_playlist(playlist_id):
         """Load playlist into queue"""
+        if not PLAYLIST_ID_PATTERN.match(playlist_id):
+            return jsonify({'error': 'Invalid playlist ID'}), 400
+        
+        # The web app has no channel to the bot process, so playlists are queued with the bot's
+        # /playlist command (see MusicPlayer.stream_playlist)
         return jsonify({
-            'success': True,
+            'success': False,
+            'error': 'Loading playlists from the dashboard is not supported yet, use the /playlist command in Discord',
             'playlist': playlist_id,
-            'message': f'Loaded playlist {playlist_id}'
-        })
+            'url': f'https://www.youtube.com/playlist?list={playlist_id}'
+        }), 501
 
     @app.route('/api/minecraft/force-update/<int:server_id>', methods=['POST'])
     def force_update_minecraft_server(server_id):
@@ -672,6 +710,269 @@ def create_app():
 
     return app
 
+# YouTube playlist IDs (PL..., OL..., UU..., RD... mixes)
+PLAYLIST_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{2,64}$')
+
+HISTORY_RESOLUTIONS = ('raw', 'minute', 'hour', 'day')
+
+# Points per server in a history chart; the chart is only a few hundred pixels wide
+DEFAULT_HISTORY_POINTS = 500
+MAX_HISTORY_POINTS = 5000
+
+# Requested ranges and point counts are rounded up to one of these, so the
+# response cache only ever sees a handful of distinct keys
+HISTORY_HOURS = (1, 2, 6, 12, 24, 48, 72, 168, 336, 720, 2160, 4380, 8760)
+HISTORY_POINT_STEPS = (50, 100, 200, 500, 1000, 2000, MAX_HISTORY_POINTS)
+
+def snap_up(value, allowed):
+    """The smallest allowed value >= value (the largest if value is bigger than all of them)"""
+    for option in allowed:
+        if value <= option:
+            return option
+    return allowed[-1]
+
+def is_snowflake(value):
+    """Whether a string looks like a Discord ID"""
+    return value.isdigit() and len(value) <= 20
+
+# Command breakdown windows in days (None = all history)
+COMMAND_WINDOWS = {
+    '24h': 1,
+    '7d': 7,
+    '30d': 30,
+    'all': None
+}
+
+def command_window_start(window):
+    """First UTC day included in a command breakdown window (aggregates are per calendar day)"""
+    days = COMMAND_WINDOWS[window]
+    if days is None:
+        return None
+    return (datetime.now(timezone.utc) - timedelta(days=days)).date()
+
+def build_music_status():
+    """Current music player state"""
+    return {
+        'is_playing': False,
+        'current_track': None,
+        'queue_length': 0,
+        'volume': 50,
+        'connected_to_voice': False
+    }
+
+def pick_history_resolution(hours):
+    """Pick the coarsest history resolution that still gives a detailed chart"""
+    if hours <= 2:
+        return 'raw'
+    elif hours <= 48:
+        return 'minute'
+    elif hours <= 24 * 30:
+        return 'hour'
+    return 'day'
+
+def build_minecraft_history_payload(hours, resolution, max_points=DEFAULT_HISTORY_POINTS):
+    """Compute the /api/minecraft-history response body"""
+    since = datetime.now(timezone.utc) - timedelta(hours=hours)
+    server_data = {}
+    if resolution != 'raw':
+        server_data = get_rollup_history(resolution, since)
+    if not server_data:
+        # Rollups not built yet (or raw requested) - read raw probes
+        resolution = 'raw'
+        server_data = get_raw_history(since)
+    
+    return {
+        'status': 'success',
+        'resolution': resolution,
+        'max_points': max_points,
+        'data': {
+            server_key: to_columnar_series(series, max_points)
+            for server_key, series in server_data.items()
+        }
+    }
+
+def to_columnar_series(series, max_points):
+    """
+    Downsample one server's series with LTTB on player counts and encode its times
+    
+    `timestamps` (epoch seconds) becomes `start` plus `time_deltas`, the seconds
+    since the previous point; every other column is kept at the same indices.
+    """
+    timestamps = series.pop('timestamps')
+    keep = lttb_indices(timestamps, series['player_counts'], max_points)
+    
+    columnar = {
+        'start': timestamps[keep[0]],
+        'time_deltas': [0] + [timestamps[i] - timestamps[prev] for prev, i in zip(keep, keep[1:])]
+    }
+    for name, values in series.items():
+        columnar[name] = [values[i] for i in keep]
+    return columnar
+
+def epoch_seconds(value):
+    """Whole epoch seconds of a database timestamp (naive values are UTC)"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+def get_raw_history(since):
+    """Chart series per server built from raw probe rows"""
+    rows = db.session.query(
+        MinecraftServerStats.server_ip,
+        MinecraftServerStats.server_port,
+        MinecraftServerStats.timestamp,
+        MinecraftServerStats.player_count,
+        MinecraftServerStats.is_online,
+        MinecraftServerStats.response_time_ms
+    ).filter(
+        MinecraftServerStats.timestamp >= since
+    ).order_by(MinecraftServerStats.timestamp)
+    
+    server_data = {}
+    for row in rows:
+        server_key = f"{row.server_ip}:{row.server_port}"
+        if server_key not in server_data:
+            server_data[server_key] = {
+                'timestamps': [],
+                'player_counts': [],
+                'online_status': [],
+                'response_times': []
+            }
+        
+        server_data[server_key]['timestamps'].append(epoch_seconds(row.timestamp))
+        server_data[server_key]['player_counts'].append(row.player_count)
+        server_data[server_key]['online_status'].append(1 if row.is_online else 0)
+        server_data[server_key]['response_times'].append(row.response_time_ms or 0)
+    return server_data
+
+def get_rollup_history(resolution, since):
+    """Chart series per server built from one rollup resolution"""
+    rollups = MinecraftServerRollup.query.filter(
+        MinecraftServerRollup.resolution == resolution,
+        MinecraftServerRollup.bucket_start >= since
+    ).order_by(MinecraftServerRollup.bucket_start)
+    
+    server_data = {}
+    for rollup in rollups:
+        server_key = f"{rollup.server_ip}:{rollup.server_port}"
+        if server_key not in server_data:
+            server_data[server_key] = {
+                'timestamps': [],
+                'player_counts': [],
+                'min_players': [],
+                'max_players': [],
+                'online_status': [],
+                'uptime_ratio': [],
+                'response_times': [],
+                'p95_response_times': []
+            }
+        
+        series = server_data[server_key]
+        series['timestamps'].append(epoch_seconds(rollup.bucket_start))
+        series['player_counts'].append(round(rollup.avg_players, 2))
+        series['min_players'].append(rollup.min_players)
+        series['max_players'].append(rollup.max_players)
+        series['online_status'].append(1 if rollup.uptime_ratio >= 0.5 else 0)
+        series['uptime_ratio'].append(round(rollup.uptime_ratio, 4))
+        series['response_times'].append(rollup.p50_response_ms)
+        series['p95_response_times'].append(rollup.p95_response_ms)
+    return server_data
+
+# BotStats counters reported as-is by /api/stats
+DASHBOARD_COUNTERS = ('minecraft_counter_updates', 'total_commands_used', 'bot_restarts', 'guilds_joined')
+
+def build_stats_payload(window, guild_id=None):
+    """Compute the /api/stats response body"""
+    # Get basic bot stats
+    counters = BotStats.get_many(DASHBOARD_COUNTERS)
+    
+    # Get command usage breakdown from the daily aggregates
+    command_breakdown = CommandUsageDaily.breakdown(
+        since_day=command_window_start(window),
+        guild_id=guild_id
+    )
+    
+    # Get Minecraft server metrics for the last 24 hours from the per-minute rollups
+    yesterday = datetime.now(timezone.utc) - timedelta(hours=24)
+    minute_rollups = db.session.query(
+        db.func.sum(MinecraftServerRollup.sample_count),
+        db.func.sum(MinecraftServerRollup.online_count),
+        db.func.sum(MinecraftServerRollup.sum_response_ms),
+        db.func.sum(MinecraftServerRollup.response_count),
+        db.func.max(MinecraftServerRollup.max_players)
+    ).filter(
+        MinecraftServerRollup.resolution == 'minute',
+        MinecraftServerRollup.bucket_start >= yesterday
+    ).one()
+    
+    total_minecraft_queries = int(minute_rollups[0] or 0)
+    successful_queries = int(minute_rollups[1] or 0)
+    total_response_time = int(minute_rollups[2] or 0)
+    response_count = int(minute_rollups[3] or 0)
+    max_players_seen = int(minute_rollups[4] or 0)
+    
+    current_servers = set(
+        f"{server_ip}:{server_port}"
+        for server_ip, server_port in db.session.query(
+            MinecraftServerRollup.server_ip,
+            MinecraftServerRollup.server_port
+        ).filter(
+            MinecraftServerRollup.resolution == 'minute',
+            MinecraftServerRollup.bucket_start >= yesterday
+        ).distinct()
+    )
+    
+    # Rollups trail the probes by a minute or two; add the raw samples past the minute watermark
+    watermark = BotStats.get_stat('rollup_watermark_minute', 0)
+    tail_start = max(yesterday, datetime.fromtimestamp(watermark, tz=timezone.utc))
+    tail_samples, tail_online, tail_response_ms, tail_responses, tail_max_players, tail_servers = \
+        MinecraftServerStats.summary_since(tail_start)
+    total_minecraft_queries += tail_samples
+    successful_queries += tail_online
+    total_response_time += tail_response_ms
+    response_count += tail_responses
+    avg_response_time = total_response_time / response_count if response_count else 0
+    max_players_seen = max(max_players_seen, tail_max_players)
+    current_servers |= tail_servers
+    
+    # Get uptime statistics
+    uptime_summary = BotUptime.get_summary()
+    total_uptime = uptime_summary['total_seconds']
+    current_uptime = 0
+    if uptime_summary['current_session_start']:
+        current_uptime = int((datetime.now(timezone.utc) - uptime_summary['current_session_start']).total_seconds())
+    
+    # Calculate uptime percentage (assume we want 24/7 uptime)
+    # For demo purposes, let's calculate based on last 7 days
+    total_possible_uptime = 7 * 24 * 60 * 60  # 7 days in seconds
+    uptime_percentage = min(100, (total_uptime / total_possible_uptime) * 100) if total_uptime > 0 else 0
+    
+    return {
+        'status': 'success',
+        'data': {
+            **counters,
+            'command_breakdown': command_breakdown,
+            'command_window': window,
+            'minecraft_stats': {
+                'total_queries': total_minecraft_queries,
+                'successful_queries': successful_queries,
+                'success_rate': (successful_queries / total_minecraft_queries * 100) if total_minecraft_queries > 0 else 0,
+                'avg_response_time': round(avg_response_time, 2),
+                'max_players_seen': max_players_seen,
+                'servers_monitored': len(current_servers),
+                'server_list': list(current_servers)
+            },
+            'uptime': {
+                'total_seconds': total_uptime,
+                'current_session_seconds': current_uptime,
+                'uptime_percentage': round(uptime_percentage, 2),
+                'formatted_total': format_uptime(total_uptime),
+                'formatted_current': format_uptime(current_uptime)
+            },
+            'last_updated': datetime.now(timezone.utc).isoformat()
+        }
+    }
+
 def format_uptime(seconds):
     """Format uptime seconds into human readable format"""
     if seconds < 60: